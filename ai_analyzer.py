@@ -1,19 +1,117 @@
 # ai_analyzer.py (타임아웃 기능 추가 최종 완성본)
 import os
+import re
+import time
+import zlib
+import threading
 from dotenv import load_dotenv
-import google.generativeai as genai
 from collections import Counter
+from analysis_cache import make_cache_key
+from instrumentation import stage, add_bytes, count_retry
+from http_client import rate_limit
 
 load_dotenv()
 
+class _StubResponse:
+    def __init__(self, text):
+        self.text = text
+
+class StubModel:
+    """오프라인 벤치마크용 가짜 모델. 지정된 지연 뒤에 실제 응답과 같은 형식의 텍스트를 돌려줍니다."""
+
+    model_name = "stub"
+
+    def __init__(self, latency=1.0):
+        self.latency = latency
+
+    def generate_content(self, prompt, request_options=None, **kwargs):
+        timeout = (request_options or {}).get("timeout")
+        if timeout is not None and self.latency > timeout:
+            time.sleep(timeout)
+            raise TimeoutError(f"stub model exceeded {timeout}s")
+        time.sleep(self.latency)
+
+        # 배치 프롬프트면 항목마다 블록을 만들어 돌려줌
+        items = BATCH_ITEM_PATTERN.split(prompt)
+        if len(items) > 1:
+            blocks = []
+            for item_id, body in zip(items[1::2], items[2::2]):
+                blocks.append(f"ITEM: {item_id}\n{self._article_block(body)}")
+            return _StubResponse("\n\n".join(blocks))
+        if "News Content:" in prompt:
+            return _StubResponse(self._article_block(prompt.split("News Content:", 1)[1]))
+        return _StubResponse("TITLE: 스텁 리포트\nSUMMARY: 스텁 모델이 생성한 요약입니다.")
+
+    @staticmethod
+    def _article_block(content):
+        # 같은 기사에는 단건/배치 여부와 관계없이 항상 같은 점수가 나오도록 해시로 감성 점수를 만듦
+        score = (zlib.crc32(content.strip().encode('utf-8')) % 200 - 100) / 100
+        return (f"SENTIMENT: {score:.2f}\n"
+                "SUMMARY: 스텁 모델이 생성한 요약입니다.\nKEYWORDS: stub, market, news")
+
+class RateLimitedModel:
+    """generate_content 호출 전에 제공자별 호출량 제한(http_client)을 지키도록 감싼 모델."""
+
+    def __init__(self, model, provider):
+        self.model = model
+        self.provider = provider
+        self.model_name = getattr(model, "model_name", None)
+
+    def generate_content(self, *args, **kwargs):
+        rate_limit(self.provider)
+        return self.model.generate_content(*args, **kwargs)
+
+MODEL_NAME = 'models/gemini-2.5-flash'
+ARTICLE_TEMPERATURE = 0.3
+# 기사 분석 프롬프트 문구를 바꾸면 이 값을 올려서 이전 캐시를 무효화합니다.
+ARTICLE_PROMPT_VERSION = 1
+ARTICLE_CONTENT_LIMIT = 1500
+
+# 배치 분석: 한 요청에 묶을 최대 기사 수와, 토큰 수 추정용 비율(영문 기준 약 4글자 = 1토큰)
+BATCH_MAX_ITEMS = 8
+CHARS_PER_TOKEN = 4
+BATCH_ITEM_PATTERN = re.compile(r'^\s*\[ITEM (\d+)\]\s*$', re.MULTILINE)
+
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
-if GEMINI_API_KEY:
-    genai.configure(api_key=GEMINI_API_KEY)
-    ai_model = genai.GenerativeModel('models/gemini-2.5-flash')
-    print("✅ Gemini API 키가 성공적으로 로드되었습니다.")
-else:
-    ai_model = None
+AI_STUB_LATENCY = os.getenv("AI_STUB_LATENCY")
+
+# 모델 클라이언트는 처음 사용할 때 만듭니다. (google.generativeai import와 설정이 수 초 걸리므로)
+_model = None
+_model_ready = False
+_model_lock = threading.Lock()
+
+def _create_model():
+    if AI_STUB_LATENCY is not None:
+        print(f"🧪 스텁 AI 모델을 사용합니다 (지연 {AI_STUB_LATENCY}초).")
+        return StubModel(latency=float(AI_STUB_LATENCY))
+    if GEMINI_API_KEY:
+        import google.generativeai as genai
+        genai.configure(api_key=GEMINI_API_KEY)
+        print("✅ Gemini API 키가 성공적으로 로드되었습니다.")
+        return RateLimitedModel(genai.GenerativeModel(MODEL_NAME), "gemini")
     print("❌ Gemini API 키를 찾을 수 없습니다! .env 파일을 확인해주세요.")
+    return None
+
+def get_model():
+    """프로세스에서 공유하는 AI 모델을 반환합니다. 처음 호출할 때 한 번만 만듭니다. (키가 없으면 None)"""
+    global _model, _model_ready
+    if not _model_ready:
+        with _model_lock:
+            if not _model_ready:
+                _model = _create_model()
+                _model_ready = True
+    return _model
+
+def set_model(model):
+    """사용할 모델을 직접 지정합니다. (벤치마크/테스트에서 가짜 모델로 교체할 때 사용)"""
+    global _model, _model_ready
+    with _model_lock:
+        _model, _model_ready = model, True
+    return model
+
+def use_stub_model(latency=1.0):
+    """벤치마크를 위해 실행 중에 스텁 모델로 교체합니다."""
+    return set_model(StubModel(latency=latency))
 
 SAFETY_SETTINGS = [
     {"category": "HARM_CATEGORY_HARASSMENT", "threshold": "BLOCK_NONE"},
@@ -22,10 +120,31 @@ SAFETY_SETTINGS = [
     {"category": "HARM_CATEGORY_DANGEROUS_CONTENT", "threshold": "BLOCK_NONE"},
 ]
 
-def analyze_article_with_ai(content):
-    """Gemini AI를 사용하여 뉴스 기사를 분석합니다."""
-    if not ai_model or not content or len(content) < 50:
+def parse_article_response(text):
+    """SENTIMENT:/SUMMARY:/KEYWORDS: 형식의 응답을 결과 딕셔너리로 변환합니다."""
+    sentiment, summary, keywords = 0.0, "분석 실패", []
+    for line in text.split('\n'):
+        if 'SENTIMENT:' in line: sentiment = float(line.split(':', 1)[1].strip())
+        elif 'SUMMARY:' in line: summary = line.split(':', 1)[1].strip()
+        elif 'KEYWORDS:' in line: keywords = [k.strip() for k in line.split(':', 1)[1].split(',')]
+    return {"summary": summary, "sentiment": max(-1.0, min(1.0, sentiment)), "keywords": keywords[:3]}
+
+def article_cache_key(content):
+    """현재 모델/프롬프트 설정 기준으로 기사 분석 캐시 키를 만듭니다."""
+    model_name = getattr(get_model(), 'model_name', MODEL_NAME)
+    return make_cache_key(content[:ARTICLE_CONTENT_LIMIT], model_name, ARTICLE_TEMPERATURE, ARTICLE_PROMPT_VERSION)
+
+def analyze_article_with_ai(content, timeout=60, cache=None):
+    """Gemini AI를 사용하여 뉴스 기사를 분석합니다. timeout은 호출 하나의 제한 시간(초)입니다."""
+    if not get_model() or not content or len(content) < 50:
         return {"summary": "분석 불가", "sentiment": 0.0, "keywords": []}
+
+    cache_key = None
+    if cache is not None:
+        cache_key = article_cache_key(content)
+        cached = cache.get(cache_key)
+        if cached is not None:
+            return cached
     
     prompt = f"""
     Analyze the following financial news article and provide the response strictly in the following format:
@@ -33,31 +152,126 @@ def analyze_article_with_ai(content):
     SUMMARY: [A 3-sentence summary in Korean]
     KEYWORDS: [keyword1], [keyword2], [keyword3]
 
-    News Content:\n{content[:1500]}
+    News Content:\n{content[:ARTICLE_CONTENT_LIMIT]}
     """
     try:
-        # ✨ 중요: 60초 타임아웃 설정 추가
-        response = ai_model.generate_content(
-            prompt,
-            safety_settings=SAFETY_SETTINGS,
-            generation_config={"temperature": 0.3},
-            request_options={"timeout": 60}
-        )
-        
-        text = response.text.strip()
-        sentiment, summary, keywords = 0.0, "분석 실패", []
-        for line in text.split('\n'):
-            if 'SENTIMENT:' in line: sentiment = float(line.split(':', 1)[1].strip())
-            elif 'SUMMARY:' in line: summary = line.split(':', 1)[1].strip()
-            elif 'KEYWORDS:' in line: keywords = [k.strip() for k in line.split(':', 1)[1].split(',')]
-        return {"summary": summary, "sentiment": max(-1.0, min(1.0, sentiment)), "keywords": keywords[:3]}
+        # ✨ 중요: 호출별 타임아웃 설정 (기본 60초)
+        with stage("gemini.article"):
+            response = get_model().generate_content(
+                prompt,
+                safety_settings=SAFETY_SETTINGS,
+                generation_config={"temperature": ARTICLE_TEMPERATURE},
+                request_options={"timeout": timeout}
+            )
+        add_bytes("gemini", len(response.text.encode('utf-8')))
+
+        result = parse_article_response(response.text.strip())
     except Exception as e:
         print(f"❌ AI 기사 분석 중 타임아웃 또는 오류 발생: {e}")
         return {"summary": "AI 응답 지연", "sentiment": 0.0, "keywords": ["오류"]}
 
+    # 정상적으로 분석된 결과만 캐시에 저장 (오류/지연 응답은 다음 실행에서 다시 시도)
+    if cache_key is not None:
+        cache.put(cache_key, result)
+    return result
+
+def estimate_tokens(text):
+    """프롬프트 길이를 토큰 수로 대략 추정합니다."""
+    return len(text) // CHARS_PER_TOKEN + 1
+
+def pack_batches(contents, max_batch_tokens, max_items=BATCH_MAX_ITEMS):
+    """기사 목록을 토큰 한도 안에서 순서대로 묶어 인덱스 리스트의 리스트로 돌려줍니다."""
+    batches, current, current_tokens = [], [], 0
+    for i, content in enumerate(contents):
+        tokens = estimate_tokens(content[:ARTICLE_CONTENT_LIMIT]) + 150  # 항목별 응답 분량 여유
+        if current and (current_tokens + tokens > max_batch_tokens or len(current) >= max_items):
+            batches.append(current)
+            current, current_tokens = [], 0
+        current.append(i)
+        current_tokens += tokens
+    if current:
+        batches.append(current)
+    return batches
+
+def parse_batch_response(text):
+    """ITEM: 으로 구분된 배치 응답을 {항목 ID: 결과} 딕셔너리로 변환합니다. 형식이 깨진 항목은 빠집니다."""
+    results = {}
+    for block in re.split(r'^\s*ITEM:\s*', text, flags=re.MULTILINE)[1:]:
+        item_id, _, body = block.partition('\n')
+        item_id = item_id.strip().strip('[]')
+        if 'SENTIMENT:' not in body or 'SUMMARY:' not in body:
+            continue
+        try:
+            results[item_id] = parse_article_response(body)
+        except ValueError:
+            continue
+    return results
+
+def _request_batch(contents, timeout):
+    """여러 기사를 하나의 요청으로 분석하고 파싱된 결과를 {항목 ID: 결과}로 돌려줍니다."""
+    sections = "\n\n".join(
+        f"[ITEM {i + 1}]\n{content[:ARTICLE_CONTENT_LIMIT]}" for i, content in enumerate(contents)
+    )
+    prompt = f"""
+    Analyze each of the following financial news articles independently.
+    For EVERY article, output one block strictly in the following format, in the same order, separated by a blank line:
+    ITEM: [the article number]
+    SENTIMENT: [A single number between -1.0 and 1.0]
+    SUMMARY: [A 3-sentence summary in Korean, on one line]
+    KEYWORDS: [keyword1], [keyword2], [keyword3]
+
+{sections}
+    """
+    with stage("gemini.batch", items=len(contents)):
+        response = get_model().generate_content(
+            prompt,
+            safety_settings=SAFETY_SETTINGS,
+            generation_config={"temperature": ARTICLE_TEMPERATURE},
+            request_options={"timeout": timeout}
+        )
+    add_bytes("gemini", len(response.text.encode('utf-8')))
+    return parse_batch_response(response.text.strip())
+
+def analyze_articles_batch(contents, max_batch_tokens=4000, timeout=60, cache=None):
+    """여러 기사를 토큰 한도 안에서 묶어 분석합니다. 결과는 입력 순서대로, analyze_article_with_ai와 같은 형태입니다."""
+    results = [None] * len(contents)
+    pending = []
+    for i, content in enumerate(contents):
+        if not get_model() or not content or len(content) < 50:
+            results[i] = {"summary": "분석 불가", "sentiment": 0.0, "keywords": []}
+            continue
+        if cache is not None:
+            cached = cache.get(article_cache_key(content))
+            if cached is not None:
+                results[i] = cached
+                continue
+        pending.append(i)
+
+    pending_contents = [contents[i] for i in pending]
+    for batch in pack_batches(pending_contents, max_batch_tokens):
+        indices = [pending[j] for j in batch]
+        batch_contents = [contents[i] for i in indices]
+        try:
+            parsed = _request_batch(batch_contents, timeout)
+        except Exception as e:
+            print(f"❌ AI 배치 분석 중 타임아웃 또는 오류 발생, 개별 분석으로 전환합니다: {e}")
+            parsed = {}
+
+        for n, i in enumerate(indices):
+            result = parsed.get(str(n + 1))
+            if result is None:
+                # 파싱에 실패한 항목만 단건 요청으로 다시 시도
+                count_retry("gemini.batch_item")
+                results[i] = analyze_article_with_ai(contents[i], timeout, cache)
+                continue
+            if cache is not None:
+                cache.put(article_cache_key(contents[i]), result)
+            results[i] = result
+    return results
+
 def generate_trend_summary_with_ai(keywords, sentiment_score):
     """AI를 사용하여 시장 트렌드 요약을 생성합니다."""
-    if not ai_model or not keywords:
+    if not get_model() or not keywords:
         return {"title": "분석 데이터 부족", "summary": "AI 트렌드 요약을 생성하기 위한 데이터가 부족합니다.", "keywords": []}
     
     common_keywords = [item[0] for item in Counter(keywords).most_common(5)]
@@ -72,7 +286,7 @@ def generate_trend_summary_with_ai(keywords, sentiment_score):
     """
     try:
         # ✨ 중요: 여기에도 60초 타임아웃 설정 추가
-        response = ai_model.generate_content(
+        response = get_model().generate_content(
             prompt,
             safety_settings=SAFETY_SETTINGS,
             generation_config={"temperature": 0.5},
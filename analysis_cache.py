@@ -0,0 +1,83 @@
+# analysis_cache.py (AI 기사 분석 결과 캐시)
+
+import os
+import json
+import time
+import hashlib
+import sqlite3
+import threading
+
+DEFAULT_CACHE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'analysis_cache.db')
+DEFAULT_TTL = 7 * 24 * 3600   # 7일
+DEFAULT_MAX_ENTRIES = 5000
+
+
+def make_cache_key(content, model_name, temperature, prompt_version):
+    """프롬프트를 결정하는 입력값들로 내용 기반 캐시 키를 만듭니다."""
+    payload = json.dumps([prompt_version, model_name, temperature, content], ensure_ascii=False)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class AnalysisCache:
+    """SQLite에 저장되는 분석 결과 캐시. TTL이 지난 항목은 무시하고, 크기가 넘치면 오래 안 쓴 항목부터 지웁니다."""
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, ttl=DEFAULT_TTL, max_entries=DEFAULT_MAX_ENTRIES):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute('''
+        CREATE TABLE IF NOT EXISTS analysis_cache (
+            cache_key TEXT PRIMARY KEY,
+            result TEXT NOT NULL,
+            created_at REAL NOT NULL,
+            last_access REAL NOT NULL
+        )
+        ''')
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_analysis_cache_last_access ON analysis_cache (last_access)")
+        self._conn.execute("DELETE FROM analysis_cache WHERE created_at < ?", (time.time() - self.ttl,))
+        self._conn.commit()
+
+    def get(self, key):
+        """캐시된 결과를 반환합니다. 없거나 만료되었으면 None."""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT result FROM analysis_cache WHERE cache_key = ? AND created_at >= ?",
+                (key, now - self.ttl)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE analysis_cache SET last_access = ? WHERE cache_key = ?", (now, key))
+            self._conn.commit()
+            self.hits += 1
+        return json.loads(row[0])
+
+    def put(self, key, result):
+        """결과를 저장하고 최대 크기를 넘는 항목을 LRU 순서로 정리합니다."""
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO analysis_cache (cache_key, result, created_at, last_access) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(result, ensure_ascii=False), now, now)
+            )
+            self._conn.execute("""
+            DELETE FROM analysis_cache WHERE cache_key IN (
+                SELECT cache_key FROM analysis_cache ORDER BY last_access DESC LIMIT -1 OFFSET ?
+            )
+            """, (self.max_entries,))
+            self._conn.commit()
+
+    def stats(self):
+        """이번 실행의 적중/실패 횟수를 요약합니다."""
+        total = self.hits + self.misses
+        rate = self.hits / total if total else 0.0
+        return {"hits": self.hits, "misses": self.misses, "hit_rate": round(rate, 3)}
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
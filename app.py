@@ -2,12 +2,14 @@
 
 import os
 import json
+import sqlite3
+from functools import lru_cache
 # ▼▼▼ sitemap.xml을 서빙하기 위해 send_from_directory를 import 합니다. ▼▼▼
-from flask import Flask, render_template, send_from_directory
+from flask import Flask, render_template, send_from_directory, make_response, request, url_for
 from dotenv import load_dotenv
-
-load_dotenv()
-app = Flask(__name__)
+from snapshot import SnapshotCache
+# 웹 서버 시작 시에는 Flask와 스냅샷 캐시만 불러오고,
+# DB 조회(snapshot_store)와 모델 추론(inference)은 해당 API가 처음 호출될 때 불러옵니다.
 
 load_dotenv()
 app = Flask(__name__)
@@ -25,21 +27,11 @@ def sitemap_xml():
     # 'static' 폴더에 있는 sitemap.xml 파일을 반환합니다.
     return send_from_directory(os.path.join(app.root_path, 'static'), 'sitemap.xml')
 
-def read_json_data(file_path):
-    """JSON 파일을 안전하게 읽어오는 함수"""
-    try:
-        full_path = os.path.join(os.path.dirname(__file__), file_path)
-        with open(full_path, 'r', encoding='utf-8') as f:
-            return json.load(f)
-    except (FileNotFoundError, json.JSONDecodeError):
-        print(f"⚠️ {file_path} 파일을 찾을 수 없어 기본 데이터를 사용합니다.")
-        return None
-
-@app.route('/')
-def dashboard():
-    # GitHub Actions가 미리 만들어둔 결과 파일 하나만 읽기
-    all_data = read_json_data('data/daily_data.json')
+# run_predictions.py가 파일을 새로 쓰면 inode/mtime 변화를 감지해 자동으로 교체됩니다.
+snapshot_cache = SnapshotCache(os.path.join(app.root_path, 'data', 'daily_data.json'))
 
+def render_dashboard(all_data, charts_url):
+    """스냅샷 데이터로 대시보드 HTML을 렌더링합니다. 차트 데이터는 페이지가 charts_url에서 따로 받아옵니다."""
     # 데이터가 없을 경우를 대비한 기본값 설정
     if all_data:
         return render_template(
@@ -48,20 +40,183 @@ def dashboard():
             trend_summary=all_data.get("trend_summary", {"title": "분석 중", "summary": "데이터를 준비하고 있습니다...", "keywords": []}),
             market_sentiment="", # 이 부분은 이제 큰 의미가 없음
             sentiment_score=all_data.get("market_sentiment_score", 0.0),
-            nasdaq_data=all_data.get("nasdaq_data"),
-            kospi_data=all_data.get("kospi_data"),
-            fx_data=all_data.get("fx_data")
+            charts_url=charts_url,
+            last_updated=all_data.get("last_updated", "")
         )
     else:
         # 파일이 아예 없을 때 보여줄 최소한의 정보
         return render_template(
             'index.html', articles=[], 
             trend_summary={"title": "분석 데이터 없음", "summary": "데이터를 준비 중입니다. 잠시 후 새로고침해주세요.", "keywords": []},
-            nasdaq_data=None, kospi_data=None, fx_data=None,
-            sentiment_score=0.0, market_sentiment=""
+            charts_url=charts_url,
+            sentiment_score=0.0, market_sentiment="", last_updated=""
         )
 
+@app.route('/')
+def dashboard():
+    # GitHub Actions가 미리 만들어둔 결과 파일을 프로세스 캐시에서 가져오기
+    snapshot = snapshot_cache.get()
+
+    # 같은 스냅샷에 대해서는 한 번만 렌더링
+    html = snapshot.rendered.get('index')
+    if html is None:
+        html = render_dashboard(snapshot.data, url_for('api_charts', v=snapshot.version))
+        snapshot.rendered['index'] = html
+
+    response = make_response(html)
+    response.set_etag(snapshot.version)
+    if snapshot.last_modified:
+        response.last_modified = snapshot.last_modified
+    # 브라우저/크롤러가 항상 재검증하도록 하고, 변경이 없으면 304로 응답
+    response.cache_control.public = True
+    response.cache_control.no_cache = True
+    return response.make_conditional(request)
+
+# --- 준비 상태 확인 ---
+# 로드밸런서/배포 스크립트용. 스냅샷이 로드되어 있으면 200과 버전을, 아직 없으면 503을 돌려줍니다.
+@app.route('/readyz')
+def readyz():
+    snapshot = snapshot_cache.get()
+    ready = snapshot.data is not None
+    response = make_response({
+        "status": "ready" if ready else "no_snapshot",
+        "snapshot_version": snapshot.version,
+        "last_updated": snapshot.data.get("last_updated") if ready else None,
+        "pid": os.getpid(),
+    }, 200 if ready else 503)
+    response.cache_control.no_store = True
+    return response
+
+# --- 차트 데이터 API ---
+# 차트 데이터는 HTML에 넣지 않고 이 엔드포인트에서 따로 받습니다. 본문은 스냅샷마다 한 번만 만들어
+# 압축해 두고, 페이지는 스냅샷 버전이 붙은 URL(?v=...)을 쓰므로 CDN/브라우저가 오래 캐시할 수 있습니다.
+CHART_KEYS = ("nasdaq_data", "kospi_data", "fx_data")
+
+def build_chart_bodies(snapshot):
+    """스냅샷의 차트들을 압축 형식 JSON으로 만들고, 인코딩별로 미리 압축한 본문을 반환합니다."""
+    import gzip
+    from charts import to_compact
+    data = snapshot.data or {}
+    charts = {key: to_compact(data.get(key), data.get("last_updated")) for key in CHART_KEYS}
+    body = json.dumps(charts, separators=(',', ':')).encode('utf-8')
+    bodies = {"identity": body, "gzip": gzip.compress(body, compresslevel=9, mtime=0)}
+    try:
+        import brotli  # 설치되어 있을 때만 사용
+        bodies["br"] = brotli.compress(body, quality=11)
+    except ImportError:
+        pass
+    return bodies
+
+@app.route('/api/charts')
+def api_charts():
+    snapshot = snapshot_cache.get()
+    bodies = snapshot.rendered.get('charts')
+    if bodies is None:
+        bodies = build_chart_bodies(snapshot)
+        snapshot.rendered['charts'] = bodies
+
+    accepted = request.accept_encodings
+    encoding = next((e for e in ("br", "gzip") if e in bodies and accepted[e]), "identity")
+    response = make_response(bodies[encoding])
+    response.mimetype = 'application/json'
+    if encoding != "identity":
+        response.headers['Content-Encoding'] = encoding
+    response.vary.add('Accept-Encoding')
+    response.set_etag(f"{snapshot.version}-{encoding}")
+    response.cache_control.public = True
+    if request.args.get('v') == snapshot.version:
+        # 버전이 붙은 URL의 내용은 바뀌지 않음
+        response.cache_control.max_age = 31536000
+        response.cache_control.immutable = True
+    else:
+        response.cache_control.no_cache = True
+    return response.make_conditional(request)
+
+# --- 스냅샷 이력 JSON API ---
+# 응답은 현재 스냅샷 버전을 키에 포함해 캐시하므로, 새 실행 결과가 들어오면 자연히 무효화됩니다.
+@lru_cache(maxsize=256)
+def _cached_api_body(version, endpoint, args):
+    import snapshot_store
+    params = dict(args)
+    limit = int(params.get('limit') or 100)
+    if endpoint == 'series':
+        result = snapshot_store.query_series(
+            params['symbol'], params.get('from'), params.get('to'), limit, params.get('cursor'))
+    else:
+        result = snapshot_store.query_snapshots(params.get('date'), limit, params.get('cursor'))
+    return json.dumps(result, ensure_ascii=False, separators=(',', ':'))
+
+def api_response(endpoint, **params):
+    """API 결과를 캐시에서 꺼내거나 새로 조회해 ETag/Cache-Control과 함께 반환합니다."""
+    snapshot = snapshot_cache.get()
+    args = tuple(sorted((k, v) for k, v in params.items() if v is not None))
+    try:
+        body = _cached_api_body(snapshot.version, endpoint, args)
+    except ValueError:
+        return make_response({"error": "잘못된 요청 파라미터입니다."}, 400)
+    except sqlite3.Error as e:
+        print(f"⚠️ 스냅샷 이력 조회 실패: {e}")
+        return make_response({"error": "스냅샷 이력을 사용할 수 없습니다."}, 503)
+
+    response = make_response(body)
+    response.mimetype = 'application/json'
+    response.add_etag()
+    response.cache_control.public = True
+    response.cache_control.max_age = 300
+    return response.make_conditional(request)
+
+@app.route('/api/series/<symbol>')
+def api_series(symbol):
+    # 예: /api/series/nasdaq?from=2025-10-01&to=2025-10-31&limit=100&cursor=...
+    return api_response('series', symbol=symbol, limit=request.args.get('limit'),
+                        cursor=request.args.get('cursor'),
+                        **{'from': request.args.get('from'), 'to': request.args.get('to')})
+
+@app.route('/api/snapshots')
+def api_snapshots():
+    # 예: /api/snapshots?date=2025-10-19
+    return api_response('snapshots', date=request.args.get('date'), limit=request.args.get('limit'),
+                        cursor=request.args.get('cursor'))
+
+# --- 온라인 예측 API ---
+# 모델은 프로세스당 한 번만 읽고, market_predictor.pkl이 교체되면 자동으로 새 모델을 사용합니다.
+# 동시에 들어온 요청은 MicroBatcher가 묶어서 모델을 한 번만 호출합니다.
+PREDICT_MAX_ROWS = 1000
+_predict_batcher = None
+
+def get_predict_batcher():
+    global _predict_batcher
+    if _predict_batcher is None:
+        from inference import Predictor, MicroBatcher
+        _predict_batcher = MicroBatcher(Predictor(os.path.join(app.root_path, 'market_predictor.pkl')))
+    return _predict_batcher
+
+@app.route('/api/predict', methods=['POST'])
+def api_predict():
+    # 예: {"rows": [{"sentiment": 0.2, "ret_lag1": 0.01, ...}]} 또는 특성 딕셔너리 하나
+    payload = request.get_json(silent=True)
+    rows = payload.get('rows') if isinstance(payload, dict) and 'rows' in payload else [payload]
+    if not isinstance(rows, list) or not rows or len(rows) > PREDICT_MAX_ROWS \
+            or not all(isinstance(row, dict) for row in rows):
+        return make_response({"error": "특성 딕셔너리 또는 rows 목록이 필요합니다."}, 400)
+    try:
+        predictions = get_predict_batcher().predict_batch(rows)
+    except (ValueError, TypeError):
+        return make_response({"error": "특성 값은 숫자여야 합니다."}, 400)
+    except Exception as e:
+        print(f"⚠️ 예측 실패: {e}")
+        return make_response({"error": "예측에 실패했습니다."}, 500)
+    if predictions is None:
+        return make_response({"error": "학습된 모델이 없습니다."}, 503)
+    loaded = get_predict_batcher().predictor.current()
+    return {"model_version": loaded.version if loaded else None, "predictions": predictions}
+
+@app.route('/api/predict/stats')
+def api_predict_stats():
+    return get_predict_batcher().stats()
+
 if __name__ == '__main__':
+    # 개발용 단일 프로세스 서버. 운영에서는 gunicorn -c gunicorn.conf.py wsgi:application 사용
     # Render가 포트를 자동으로 할당할 수 있도록 host='0.0.0.0' 추가
     # debug=False로 설정해야 배포 환경에서 안정적으로 작동합니다.
     app.run(host='0.0.0.0', port=int(os.environ.get('PORT', 8080)), debug=False)
\ No newline at end of file
@@ -0,0 +1,120 @@
+# backfill.py (과거 실제 결과 및 예측 일괄 수집)
+
+import os
+import argparse
+from datetime import date, datetime, timedelta
+import numpy as np
+import pandas as pd
+from db import get_pool, upsert_actuals, upsert_predictions
+from snapshot import iter_archive
+
+ARCHIVE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'archive')
+
+
+def yfinance_downloader(symbol, start, end):
+    """yfinance에서 [start, end] 구간의 일봉을 한 번에 받아옵니다."""
+    from price_store import fetch_yfinance_bars
+    return fetch_yfinance_bars(symbol, start, end)
+
+
+def csv_downloader(path):
+    """CSV 파일(날짜 인덱스, Close 컬럼)을 데이터 소스로 쓰는 downloader를 만듭니다. (테스트용)"""
+    def download(symbol, start, end):
+        bars = pd.read_csv(path, index_col=0, parse_dates=True).sort_index()
+        return bars.loc[pd.Timestamp(start):pd.Timestamp(end)]
+    return download
+
+
+def label_trends(close):
+    """종가 시계열에서 날짜별 등락 라벨을 한 번에 계산합니다. (전날보다 오르면 '상승', 아니면 '하락')"""
+    close = close.dropna()
+    change = np.diff(close.to_numpy(dtype=float))
+    labels = np.where(change > 0, '상승', '하락')
+    return pd.Series(labels, index=pd.DatetimeIndex(close.index[1:]).strftime('%Y-%m-%d'))
+
+
+def load_checkpoint(job):
+    """작업의 마지막 처리 날짜를 반환합니다. 없으면 None."""
+    with get_pool().connection() as conn:
+        row = conn.execute("SELECT last_date FROM backfill_checkpoints WHERE job = ?", (job,)).fetchone()
+    return date.fromisoformat(row[0]) if row else None
+
+
+def backfill_actuals(start, end, symbol='^GSPC', download=yfinance_downloader, overwrite=False):
+    """[start, end] 구간의 실제 등락을 한 번에 내려받아 actuals에 저장합니다.
+
+    연도별로 나눠 저장하며, 각 묶음과 체크포인트를 같은 트랜잭션으로 기록하므로
+    중간에 중단되어도 같은 구간으로 다시 실행하면 마지막 체크포인트 다음 날부터 이어서 처리합니다.
+    체크포인트는 요청한 구간별로 따로 두므로, 다른 구간(예: 더 과거)을 요청하면 처음부터 처리합니다.
+    """
+    job = f"actuals:{symbol}:{start.isoformat()}:{end.isoformat()}"
+    checkpoint = load_checkpoint(job)
+    if checkpoint and checkpoint >= end and not overwrite:
+        print(f"✅ {symbol} {start} ~ {end} 실제 결과는 이미 수집되어 있습니다.")
+        return 0
+    if checkpoint and start <= checkpoint < end and not overwrite:
+        start = checkpoint + timedelta(days=1)
+
+    # 첫 날의 등락을 계산하려면 직전 거래일 종가가 필요하므로 조금 앞부터 받음
+    bars = download(symbol, start - timedelta(days=10), end)
+    if bars is None or len(bars) == 0:
+        print(f"⚠️  {symbol} 데이터를 받지 못했습니다.")
+        return 0
+    labels = label_trends(bars['Close'])
+    labels = labels[(labels.index >= start.isoformat()) & (labels.index <= end.isoformat())]
+    print(f"➡️  {symbol} {start} ~ {end}: {len(labels)}일치 등락 계산 완료")
+
+    total = 0
+    for year, chunk in labels.groupby(labels.index.str[:4]):
+        rows = list(zip(chunk.index, chunk.to_numpy()))
+        with get_pool().transaction() as conn:
+            upsert_actuals(rows, overwrite=overwrite, conn=conn)
+            conn.execute(
+                "INSERT INTO backfill_checkpoints (job, last_date, updated_at) VALUES (?, ?, ?) "
+                # --overwrite로 앞부분을 다시 처리해도 체크포인트가 뒤로 돌아가지 않도록 더 늦은 날짜를 유지
+                "ON CONFLICT (job) DO UPDATE SET last_date = MAX(last_date, excluded.last_date), updated_at = excluded.updated_at",
+                (job, chunk.index[-1], datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
+            )
+        total += len(rows)
+        print(f"   {year}년 {len(rows)}행 저장")
+    print(f"✅ {symbol} 실제 결과 {total}행 저장 완료")
+    return total
+
+
+def backfill_predictions(archive_dir=ARCHIVE_DIR, overwrite=False):
+    """스냅샷 아카이브의 실행별 감성 점수로 날짜별 예측 기록을 복원합니다. (하루에 여러 번 실행했다면 마지막 실행 기준)"""
+    runs = [(run["last_updated"], run.get("market_sentiment_score"))
+            for run in iter_archive(archive_dir) if run.get("last_updated")]
+    df = pd.DataFrame(runs, columns=["last_updated", "score"]).dropna()
+    if df.empty:
+        print("⚠️  아카이브에 복원할 실행 기록이 없습니다.")
+        return 0
+    df["day"] = df["last_updated"].str[:10]
+    daily = df.sort_values("last_updated").groupby("day")["score"].last().round(3)
+    # run_predictions.py와 같은 규칙: -0.1 미만이면 '하락', 아니면 '상승'
+    trends = np.where(daily.to_numpy() < -0.1, '하락', '상승')
+    rows = list(zip(daily.index, daily.to_numpy().tolist(), trends))
+    upsert_predictions(rows, overwrite=overwrite)
+    print(f"✅ 아카이브에서 예측 {len(rows)}일치를 복원했습니다.")
+    return len(rows)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="과거 실제 결과/예측 일괄 수집")
+    sub = parser.add_subparsers(dest="target", required=True)
+    actuals_parser = sub.add_parser("actuals", help="지수 등락 이력을 actuals에 저장")
+    actuals_parser.add_argument("--start", required=True, type=date.fromisoformat, help="YYYY-MM-DD")
+    actuals_parser.add_argument("--end", type=date.fromisoformat, default=date.today() - timedelta(days=1))
+    actuals_parser.add_argument("--symbol", default="^GSPC")
+    actuals_parser.add_argument("--csv", help="yfinance 대신 사용할 로컬 CSV 파일")
+    actuals_parser.add_argument("--overwrite", action="store_true", help="이미 있는 날짜도 덮어쓰기")
+    predictions_parser = sub.add_parser("predictions", help="스냅샷 아카이브로 predictions 복원")
+    predictions_parser.add_argument("--overwrite", action="store_true", help="이미 있는 날짜도 덮어쓰기")
+    args = parser.parse_args()
+
+    if args.target == "actuals":
+        downloader = csv_downloader(args.csv) if args.csv else yfinance_downloader
+        backfill_actuals(args.start, args.end, args.symbol, downloader, args.overwrite)
+    else:
+        backfill_predictions(overwrite=args.overwrite)
+    get_pool().close()
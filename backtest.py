@@ -0,0 +1,242 @@
+# backtest.py (ARIMA 예측 및 감성 모델 워크포워드 백테스트)
+
+import os
+import json
+import hashlib
+import sqlite3
+import argparse
+import numpy as np
+import pandas as pd
+from joblib import Parallel, delayed
+from price_store import PriceStore
+
+DEFAULT_BACKTEST_DB = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'backtest.db')
+DB_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'database.db')
+
+
+def config_key(config):
+    """모델 설정 딕셔너리로 캐시 키를 만듭니다."""
+    return hashlib.sha256(json.dumps(config, sort_keys=True).encode('utf-8')).hexdigest()[:16]
+
+
+def data_hash(*arrays):
+    """윈도우 하나가 사용하는 입력 데이터의 해시. 가격이 수정되거나 과거 데이터가 채워지면 값이 바뀝니다."""
+    digest = hashlib.sha256()
+    for array in arrays:
+        digest.update(np.ascontiguousarray(array, dtype=float).tobytes())
+    return digest.hexdigest()[:16]
+
+
+class BacktestCache:
+    """(모델 설정, 윈도우)별 예측 결과를 저장해서, 같은 스윕을 다시 돌릴 때 새 칸만 계산하게 합니다.
+
+    칸마다 입력 데이터 해시를 함께 저장해, 입력이 바뀐 칸은 다시 계산합니다.
+    """
+
+    def __init__(self, path=DEFAULT_BACKTEST_DB):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        conn = sqlite3.connect(path)
+        try:
+            conn.execute('''
+            CREATE TABLE IF NOT EXISTS backtest_cells (
+                config_key TEXT NOT NULL,
+                window_end TEXT NOT NULL,
+                result TEXT NOT NULL,
+                input_hash TEXT,
+                PRIMARY KEY (config_key, window_end)
+            ) WITHOUT ROWID
+            ''')
+            # 입력 해시가 없던 예전 캐시 파일: 열을 추가 (기존 칸은 해시가 없어 다시 계산됨)
+            columns = [row[1] for row in conn.execute("PRAGMA table_info(backtest_cells)")]
+            if "input_hash" not in columns:
+                conn.execute("ALTER TABLE backtest_cells ADD COLUMN input_hash TEXT")
+            conn.commit()
+        finally:
+            conn.close()
+
+    def load(self, key):
+        conn = sqlite3.connect(self.path)
+        try:
+            rows = conn.execute("SELECT window_end, result, input_hash FROM backtest_cells WHERE config_key = ?",
+                                (key,)).fetchall()
+        finally:
+            conn.close()
+        return {window_end: (input_hash, json.loads(result)) for window_end, result, input_hash in rows}
+
+    def save(self, key, cells, input_hashes):
+        conn = sqlite3.connect(self.path)
+        try:
+            conn.executemany(
+                "INSERT OR REPLACE INTO backtest_cells (config_key, window_end, result, input_hash) VALUES (?, ?, ?, ?)",
+                [(key, window_end, json.dumps(result), input_hashes[window_end]) for window_end, result in cells.items()]
+            )
+            conn.commit()
+        finally:
+            conn.close()
+
+
+def run_cells(key, input_hashes, compute, cache=None, n_jobs=-1):
+    """캐시에 없거나 입력 데이터가 바뀐 윈도우만 병렬로 계산하고, 전체 윈도우의 결과를 window_end 순서대로 반환합니다.
+
+    input_hashes는 {window_end: 그 윈도우 입력 데이터의 해시} 딕셔너리입니다.
+    """
+    cache = cache or BacktestCache()
+    window_ends = list(input_hashes)
+    cells = {w: result for w, (h, result) in cache.load(key).items() if h == input_hashes.get(w)}
+    missing = [w for w in window_ends if w not in cells]
+    if missing:
+        computed = Parallel(n_jobs=n_jobs)(delayed(compute)(w) for w in missing)
+        new_cells = {w: r for w, r in zip(missing, computed) if r is not None}
+        cache.save(key, new_cells, input_hashes)
+        cells.update(new_cells)
+    print(f"➡️  윈도우 {len(window_ends)}개 중 {len(missing)}개 새로 계산, {len(window_ends) - len(missing)}개 캐시 사용")
+    return [cells[w] for w in window_ends if w in cells]
+
+
+# --- ARIMA 예측 백테스트 ---
+def _arima_window(values, end, window, horizon, order):
+    """end 직전 window개 값으로 학습하고 horizon만큼 예측한 결과를 반환합니다."""
+    import warnings
+    from statsmodels.tsa.arima.model import ARIMA
+    train = values[end - window:end]
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        try:
+            forecast = ARIMA(train, order=order).fit().get_forecast(steps=horizon)
+        except Exception:
+            return None
+    lower, upper = np.asarray(forecast.conf_int(alpha=0.05)).T
+    return {
+        "last": float(train[-1]),
+        "pred": np.asarray(forecast.predicted_mean).tolist(),
+        "lower": lower.tolist(),
+        "upper": upper.tolist(),
+        "actual": values[end:end + horizon].tolist(),
+    }
+
+
+def score_forecasts(cells):
+    """윈도우별 예측 결과를 한 번에 배열로 쌓아 MAE, 방향 적중률, 95% 구간 적중률을 계산합니다."""
+    if not cells:
+        return {}
+    last = np.array([c["last"] for c in cells])[:, None]
+    pred = np.array([c["pred"] for c in cells])
+    actual = np.array([c["actual"] for c in cells])
+    lower = np.array([c["lower"] for c in cells])
+    upper = np.array([c["upper"] for c in cells])
+    error = np.abs(pred - actual)
+    hit = np.sign(pred - last) == np.sign(actual - last)
+    covered = (actual >= lower) & (actual <= upper)
+    return {
+        "windows": len(cells),
+        "mae": error.mean(axis=0).round(4).tolist(),
+        "mape": (error / np.abs(actual)).mean(axis=0).round(5).tolist(),
+        "direction_hit_rate": hit.mean(axis=0).round(3).tolist(),
+        "interval_coverage_95": covered.mean(axis=0).round(3).tolist(),
+    }
+
+
+def backtest_arima(symbol, window=30, horizon=3, stride=1, order=(5, 1, 0), store=None, cache=None, n_jobs=-1):
+    """저장된 가격 이력 위에서 ARIMA 예측을 윈도우를 옮겨가며 재현하고 점수를 계산합니다."""
+    store = store or PriceStore()
+    series = store.window(symbol)
+    values = series.values.astype(float)
+    ends = range(window, len(values) - horizon + 1, stride)
+    window_ends = [series.index[e - 1].strftime('%Y-%m-%d') for e in ends]
+    end_by_date = dict(zip(window_ends, ends))
+
+    key = config_key({"model": "arima", "symbol": symbol, "window": window, "horizon": horizon, "order": list(order)})
+    # 학습 구간과 정답 구간의 값이 같을 때만 캐시를 재사용
+    input_hashes = {w: data_hash(values[e - window:e + horizon]) for w, e in end_by_date.items()}
+    cells = run_cells(key, input_hashes, lambda w: _arima_window(values, end_by_date[w], window, horizon, order),
+                      cache=cache, n_jobs=n_jobs)
+    return score_forecasts(cells)
+
+
+# --- 감성 점수 로지스틱 모델 백테스트 ---
+def _logistic_window(scores, labels, start, stop):
+    """start 이전 데이터로 학습해 [start, stop) 구간의 상승 확률을 예측합니다."""
+    from sklearn.linear_model import LogisticRegression
+    y_train = labels[:start]
+    if len(np.unique(y_train)) < 2:
+        return None
+    model = LogisticRegression().fit(scores[:start].reshape(-1, 1), y_train)
+    proba = model.predict_proba(scores[start:stop].reshape(-1, 1))[:, list(model.classes_).index(1)]
+    return {"proba": proba.tolist(), "actual": labels[start:stop].tolist()}
+
+
+def score_probabilities(cells, bins=10):
+    """상승 확률 예측들을 모아 적중률, Brier 점수, 구간별 보정(calibration) 표를 계산합니다."""
+    if not cells:
+        return {}
+    proba = np.concatenate([c["proba"] for c in cells])
+    actual = np.concatenate([c["actual"] for c in cells]).astype(float)
+    bucket = np.minimum((proba * bins).astype(int), bins - 1)
+    counts = np.bincount(bucket, minlength=bins)
+    mean_pred = np.bincount(bucket, weights=proba, minlength=bins) / np.maximum(counts, 1)
+    observed = np.bincount(bucket, weights=actual, minlength=bins) / np.maximum(counts, 1)
+    return {
+        "samples": int(len(proba)),
+        "hit_rate": round(float(((proba >= 0.5) == (actual == 1)).mean()), 3),
+        "brier": round(float(np.mean((proba - actual) ** 2)), 4),
+        "calibration": [
+            {"bin": i, "count": int(counts[i]), "mean_pred": round(float(mean_pred[i]), 3), "observed": round(float(observed[i]), 3)}
+            for i in range(bins) if counts[i]
+        ],
+    }
+
+
+def backtest_sentiment(min_train=20, step=5, db_path=DB_PATH, cache=None, n_jobs=-1):
+    """저장된 예측/실제 결과로 감성 점수 모델을 워크포워드 방식으로 재현하고 점수를 계산합니다."""
+    conn = sqlite3.connect(db_path)
+    try:
+        df = pd.read_sql_query("""
+        SELECT p.prediction_date AS d, p.market_sentiment_score AS score, a.actual_trend AS trend
+        FROM predictions p
+        JOIN actuals a ON p.prediction_date = a.actual_date
+        ORDER BY p.prediction_date
+        """, conn)
+    finally:
+        conn.close()
+    if len(df) <= min_train:
+        print(f"백테스트 데이터가 부족합니다. 현재 데이터 {len(df)}개.")
+        return {}
+
+    scores = df["score"].to_numpy(dtype=float)
+    labels = (df["trend"] == '상승').to_numpy(dtype=int)
+    starts = range(min_train, len(df), step)
+    window_ends = [df["d"].iloc[min(s + step, len(df)) - 1] for s in starts]
+    start_by_date = dict(zip(window_ends, starts))
+
+    key = config_key({"model": "logistic", "features": ["market_sentiment_score"], "min_train": min_train, "step": step})
+    # 각 윈도우는 stop 이전의 모든 점수/결과를 쓰므로 그 구간 전체를 해시
+    input_hashes = {w: data_hash(scores[:min(s + step, len(df))], labels[:min(s + step, len(df))])
+                    for w, s in start_by_date.items()}
+    cells = run_cells(key, input_hashes,
+                      lambda w: _logistic_window(scores, labels, start_by_date[w], min(start_by_date[w] + step, len(df))),
+                      cache=cache, n_jobs=n_jobs)
+    return score_probabilities(cells)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="예측 모델 워크포워드 백테스트")
+    # 공통 옵션은 하위 명령 뒤에 써도 되도록 각 하위 명령에 붙임 (예: backtest.py arima --jobs 2)
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--jobs", type=int, default=-1, help="병렬 작업 수 (-1: 모든 코어)")
+    sub = parser.add_subparsers(dest="target", required=True)
+    arima_parser = sub.add_parser("arima", parents=[common], help="가격 저장소의 ARIMA 예측 백테스트")
+    arima_parser.add_argument("--symbol", default="^IXIC")
+    arima_parser.add_argument("--window", type=int, default=30)
+    arima_parser.add_argument("--horizon", type=int, default=3)
+    arima_parser.add_argument("--stride", type=int, default=1)
+    sentiment_parser = sub.add_parser("sentiment", parents=[common], help="감성 점수 로지스틱 모델 백테스트")
+    sentiment_parser.add_argument("--min-train", type=int, default=20)
+    sentiment_parser.add_argument("--step", type=int, default=5)
+    args = parser.parse_args()
+
+    if args.target == "arima":
+        report = backtest_arima(args.symbol, args.window, args.horizon, args.stride, n_jobs=args.jobs)
+    else:
+        report = backtest_sentiment(args.min_train, args.step, n_jobs=args.jobs)
+    print(json.dumps(report, ensure_ascii=False, indent=4))
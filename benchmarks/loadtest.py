@@ -0,0 +1,109 @@
+# benchmarks/loadtest.py (운영 서버 모드 부하 테스트)
+#
+# gunicorn(gunicorn.conf.py)을 워커 수를 바꿔 가며 띄우고, 여러 프로세스에서 동시에 요청을 보내
+# 워커 수에 따라 처리량이 어떻게 늘어나는지와 워커별 메모리(PSS: 공유 페이지를 나눠 계산한 크기)를 봅니다.
+#   python benchmarks/loadtest.py --workers 1 2 4 --duration 5
+#   python benchmarks/loadtest.py --path /api/charts --workers 1 4
+
+import os
+import sys
+import json
+import time
+import socket
+import argparse
+import subprocess
+import http.client
+from concurrent.futures import ProcessPoolExecutor
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, BENCH_DIR)
+
+from run import _load_generate, percentile  # noqa: E402
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def wait_ready(port, timeout=60):
+    """/readyz가 응답할 때까지 기다리고 그 내용을 반환합니다."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=2)
+            conn.request("GET", "/readyz")
+            response = conn.getresponse()
+            body = json.loads(response.read())
+            conn.close()
+            return body
+        except (OSError, ValueError):
+            time.sleep(0.2)
+    raise TimeoutError(f"서버가 {timeout}초 안에 준비되지 않았습니다.")
+
+
+def worker_pss_mb(master_pid):
+    """gunicorn 워커 프로세스별 PSS(MB). /proc가 없는 환경에서는 빈 목록."""
+    sizes = []
+    try:
+        with open(f"/proc/{master_pid}/task/{master_pid}/children") as f:
+            children = f.read().split()
+        for pid in children:
+            with open(f"/proc/{pid}/smaps_rollup") as f:
+                for line in f:
+                    if line.startswith("Pss:"):
+                        sizes.append(round(int(line.split()[1]) / 1024, 1))
+    except OSError:
+        return []
+    return sizes
+
+
+def run_once(workers, args):
+    port = free_port()
+    env = dict(os.environ, PORT=str(port), WEB_CONCURRENCY=str(workers))
+    server = subprocess.Popen([sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "wsgi:application"],
+                              cwd=ROOT_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        ready = wait_ready(port)
+        time.sleep(0.5)  # 모든 워커가 뜰 때까지 잠시 대기
+        headers = {"Accept-Encoding": "gzip"}
+        # 부하 생성기가 먼저 한계에 닿지 않도록 여러 프로세스로 나눠 보냄
+        with ProcessPoolExecutor(args.clients) as pool:
+            futures = [pool.submit(_load_generate, port, args.path, args.duration, args.concurrency, headers)
+                       for _ in range(args.clients)]
+            outcomes = [f.result() for f in futures]
+        count = sum(o[0] for o in outcomes)
+        latencies = [latency for o in outcomes for latency in o[1]]
+        return {
+            "workers": workers,
+            "snapshot_version": ready.get("snapshot_version"),
+            "rps": round(count / args.duration, 1),
+            "p50_ms": round(percentile(latencies, 0.50) * 1000, 3),
+            "p99_ms": round(percentile(latencies, 0.99) * 1000, 3),
+            "errors": sum(o[2] for o in outcomes),
+            "worker_pss_mb": worker_pss_mb(server.pid),
+        }
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="gunicorn 워커 수별 부하 테스트")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, os.cpu_count() or 1], help="시험할 워커 수")
+    parser.add_argument("--path", default="/", help="요청할 경로")
+    parser.add_argument("--duration", type=float, default=5.0, help="워커 수마다 부하를 거는 시간(초)")
+    parser.add_argument("--clients", type=int, default=max(2, (os.cpu_count() or 1) // 2), help="부하 생성 프로세스 수")
+    parser.add_argument("--concurrency", type=int, default=8, help="부하 생성 프로세스당 동시 요청 수")
+    args = parser.parse_args()
+
+    print(f"➡️  {args.path} 부하 테스트 (CPU {os.cpu_count()}개, 부하 생성 프로세스 {args.clients}개 x {args.concurrency})")
+    baseline = None
+    for workers in sorted(set(args.workers)):
+        result = run_once(workers, args)
+        baseline = baseline or result["rps"]
+        scale = result["rps"] / baseline if baseline else 0.0
+        print(f"✅ 워커 {workers:>2}개: {result['rps']:>8} req/s (x{scale:.2f})  p50 {result['p50_ms']}ms  "
+              f"p99 {result['p99_ms']}ms  오류 {result['errors']}  워커 PSS {result['worker_pss_mb']}MB")
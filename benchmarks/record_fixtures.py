@@ -0,0 +1,92 @@
+# benchmarks/record_fixtures.py (벤치마크용 고정 데이터 생성)
+#
+# 저장소에 기록된 실제 실행 결과(data/archive, data/*_data.json)로 벤치마크 입력을 만듭니다.
+# 네트워크를 쓰지 않으므로 언제 다시 실행해도 같은 파일이 만들어집니다.
+#   python benchmarks/record_fixtures.py
+
+import os
+import ast
+import json
+import sys
+import pandas as pd
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(BENCH_DIR)
+FIXTURES_DIR = os.path.join(BENCH_DIR, 'fixtures')
+sys.path.insert(0, ROOT_DIR)
+
+from snapshot import iter_archive  # noqa: E402
+from charts import to_compact, chart_dates  # noqa: E402
+
+# 예전 형식 차트 라벨에는 연도가 없으므로 기록된 시점의 연도를 붙임
+RECORDED_YEAR = 2025
+# (차트 파일, 가격 CSV 이름). S&P 500 이력은 기록된 것이 없으므로 만들지 않음 (trainer 벤치마크는 run.MARKET_PROXY 사용)
+PRICE_SOURCES = [
+    ("nasdaq_data.json", "IXIC"),
+    ("kospi_data.json", "KS11"),
+    ("fx_data.json", "USDKRW"),
+]
+
+
+def record_prices():
+    os.makedirs(os.path.join(FIXTURES_DIR, 'prices'), exist_ok=True)
+    for chart_file, name in PRICE_SOURCES:
+        with open(os.path.join(ROOT_DIR, 'data', chart_file), 'r', encoding='utf-8') as f:
+            chart = json.load(f)
+        chart = to_compact(chart, f"{RECORDED_YEAR}-12-31")
+        closes = chart["historical"]
+        dates = pd.to_datetime(chart_dates(chart)[:len(closes)])
+        bars = pd.DataFrame({"Open": closes, "High": closes, "Low": closes, "Close": closes, "Volume": 0.0}, index=dates)
+        bars.index.name = "Date"
+        bars.to_csv(os.path.join(FIXTURES_DIR, 'prices', f"{name}.csv"))
+        print(f"✅ prices/{name}.csv: {len(bars)}일")
+
+
+def _as_list(value):
+    # 아카이브의 원본 기사는 일부 필드가 문자열로 저장되어 있음 ("['a', 'b']")
+    if isinstance(value, str):
+        try:
+            value = ast.literal_eval(value)
+        except (ValueError, SyntaxError):
+            return [value]
+    return list(value or [])
+
+
+def record_gemini_responses():
+    """아카이브에 남은 기사별 분석 결과를 Gemini 응답 형식의 텍스트로 되살립니다."""
+    articles, trend_summaries, seen = [], [], set()
+    for run in iter_archive(os.path.join(ROOT_DIR, 'data', 'archive')):
+        for article in run.get("articles", []):
+            content = article.get('description') or article.get('snippet', '')
+            if not content or content in seen or article.get("summary") is None:
+                continue
+            seen.add(content)
+            response = (f"SENTIMENT: {float(article.get('sentiment') or 0.0):.2f}\n"
+                        f"SUMMARY: {article['summary']}\n"
+                        f"KEYWORDS: {', '.join(_as_list(article.get('keywords')))}")
+            articles.append({"article": {k: article.get(k) for k in ("title", "url", "image_url", "description", "snippet")},
+                             "response": response})
+        summary = run.get("trend_summary")
+        if summary:
+            trend_summaries.append(f"TITLE: {summary['title']}\nSUMMARY: {summary['summary']}")
+
+    with open(os.path.join(FIXTURES_DIR, 'gemini_responses.json'), 'w', encoding='utf-8') as f:
+        json.dump({"articles": articles, "trend_summaries": trend_summaries}, f, ensure_ascii=False, indent=2)
+    print(f"✅ gemini_responses.json: 기사 응답 {len(articles)}개, 트렌드 요약 {len(trend_summaries)}개")
+
+
+def record_snapshot():
+    """가장 최근 실행 결과 전체(원본 기사 포함)를 스냅샷 직렬화 입력으로 저장합니다."""
+    last = None
+    for run in iter_archive(os.path.join(ROOT_DIR, 'data', 'archive')):
+        last = run
+    with open(os.path.join(FIXTURES_DIR, 'final_data.json'), 'w', encoding='utf-8') as f:
+        json.dump(last, f, ensure_ascii=False)
+    print(f"✅ final_data.json: {last.get('last_updated')} 실행 결과")
+
+
+if __name__ == "__main__":
+    os.makedirs(FIXTURES_DIR, exist_ok=True)
+    record_prices()
+    record_gemini_responses()
+    record_snapshot()
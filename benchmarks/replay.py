@@ -0,0 +1,56 @@
+# benchmarks/replay.py (기록된 Gemini 응답을 재생하는 가짜 모델)
+
+import time
+import zlib
+from ai_analyzer import BATCH_ITEM_PATTERN, ARTICLE_CONTENT_LIMIT
+
+
+class _Response:
+    def __init__(self, text):
+        self.text = text
+
+
+class ReplayModel:
+    """기록된 응답을 지정된 지연 뒤에 돌려주는 Gemini 대역. 단건/배치 프롬프트를 모두 처리합니다.
+
+    기록에 없는 기사는 StubModel과 같은 규칙(내용 해시)으로 응답을 만들어 결과가 항상 같도록 합니다.
+    """
+
+    model_name = "replay"
+
+    def __init__(self, fixtures, latency=0.0):
+        self.latency = latency
+        self.calls = 0
+        # 프롬프트에는 기사 앞부분만 들어가므로 같은 길이로 잘라서 찾음
+        self.responses = {}
+        for item in fixtures["articles"]:
+            content = item["article"].get("description") or item["article"].get("snippet", "")
+            self.responses[content[:ARTICLE_CONTENT_LIMIT].strip()] = item["response"]
+        self.trend_summaries = fixtures.get("trend_summaries") or ["TITLE: 리플레이 리포트\nSUMMARY: 기록된 요약입니다."]
+
+    def _article_block(self, content):
+        content = content.strip()
+        if content in self.responses:
+            return self.responses[content]
+        # 벤치마크에서 같은 기사를 여러 번 쓰기 위해 붙인 꼬리표를 떼고 다시 찾음
+        base = content.rsplit(" #", 1)[0]
+        if base in self.responses:
+            return self.responses[base]
+        score = (zlib.crc32(content.encode('utf-8')) % 200 - 100) / 100
+        return f"SENTIMENT: {score:.2f}\nSUMMARY: 기록되지 않은 기사입니다.\nKEYWORDS: replay, market, news"
+
+    def generate_content(self, prompt, request_options=None, **kwargs):
+        self.calls += 1
+        timeout = (request_options or {}).get("timeout")
+        if timeout is not None and self.latency > timeout:
+            time.sleep(timeout)
+            raise TimeoutError(f"replay model exceeded {timeout}s")
+        time.sleep(self.latency)
+
+        items = BATCH_ITEM_PATTERN.split(prompt)
+        if len(items) > 1:
+            blocks = [f"ITEM: {item_id}\n{self._article_block(body)}" for item_id, body in zip(items[1::2], items[2::2])]
+            return _Response("\n\n".join(blocks))
+        if "News Content:" in prompt:
+            return _Response(self._article_block(prompt.split("News Content:", 1)[1]))
+        return _Response(self.trend_summaries[0])
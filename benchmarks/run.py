@@ -0,0 +1,449 @@
+# benchmarks/run.py (오프라인 벤치마크 실행기)
+#
+# 기록된 고정 데이터(benchmarks/fixtures)만 사용하므로 네트워크/API 키 없이 실행됩니다.
+#   python benchmarks/run.py                      # 전체 실행, 결과를 benchmarks/results/에 저장
+#   python benchmarks/run.py --only forecast parse
+#   python benchmarks/run.py --latency 0.2 --articles 48
+# 결과 파일은 실행마다 하나씩 쌓이며(기기마다 다르므로 저장소에는 올리지 않음), 같은 측정 조건(params)으로 실행한
+# 직전 결과(또는 --baseline)와 비교한 변화율을 출력합니다. 조건이 다른 결과와는 비교하지 않습니다.
+
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import platform
+import statistics
+import subprocess
+import tempfile
+import threading
+import http.client
+from datetime import datetime
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(BENCH_DIR)
+FIXTURES_DIR = os.path.join(BENCH_DIR, 'fixtures')
+RESULTS_DIR = os.path.join(BENCH_DIR, 'results')
+sys.path.insert(0, ROOT_DIR)
+sys.path.insert(0, BENCH_DIR)
+
+# 이 비율 이상 나빠진 항목은 회귀로 표시
+REGRESSION_THRESHOLD = 0.10
+
+
+def load_fixture(name):
+    with open(os.path.join(FIXTURES_DIR, name), 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def load_prices(name):
+    import pandas as pd
+    bars = pd.read_csv(os.path.join(FIXTURES_DIR, 'prices', f"{name}.csv"), index_col=0, parse_dates=True)
+    return bars["Close"]
+
+
+def timed(fn, repeat):
+    """fn을 repeat번 실행해 각 실행 시간(초) 목록을 반환합니다."""
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+def percentile(samples, q):
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(q * len(samples)))]
+
+
+def fixture_articles(count):
+    """기록된 기사들을 count개가 될 때까지 반복합니다. 반복분은 꼬리표를 붙여 서로 다른 기사로 취급되게 합니다."""
+    recorded = [item["article"] for item in load_fixture('gemini_responses.json')["articles"]]
+    articles = []
+    for i in range(count):
+        article = dict(recorded[i % len(recorded)])
+        if i >= len(recorded):
+            article["description"] = f"{article['description']} #{i}"
+        articles.append(article)
+    return articles
+
+
+# --- 개별 벤치마크: 모두 {지표 이름: 값} 딕셔너리를 반환 ---
+# 지표 이름 끝이 _ms/_s/_bytes면 작을수록, _rps면 클수록 좋은 값입니다.
+
+def bench_forecast(args):
+    """process_chart_data(ARIMA 학습 + 차트 생성 + 예측 구간) 시간."""
+    from forecasting import process_chart_data
+    results = {}
+    for name in ("IXIC", "KS11", "USDKRW"):
+        series = load_prices(name).tail(30)
+        samples = timed(lambda: process_chart_data(series, 3), args.repeat)
+        results[f"{name}_median_ms"] = round(statistics.median(samples) * 1000, 3)
+    # 예측 구간(해석적 구간 + 시뮬레이션 경로 백분위수) 계산 비용만 따로 측정
+    from statsmodels.tsa.arima.model import ARIMA
+    from forecasting import forecast_bands, ARIMA_ORDER
+    fitted = ARIMA(load_prices("IXIC").tail(30), order=ARIMA_ORDER).fit()
+    for n in (1000, 10000):
+        samples = timed(lambda: forecast_bands(fitted, 3, n, seed=0), args.repeat)
+        results[f"bands_{n}_median_ms"] = round(statistics.median(samples) * 1000, 3)
+    return results
+
+
+def bench_parse(args):
+    """Gemini 응답 텍스트 파싱 시간 (단건/배치)."""
+    from ai_analyzer import parse_article_response, parse_batch_response
+    responses = [item["response"] for item in load_fixture('gemini_responses.json')["articles"]]
+    batch_text = "\n\n".join(f"ITEM: {i + 1}\n{responses[i % len(responses)]}" for i in range(8))
+    n = 2000
+    # 마이크로벤치마크는 잡음이 크므로 repeat번 중 가장 빠른 값을 사용
+    single = min(timed(lambda: [parse_article_response(responses[i % len(responses)]) for i in range(n)], args.repeat)) / n
+    batch = min(timed(lambda: [parse_batch_response(batch_text) for _ in range(n // 8)], args.repeat)) / (n // 8)
+    return {"article_us": round(single * 1e6, 3), "batch8_us": round(batch * 1e6, 3)}
+
+
+def bench_analysis(args):
+    """기록된 응답을 지연(--latency)과 함께 재생하며 기사 분석 단계 전체 시간을 잽니다. (단건/배치 모드)"""
+    import ai_analyzer
+    from replay import ReplayModel
+    from run_predictions import analyze_articles
+    model = ReplayModel(load_fixture('gemini_responses.json'), latency=args.latency)
+    previous = ai_analyzer.get_model()
+    ai_analyzer.set_model(model)
+    results = {}
+    try:
+        for label, batch_tokens in (("single", 0), ("batch", 4000)):
+            articles = fixture_articles(args.articles)
+            model.calls = 0
+            started = time.perf_counter()
+            analyze_articles(articles, cache=None, batch_tokens=batch_tokens)
+            results[f"{label}_s"] = round(time.perf_counter() - started, 3)
+            results[f"{label}_requests"] = model.calls
+    finally:
+        ai_analyzer.set_model(previous)
+    return results
+
+
+def bench_snapshot(args):
+    """스냅샷 저장(렌더링용 축약 파일 + JSONL 아카이브) 시간과 파일 크기."""
+    from snapshot import build_render_view, write_snapshot
+    final_data = load_fixture('final_data.json')
+    tmp = tempfile.mkdtemp(prefix="bench_snapshot_")
+    try:
+        view_path = os.path.join(tmp, 'daily_data.json')
+        write_samples = timed(lambda: write_snapshot(final_data, view_path, os.path.join(tmp, 'archive')), args.repeat * 10)
+        view_samples = timed(lambda: json.dumps(build_render_view(final_data), ensure_ascii=False, separators=(',', ':')),
+                             args.repeat * 10)
+        return {
+            "write_median_ms": round(statistics.median(write_samples) * 1000, 3),
+            "render_view_median_ms": round(statistics.median(view_samples) * 1000, 3),
+            "view_bytes": os.path.getsize(view_path),
+        }
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+# trainer.py는 저장소의 database.db와 모델 파일을 직접 쓰므로, 소스를 임시 폴더에 복사해 그 안에서 실행.
+# 기록된 S&P 500(^GSPC) 이력이 없어, trainer가 읽는 ^GSPC 자리에 나스닥 고정 데이터(MARKET_PROXY)를 대신 넣습니다.
+# 실제 결과 라벨도 같은 데이터로 만들기 때문에, 이 벤치마크는 학습 시간을 잴 뿐 모델 정확도를 뜻하지 않습니다.
+MARKET_PROXY = "IXIC"
+TRAINER_JOB = r'''
+import json, time, random
+import pandas as pd
+from price_store import PriceStore, csv_fetcher
+from db import upsert_predictions, upsert_actuals, get_pool
+import trainer
+
+proxy = csv_fetcher(PRICES_DIR)
+store = PriceStore(fetchers={"yfinance": lambda symbol, start, end: proxy(MARKET_PROXY, start, end)})
+close = pd.read_csv(PRICES_DIR + "/" + MARKET_PROXY + ".csv", index_col=0, parse_dates=True)["Close"]
+store.sync("^GSPC", "yfinance", today=close.index[-1].date())
+rng = random.Random(42)
+days = close.index.strftime("%Y-%m-%d").tolist()
+upsert_predictions([(d, round(rng.uniform(-1, 1), 3), "상승") for d in days[1:]])
+upsert_actuals([(d, "상승" if c > p else "하락") for d, p, c in zip(days[1:], close.to_numpy()[:-1], close.to_numpy()[1:])])
+started = time.perf_counter()
+trainer.train_and_save_model()
+elapsed = time.perf_counter() - started
+get_pool().close()
+print("BENCH_RESULT " + json.dumps({"train_s": round(elapsed, 3), "rows": len(days) - 1}))
+'''
+
+
+def bench_trainer(args):
+    """trainer.train_and_save_model 시간 (특성 갱신 + 후보 모델 교차검증 + 저장). 시장 이력은 MARKET_PROXY로 대신합니다."""
+    sandbox = tempfile.mkdtemp(prefix="bench_trainer_")
+    try:
+        for name in os.listdir(ROOT_DIR):
+            if name.endswith('.py'):
+                shutil.copy(os.path.join(ROOT_DIR, name), sandbox)
+        os.makedirs(os.path.join(sandbox, 'data'))
+        job = f"PRICES_DIR = {os.path.join(FIXTURES_DIR, 'prices')!r}\nMARKET_PROXY = {MARKET_PROXY!r}\n" + TRAINER_JOB
+        proc = subprocess.run([sys.executable, "-c", job], cwd=sandbox, capture_output=True, text=True, timeout=600)
+        for line in proc.stdout.splitlines():
+            if line.startswith("BENCH_RESULT "):
+                return json.loads(line[len("BENCH_RESULT "):])
+        raise RuntimeError(f"trainer 벤치마크 실패:\n{proc.stdout[-2000:]}\n{proc.stderr[-2000:]}")
+    finally:
+        shutil.rmtree(sandbox, ignore_errors=True)
+
+
+def _load_generate(port, path, duration, concurrency, headers=None):
+    """concurrency개의 스레드로 duration초 동안 요청을 보내고 (요청 수, 지연 시간 목록, 오류 수)를 반환합니다."""
+    latencies, errors = [], [0]
+    lock = threading.Lock()
+    deadline = time.perf_counter() + duration
+
+    def worker():
+        local, failed = [], 0
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            try:
+                conn = http.client.HTTPConnection("127.0.0.1", port, timeout=10)
+                conn.request("GET", path, headers=headers or {})
+                response = conn.getresponse()
+                response.read()
+                conn.close()
+                if response.status >= 400:
+                    failed += 1
+            except OSError:
+                failed += 1
+            local.append(time.perf_counter() - started)
+        with lock:
+            latencies.extend(local)
+            errors[0] += failed
+
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return len(latencies), latencies, errors[0]
+
+
+def bench_dashboard(args):
+    """app.dashboard('/')를 실제 HTTP 서버로 띄우고 동시 요청 처리량과 지연 시간을 잽니다. (200 / 304 응답)"""
+    import logging
+    from werkzeug.serving import make_server
+    from app import app
+    # 요청마다 찍히는 접근 로그는 측정을 방해하므로 끔
+    logging.getLogger("werkzeug").setLevel(logging.ERROR)
+    server = make_server("127.0.0.1", 0, app, threaded=True)
+    port = server.server_port
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    results = {}
+    try:
+        # 첫 요청에서 스냅샷 로딩과 렌더링 캐시를 채움
+        conn = http.client.HTTPConnection("127.0.0.1", port)
+        conn.request("GET", "/")
+        response = conn.getresponse()
+        results["html_bytes"] = len(response.read())
+        etag = response.getheader("ETag")
+        # 차트 데이터는 페이지와 따로 받으므로 전송 크기(gzip)를 함께 기록
+        conn.request("GET", "/api/charts", headers={"Accept-Encoding": "gzip"})
+        results["charts_gzip_bytes"] = len(conn.getresponse().read())
+        conn.close()
+
+        for label, headers in (("full", None), ("not_modified", {"If-None-Match": etag} if etag else None)):
+            if headers is None and label == "not_modified":
+                continue
+            count, latencies, errors = _load_generate(port, "/", args.duration, args.concurrency, headers)
+            results[f"{label}_rps"] = round(count / args.duration, 1)
+            results[f"{label}_p50_ms"] = round(percentile(latencies, 0.50) * 1000, 3)
+            results[f"{label}_p99_ms"] = round(percentile(latencies, 0.99) * 1000, 3)
+            results[f"{label}_errors"] = errors
+    finally:
+        server.shutdown()
+    return results
+
+
+def bench_http(args):
+    """가짜 제공자 서버(분당 한도 있음)를 상대로 공용 HTTP 계층의 처리량, 429 횟수, 중복 요청 합치기를 잽니다."""
+    import http_client
+    quota_per_minute, requests_count = 600, 40
+    server, url = http_client.start_fake_server("marketaux", quota_per_minute, latency=args.latency / 5)
+    try:
+        client = http_client.HttpClient("marketaux", base_url=url)
+        # 클라이언트 한도를 서버 한도보다 두 배 높게 잡아, 429를 받은 뒤 속도를 맞추는 과정까지 측정
+        client.limiter = http_client.TokenBucket(2 * quota_per_minute / 60, 5)
+        errors = [0]
+
+        def call(params):
+            try:
+                client.get_json("/v1/news/all", params)
+            except Exception:
+                errors[0] += 1
+
+        started = time.perf_counter()
+        threads = [threading.Thread(target=call, args=({"limit": 1, "page": i},)) for i in range(requests_count)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        elapsed = time.perf_counter() - started
+        results = {"quota_rps": round(requests_count / elapsed, 2), "rejected_429": server.stats["rejected"],
+                   "errors": errors[0]}
+
+        # 같은 요청 16개를 동시에 보내면 서버에는 한 번만 가야 함
+        served_before = server.stats["served"]
+        threads = [threading.Thread(target=call, args=({"limit": 2},)) for _ in range(16)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        results["singleflight_upstream_calls"] = server.stats["served"] - served_before
+        return results
+    finally:
+        server.shutdown()
+
+
+# 시작 시간을 추적할 모듈. 웹 서버(app)와 일일 실행(run_predictions)은 무거운 라이브러리를 미리 불러오면 안 됨
+IMPORT_MODULES = ("app", "run_predictions", "ai_analyzer", "market_data", "forecasting", "trainer")
+
+
+def import_time_ms(module):
+    """새 인터프리터에서 `python -X importtime`으로 module을 import하는 데 걸린 누적 시간(ms)."""
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                          cwd=ROOT_DIR, capture_output=True, text=True, timeout=120)
+    # 형식: "import time: self [us] | cumulative | imported package"
+    for line in proc.stderr.splitlines():
+        parts = line.split("|")
+        if line.startswith("import time:") and len(parts) == 3 and parts[2].strip() == module:
+            return int(parts[1]) / 1000
+    raise RuntimeError(f"{module} import 실패:\n{proc.stderr[-2000:]}")
+
+
+def bench_imports(args):
+    """모듈별 import 시간 (-X importtime, repeat번 중 최솟값)."""
+    return {f"{module}_ms": round(min(import_time_ms(module) for _ in range(args.repeat)), 1)
+            for module in IMPORT_MODULES}
+
+
+BENCHMARKS = {
+    "imports": bench_imports,
+    "forecast": bench_forecast,
+    "parse": bench_parse,
+    "analysis": bench_analysis,
+    "snapshot": bench_snapshot,
+    "trainer": bench_trainer,
+    "dashboard": bench_dashboard,
+    "http": bench_http,
+}
+
+
+# --- 결과 저장과 비교 ---
+def git_commit():
+    """측정한 코드의 커밋. 커밋하지 않은 변경이 있으면 '-dirty'를 붙여 HEAD와 다른 코드였음을 남깁니다."""
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT_DIR,
+                                capture_output=True, text=True).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=ROOT_DIR,
+                               capture_output=True, text=True).stdout.strip()
+    except OSError:
+        return None
+    if not commit:
+        return None
+    return f"{commit}-dirty" if dirty else commit
+
+
+def _read_result(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def previous_result(params):
+    """같은 측정 조건(params)으로 실행한 가장 최근 결과 파일. 없으면 None."""
+    if not os.path.isdir(RESULTS_DIR):
+        return None
+    for name in sorted((n for n in os.listdir(RESULTS_DIR) if n.endswith('.json')), reverse=True):
+        path = os.path.join(RESULTS_DIR, name)
+        try:
+            if _read_result(path).get("params") == params:
+                return path
+        except (OSError, ValueError):
+            continue
+    return None
+
+
+def compare(current, baseline):
+    """두 결과를 비교해 (벤치마크, 지표, 이전 값, 현재 값, 변화율, 회귀 여부) 목록을 반환합니다."""
+    rows = []
+    for bench, metrics in current["benchmarks"].items():
+        before_metrics = baseline.get("benchmarks", {}).get(bench, {})
+        for metric, value in metrics.items():
+            before = before_metrics.get(metric)
+            if not isinstance(value, (int, float)) or not isinstance(before, (int, float)) or before == 0:
+                rows.append((bench, metric, before, value, None, False))
+                continue
+            change = (value - before) / before
+            if metric.endswith("_rps"):
+                regressed = change < -REGRESSION_THRESHOLD
+            elif metric.endswith(("_ms", "_us", "_s", "_bytes")):
+                regressed = change > REGRESSION_THRESHOLD
+            else:
+                regressed = False
+            rows.append((bench, metric, before, value, change, regressed))
+    return rows
+
+
+def print_comparison(rows, baseline_path):
+    print(f"\n📊 비교 기준: {os.path.relpath(baseline_path, ROOT_DIR)}")
+    regressions = 0
+    for bench, metric, before, value, change, regressed in rows:
+        change_text = "    -" if change is None else f"{change:+7.1%}"
+        mark = " ⚠️  회귀" if regressed else ""
+        print(f"   {bench:<10} {metric:<24} {str(before):>12} -> {str(value):>12} {change_text}{mark}")
+        regressions += regressed
+    if regressions:
+        print(f"⚠️  {regressions}개 지표가 {REGRESSION_THRESHOLD:.0%} 이상 나빠졌습니다.")
+    else:
+        print("✅ 회귀 없음")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="오프라인 벤치마크")
+    parser.add_argument("--only", nargs="+", choices=list(BENCHMARKS), help="실행할 벤치마크만 지정")
+    parser.add_argument("--repeat", type=int, default=5, help="반복 측정 횟수")
+    parser.add_argument("--latency", type=float, default=0.05, help="재생하는 Gemini 응답의 지연(초)")
+    parser.add_argument("--articles", type=int, default=24, help="분석 벤치마크의 기사 수")
+    parser.add_argument("--duration", type=float, default=3.0, help="부하 생성 시간(초)")
+    parser.add_argument("--concurrency", type=int, default=8, help="동시 요청 수")
+    parser.add_argument("--baseline", help="비교할 결과 파일 (기본: 가장 최근 결과)")
+    parser.add_argument("--no-save", action="store_true", help="결과 파일을 저장하지 않음")
+    args = parser.parse_args()
+
+    result = {
+        "run_id": datetime.now().strftime("%Y%m%d_%H%M%S"),
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "cpu_count": os.cpu_count(),
+        "params": {"repeat": args.repeat, "latency": args.latency, "articles": args.articles,
+                   "duration": args.duration, "concurrency": args.concurrency},
+        "benchmarks": {},
+    }
+    for name in args.only or BENCHMARKS:
+        print(f"➡️  {name} 벤치마크 실행 중...")
+        started = time.perf_counter()
+        result["benchmarks"][name] = BENCHMARKS[name](args)
+        print(f"✅ {name} ({time.perf_counter() - started:.1f}초): {result['benchmarks'][name]}")
+
+    baseline_path = args.baseline or previous_result(result["params"])
+    if baseline_path:
+        baseline = _read_result(baseline_path)
+        if baseline.get("params") == result["params"]:
+            print_comparison(compare(result, baseline), baseline_path)
+        else:
+            # 기사 수나 지연 시간이 다르면 변화율이 회귀처럼 보이므로 비교하지 않음
+            print(f"⚠️  {os.path.relpath(baseline_path, ROOT_DIR)}는 측정 조건이 달라 비교하지 않습니다: "
+                  f"{baseline.get('params')} != {result['params']}")
+    else:
+        print("⏭️  같은 측정 조건의 이전 결과가 없어 비교하지 않습니다.")
+
+    if not args.no_save:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        path = os.path.join(RESULTS_DIR, f"{result['run_id']}.json")
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+        print(f"💾 결과 저장: {os.path.relpath(path, ROOT_DIR)}")
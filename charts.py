@@ -0,0 +1,83 @@
+# charts.py (차트 데이터 압축 형식)
+#
+# 날짜 라벨 배열과 None 패딩 대신 아래 형식으로 차트를 저장/전송합니다.
+#   {"base": "2025-09-08",      첫 번째 점의 날짜
+#    "step": 1,                  점 사이 기본 간격(일)
+#    "gaps": {"5": 3, ...},      기본 간격과 다른 점만: {인덱스: 직전 점과의 일수} (주말/휴장일, 예측 시작일)
+#    "historical": [...],        과거 값
+#    "forecast_offset": 30,      예측 첫 값의 인덱스 (= 과거 값 개수)
+#    "forecast": [...]}          예측 값
+# 과거 값과 예측 값은 하나의 인덱스 공간(0 ~ len(historical)+len(forecast)-1)을 공유합니다.
+
+from datetime import date, datetime, timedelta
+
+CHART_STEP_DAYS = 1
+
+
+def encode_chart(dates, historical, forecast, step=CHART_STEP_DAYS):
+    """날짜 목록(과거+예측)과 값들로 압축 차트를 만듭니다."""
+    dates = [d.date() if isinstance(d, datetime) else d for d in dates]
+    gaps = {}
+    for i in range(1, len(dates)):
+        delta = (dates[i] - dates[i - 1]).days
+        if delta != step:
+            gaps[str(i)] = delta
+    return {
+        "base": dates[0].isoformat() if dates else None,
+        "step": step,
+        "gaps": gaps,
+        "historical": list(historical),
+        "forecast_offset": len(historical),
+        "forecast": list(forecast),
+    }
+
+
+def chart_dates(chart):
+    """압축 차트의 모든 점의 날짜 목록을 만듭니다."""
+    if not chart.get("base"):
+        return []
+    count = chart["forecast_offset"] + len(chart["forecast"])
+    gaps = chart.get("gaps") or {}
+    current = date.fromisoformat(chart["base"])
+    dates = [current]
+    for i in range(1, count):
+        current += timedelta(days=gaps.get(str(i), chart["step"]))
+        dates.append(current)
+    return dates
+
+
+def _infer_dates(labels, anchor_index, reference):
+    """연도 없는 'MM-DD' 라벨에 연도를 붙입니다. anchor_index의 라벨은 reference 이전의 가장 가까운 날짜로 봅니다."""
+    parsed = [tuple(int(part) for part in label.split('-')) for label in labels]
+    month, day = parsed[anchor_index]
+    year = reference.year if (month, day) <= (reference.month, reference.day) else reference.year - 1
+    years = [0] * len(parsed)
+    years[anchor_index] = year
+    for i in range(anchor_index - 1, -1, -1):
+        years[i] = years[i + 1] - (1 if parsed[i] > parsed[i + 1] else 0)
+    for i in range(anchor_index + 1, len(parsed)):
+        years[i] = years[i - 1] + (1 if parsed[i] < parsed[i - 1] else 0)
+    return [date(y, m, d) for y, (m, d) in zip(years, parsed)]
+
+
+def to_compact(chart, reference=None):
+    """차트를 압축 형식으로 바꿉니다. 이미 압축 형식이면 그대로 반환합니다.
+
+    예전 형식({"labels", "historical", "forecast"})은 forecast 앞의 None 패딩이 있든 없든 처리하며,
+    연도는 reference(스냅샷의 last_updated 날짜, 없으면 오늘) 기준으로 추정합니다.
+    """
+    if not chart or "base" in chart:
+        return chart
+    labels = chart.get("labels") or []
+    historical = chart.get("historical") or []
+    # 예전 형식 중 일부는 값이 [[값], [값], ...]으로 한 겹 더 싸여 있음
+    historical = [value[0] if isinstance(value, list) else value for value in historical]
+    forecast = list(chart.get("forecast") or [])
+    if len(forecast) == len(labels):
+        forecast = forecast[len(historical):]
+    if not labels or not historical:
+        return None
+    if isinstance(reference, str):
+        reference = date.fromisoformat(reference[:10])
+    dates = _infer_dates(labels, len(historical) - 1, reference or date.today())
+    return encode_chart(dates, historical, forecast)
@@ -21,4 +21,4 @@ else:
             
     print("\n--- [사용 방법] ---")
     print("위 목록에서 'gemini-pro' 또는 '-pro'가 포함된 모델 이름을 복사하여")
-    print("ai_analyzer.py 파일의 ai_model = genai.GenerativeModel('모델이름') 부분에 붙여넣으세요.")
\ No newline at end of file
+    print("ai_analyzer.py 파일의 MODEL_NAME = '모델이름' 부분에 붙여넣으세요.")
\ No newline at end of file
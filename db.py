@@ -0,0 +1,251 @@
+# db.py (공용 SQLite 접근 계층: 커넥션 풀, 마이그레이션, 일괄 upsert)
+
+import os
+import queue
+import atexit
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+DB_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'database.db')
+
+# WAL: 쓰기 중에도 웹 프로세스가 읽을 수 있음 / NORMAL: WAL에서는 안전하면서 커밋이 빠름
+PRAGMAS = [
+    "PRAGMA journal_mode = WAL",
+    "PRAGMA synchronous = NORMAL",
+    "PRAGMA busy_timeout = 30000",
+    "PRAGMA temp_store = MEMORY",
+    "PRAGMA cache_size = -16000",      # 약 16MB
+    "PRAGMA mmap_size = 134217728",    # 128MB
+    "PRAGMA foreign_keys = ON",
+]
+
+# (버전, SQL 목록). 적용된 버전은 PRAGMA user_version에 기록됩니다.
+# 기존 database.db와 호환되도록 모든 생성문은 IF NOT EXISTS를 사용합니다.
+MIGRATIONS = [
+    (1, [
+        '''
+        CREATE TABLE IF NOT EXISTS predictions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            prediction_date DATE UNIQUE NOT NULL,
+            market_sentiment_score REAL NOT NULL,
+            predicted_trend TEXT NOT NULL -- '상승' 또는 '하락'
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS actuals (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            actual_date DATE UNIQUE NOT NULL,
+            actual_trend TEXT NOT NULL -- '상승' 또는 '하락'
+        )
+        ''',
+    ]),
+    (2, [
+        '''
+        CREATE TABLE IF NOT EXISTS snapshots (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            last_updated TEXT UNIQUE NOT NULL,
+            market_sentiment_score REAL,
+            trend_summary TEXT,   -- JSON
+            articles TEXT         -- JSON (렌더링용 필드만)
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS snapshot_series (
+            symbol TEXT NOT NULL,       -- 'nasdaq', 'kospi', 'fx' 등 (차트 키에서 '_data'를 뺀 이름)
+            last_updated TEXT NOT NULL,
+            payload TEXT NOT NULL,      -- 압축된 차트 JSON
+            PRIMARY KEY (symbol, last_updated)
+        ) WITHOUT ROWID
+        ''',
+    ]),
+    (3, [
+        # 학습용 JOIN(날짜 + 점수/결과)이 테이블을 읽지 않고 인덱스만으로 끝나도록 하는 커버링 인덱스
+        "CREATE INDEX IF NOT EXISTS idx_predictions_date_score ON predictions (prediction_date, market_sentiment_score, predicted_trend)",
+        "CREATE INDEX IF NOT EXISTS idx_actuals_date_trend ON actuals (actual_date, actual_trend)",
+        # 종목과 무관한 날짜 구간 조회용
+        "CREATE INDEX IF NOT EXISTS idx_snapshot_series_last_updated ON snapshot_series (last_updated)",
+    ]),
+    (4, [
+        # 과거 데이터 일괄 수집(backfill.py)의 진행 위치. 중단되면 이 날짜 다음부터 이어서 수집
+        '''
+        CREATE TABLE IF NOT EXISTS backfill_checkpoints (
+            job TEXT PRIMARY KEY,
+            last_date TEXT NOT NULL,
+            updated_at TEXT NOT NULL
+        )
+        ''',
+    ]),
+    (5, [
+        # trainer.py가 새 날짜에 대해서만 계산해 채우는 특성 테이블
+        '''
+        CREATE TABLE IF NOT EXISTS features (
+            feature_date TEXT PRIMARY KEY,
+            ret_lag1 REAL,
+            ret_lag2 REAL,
+            ret_lag5 REAL,
+            vol_5 REAL,
+            vol_20 REAL,
+            sentiment REAL,
+            sentiment_ma3 REAL,
+            sentiment_ma7 REAL,
+            article_count REAL,
+            keyword_count REAL
+        ) WITHOUT ROWID
+        ''',
+        # 학습된 모델 버전과 성능 기록. promoted = 1 인 버전이 market_predictor.pkl로 서비스 중
+        '''
+        CREATE TABLE IF NOT EXISTS model_versions (
+            version TEXT PRIMARY KEY,
+            created_at TEXT NOT NULL,
+            model_name TEXT NOT NULL,
+            features TEXT NOT NULL,   -- JSON
+            cv_accuracy REAL NOT NULL,
+            cv_std REAL,
+            n_samples INTEGER NOT NULL,
+            path TEXT NOT NULL,
+            promoted INTEGER NOT NULL DEFAULT 0
+        )
+        ''',
+        "CREATE INDEX IF NOT EXISTS idx_model_versions_promoted ON model_versions (promoted, version)",
+    ]),
+]
+
+
+def migrate(conn):
+    """아직 적용되지 않은 마이그레이션을 순서대로 적용합니다."""
+    current = conn.execute("PRAGMA user_version").fetchone()[0]
+    for version, statements in MIGRATIONS:
+        if version <= current:
+            continue
+        # DDL도 함께 롤백되도록 명시적으로 트랜잭션을 엶
+        conn.execute("BEGIN")
+        try:
+            for statement in statements:
+                conn.execute(statement)
+            conn.execute(f"PRAGMA user_version = {version}")
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        print(f"🛠️  DB 마이그레이션 {version} 적용 완료")
+    return conn
+
+
+class ConnectionPool:
+    """스레드 간에 재사용하는 작은 SQLite 커넥션 풀. 처음 만든 커넥션에서 마이그레이션을 적용합니다."""
+
+    def __init__(self, path=DB_PATH, size=4, migrations=True):
+        self.path = path
+        self.size = size
+        self._idle = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+        self._migrations = migrations
+        self._all = []
+
+    def _open(self):
+        conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        for pragma in PRAGMAS:
+            conn.execute(pragma)
+        if self._migrations and self._created == 0:
+            migrate(conn)
+        return conn
+
+    def _acquire(self):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            if self._created < self.size:
+                conn = self._open()
+                self._created += 1
+                self._all.append(conn)
+                return conn
+        return self._idle.get()
+
+    @contextmanager
+    def connection(self):
+        """읽기용 커넥션을 빌려줍니다."""
+        conn = self._acquire()
+        try:
+            yield conn
+        finally:
+            if conn.in_transaction:
+                conn.rollback()
+            self._idle.put(conn)
+
+    @contextmanager
+    def transaction(self):
+        """하나의 트랜잭션으로 묶어 실행합니다. 예외가 나면 롤백합니다."""
+        with self.connection() as conn:
+            with conn:
+                yield conn
+
+    def close(self):
+        """WAL 내용을 본 파일에 반영하고 모든 커넥션을 닫습니다. (database.db를 git에 커밋하기 전 필요)"""
+        with self._lock:
+            for conn in self._all:
+                try:
+                    conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+                    conn.close()
+                except sqlite3.Error:
+                    pass
+            self._all, self._created = [], 0
+            self._idle = queue.LifoQueue()
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(path=DB_PATH):
+    """경로별로 프로세스에서 공유하는 커넥션 풀을 반환합니다."""
+    with _pools_lock:
+        if path not in _pools:
+            _pools[path] = ConnectionPool(path, migrations=(path == DB_PATH))
+        return _pools[path]
+
+
+@atexit.register
+def close_all_pools():
+    for pool in list(_pools.values()):
+        pool.close()
+
+
+def upsert_many(table, columns, rows, key, on_conflict="update", pool=None, conn=None):
+    """여러 행을 한 트랜잭션의 executemany로 저장합니다.
+
+    key: 충돌 판단 컬럼 목록, on_conflict: 'update'(덮어쓰기) 또는 'ignore'(기존 값 유지)
+    conn이 주어지면 호출한 쪽의 트랜잭션 안에서 실행합니다.
+    """
+    rows = list(rows)
+    if not rows:
+        return 0
+    placeholders = ", ".join("?" for _ in columns)
+    sql = f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({placeholders}) ON CONFLICT ({', '.join(key)}) DO "
+    if on_conflict == "ignore":
+        sql += "NOTHING"
+    else:
+        updates = [c for c in columns if c not in key]
+        sql += "UPDATE SET " + ", ".join(f"{c} = excluded.{c}" for c in updates)
+    if conn is not None:
+        conn.executemany(sql, rows)
+    else:
+        with (pool or get_pool()).transaction() as conn:
+            conn.executemany(sql, rows)
+    return len(rows)
+
+
+def upsert_predictions(rows, overwrite=True, pool=None, conn=None):
+    """(prediction_date, market_sentiment_score, predicted_trend) 행들을 저장합니다. 기본적으로 같은 날짜는 덮어씁니다."""
+    return upsert_many("predictions", ["prediction_date", "market_sentiment_score", "predicted_trend"],
+                       rows, key=["prediction_date"], on_conflict="update" if overwrite else "ignore",
+                       pool=pool, conn=conn)
+
+
+def upsert_actuals(rows, overwrite=False, pool=None, conn=None):
+    """(actual_date, actual_trend) 행들을 저장합니다. 기본적으로 이미 있는 날짜는 건너뜁니다."""
+    return upsert_many("actuals", ["actual_date", "actual_trend"], rows, key=["actual_date"],
+                       on_conflict="update" if overwrite else "ignore", pool=pool, conn=conn)
@@ -0,0 +1,90 @@
+# features.py (학습/추론 공용 특성 생성)
+
+import json
+from datetime import date, timedelta
+import numpy as np
+import pandas as pd
+from db import get_pool
+from price_store import PriceStore
+
+MARKET_SYMBOL = '^GSPC'
+# 이동평균/변동성 계산에 필요한 과거 구간 (새 날짜의 특성을 만들 때 이만큼 앞부터 읽음)
+LOOKBACK_DAYS = 60
+
+FEATURE_COLUMNS = [
+    "ret_lag1", "ret_lag2", "ret_lag5", "vol_5", "vol_20",
+    "sentiment", "sentiment_ma3", "sentiment_ma7",
+    "article_count", "keyword_count",
+]
+
+
+def load_sources(since):
+    """since 이후의 감성 점수, 기사/키워드 수, 지수 종가를 읽어옵니다."""
+    with get_pool().connection() as conn:
+        sentiment = pd.read_sql_query(
+            "SELECT prediction_date AS d, market_sentiment_score AS sentiment FROM predictions WHERE prediction_date >= ? ORDER BY prediction_date",
+            conn, params=(since,))
+        snapshots = conn.execute(
+            "SELECT last_updated, articles FROM snapshots WHERE last_updated >= ? ORDER BY last_updated", (since,)
+        ).fetchall()
+
+    # 하루에 여러 번 실행했다면 마지막 실행 기준으로 기사 수와 고유 키워드 수를 셈
+    counts = {}
+    for last_updated, articles in snapshots:
+        articles = json.loads(articles) if articles else []
+        keywords = {k for a in articles for k in (a.get("keywords") or [])}
+        counts[last_updated[:10]] = (len(articles), len(keywords))
+    counts = pd.DataFrame([(d, a, k) for d, (a, k) in counts.items()], columns=["d", "article_count", "keyword_count"])
+
+    close = PriceStore().window(MARKET_SYMBOL)
+    close = close[close.index >= pd.Timestamp(since) - pd.Timedelta(days=LOOKBACK_DAYS)]
+    return sentiment, counts, close
+
+
+def build_feature_frame(sentiment, counts, close):
+    """날짜별 특성 행렬을 만듭니다. 수익률 특성은 예측 시점에 알 수 있도록 전날까지의 값만 사용합니다."""
+    df = sentiment.copy()
+    df["d"] = pd.to_datetime(df["d"])
+    df = df.sort_values("d").reset_index(drop=True)
+    df["sentiment_ma3"] = df["sentiment"].rolling(3, min_periods=1).mean()
+    df["sentiment_ma7"] = df["sentiment"].rolling(7, min_periods=1).mean()
+
+    if len(close) > 1:
+        returns = close.pct_change()
+        prices = pd.DataFrame({
+            "d": close.index,
+            "ret_lag1": returns.to_numpy(),
+            "ret_lag2": returns.shift(1).to_numpy(),
+            "ret_lag5": close.pct_change(5).to_numpy(),
+            "vol_5": returns.rolling(5).std().to_numpy(),
+            "vol_20": returns.rolling(20).std().to_numpy(),
+        })
+        # 각 예측일보다 엄격히 이전인 마지막 거래일의 값을 붙임 (당일 종가 사용 방지)
+        df = pd.merge_asof(df, prices.sort_values("d"), on="d", allow_exact_matches=False)
+    else:
+        for column in ["ret_lag1", "ret_lag2", "ret_lag5", "vol_5", "vol_20"]:
+            df[column] = np.nan
+
+    if len(counts):
+        counts = counts.assign(d=pd.to_datetime(counts["d"]))
+        df = df.merge(counts, on="d", how="left")
+    else:
+        df["article_count"] = np.nan
+        df["keyword_count"] = np.nan
+
+    df["d"] = df["d"].dt.strftime('%Y-%m-%d')
+    return df[["d"] + FEATURE_COLUMNS]
+
+
+def build_live_features(day, sentiment, article_count, keyword_count):
+    """오늘 실행 결과로 추론용 특성 한 행을 만듭니다. (DB에 저장되기 전의 값을 반영)"""
+    since = (date.fromisoformat(day) - timedelta(days=LOOKBACK_DAYS)).isoformat()
+    history, counts, close = load_sources(since)
+    history = pd.concat([history[history["d"] != day], pd.DataFrame([{"d": day, "sentiment": sentiment}])])
+    counts = pd.concat([counts[counts["d"] != day],
+                        pd.DataFrame([{"d": day, "article_count": article_count, "keyword_count": keyword_count}])])
+    row = build_feature_frame(history, counts, close).iloc[-1]
+    features = {column: (None if pd.isna(row[column]) else float(row[column])) for column in FEATURE_COLUMNS}
+    # 감성 점수 하나만으로 학습된 이전 형식의 모델도 쓸 수 있도록 함께 제공
+    features["market_sentiment_score"] = float(sentiment)
+    return features
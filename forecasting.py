@@ -0,0 +1,225 @@
+# forecasting.py (ARIMA 예측 및 차트 데이터 생성)
+
+import os
+import re
+import json
+import time
+import zlib
+from datetime import date, timedelta
+from charts import encode_chart
+# pandas/numpy/statsmodels는 무거우므로 실제로 학습할 때 불러옵니다. (시작 시간 단축, 학습은 하위 프로세스에서만 실행)
+
+ARIMA_ORDER = (5, 1, 0)
+MODEL_STATE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'models')
+# 이 기간이 지나면 저장된 파라미터를 버리고 처음부터 다시 학습합니다.
+FULL_REFIT_DAYS = 7
+# 새 관측값의 표준화 예측 오차가 이 값을 넘으면 파라미터가 낡았다고 보고 재추정합니다.
+DRIFT_Z_THRESHOLD = 3.0
+# 콜드 학습 때, 저장된 파라미터로 낸 예측과 새로 학습한 예측의 차이 허용 범위 (마지막 값 대비 비율).
+# 이 범위를 넘으면 재학습 주기를 절반으로 줄입니다. 콜드 학습과의 비교라서 이 범위는 재학습 주기(refit_days,
+# 최대 FULL_REFIT_DAYS일)마다만 직접 확인되고, 그 사이의 변화는 DRIFT_Z_THRESHOLD와 아래 로그우도 점검으로만 막습니다.
+FORECAST_TOLERANCE = 0.005
+# 매 실행 점검: 재사용/웜스타트 파라미터의 관측값당 평균 로그우도가 마지막 콜드 학습 때보다 이만큼 넘게 낮아지면
+# 재학습 주기를 기다리지 않고 바로 콜드 학습합니다. (필터를 이미 돌렸으므로 추가 비용 없음)
+LIKELIHOOD_TOLERANCE = 0.1
+# 예측 구간: 모델의 해석적 구간(conf_int)의 신뢰수준과, 시뮬레이션 경로 수/요약 백분위수
+INTERVAL_LEVEL = 0.95
+FORECAST_SAMPLES = int(os.environ.get('FORECAST_SAMPLES', '1000'))
+ENSEMBLE_PERCENTILES = (10, 50, 90)
+
+
+def _state_path(symbol):
+    return os.path.join(MODEL_STATE_DIR, re.sub(r'[^A-Za-z0-9]', '', symbol) + '.json')
+
+
+def load_model_state(symbol):
+    """종목별로 저장된 ARIMA 파라미터 상태를 읽습니다. 없으면 None."""
+    try:
+        with open(_state_path(symbol), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+
+def save_model_state(symbol, state):
+    """종목별 ARIMA 파라미터 상태를 저장합니다."""
+    os.makedirs(MODEL_STATE_DIR, exist_ok=True)
+    tmp_path = _state_path(symbol) + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(state, f, ensure_ascii=False, indent=4)
+    os.replace(tmp_path, _state_path(symbol))
+
+
+def fit_arima(hist_data, symbol=None, order=ARIMA_ORDER, today=None, horizon=3):
+    """ARIMA를 학습합니다. symbol이 주어지면 이전 실행의 파라미터를 재사용하거나 웜스타트합니다.
+
+    반환값은 (학습 결과, 정보 딕셔너리)이며, 정보의 mode는 다음 중 하나입니다.
+    - cold: 처음부터 학습 / reuse: 저장된 파라미터에 새 관측값만 반영 / warm: 저장된 파라미터에서 출발해 재추정
+    콜드 학습 때의 예측 차이 점검은 horizon(종목의 예측 일수)만큼의 예측으로 합니다.
+    """
+    import numpy as np
+    import pandas as pd
+    from statsmodels.tsa.arima.model import ARIMA
+
+    today = today or date.today()
+    model = ARIMA(hist_data, order=order)
+    state = load_model_state(symbol) if symbol else None
+    if state and tuple(state.get("order", ())) != tuple(order):
+        state = None
+
+    started = time.perf_counter()
+    info = {"mode": "cold", "deviation": None}
+    results = None
+    if state:
+        age = (today - date.fromisoformat(state["fitted_at"])).days
+        params = np.asarray(state["params"])
+        if age < state.get("refit_days", FULL_REFIT_DAYS):
+            # 칼만 필터만 다시 돌려 새 관측값을 반영 (최적화 없음)
+            results = model.smooth(params)
+            fitted_until = pd.Timestamp(state["last_observation"])
+            new_errors = results.standardized_forecasts_error[0][np.asarray(hist_data.index > fitted_until)]
+            if len(new_errors) and np.nanmax(np.abs(new_errors)) > DRIFT_Z_THRESHOLD:
+                results = model.fit(start_params=params)
+                info["mode"] = "warm"
+            else:
+                info["mode"] = "reuse"
+            # 파라미터가 지금 데이터에 마지막 콜드 학습만큼 맞지 않으면 바로 콜드 학습 (아래에서 예측 차이도 점검)
+            drop = state["cold_loglike"] - results.llf / results.nobs if "cold_loglike" in state else None
+            if drop is not None and drop > LIKELIHOOD_TOLERANCE:
+                stale_forecast = results.forecast(steps=horizon)
+                info.update({"mode": "cold", "likelihood_drop": float(drop)})
+                results = None
+        else:
+            # 정기 재학습: 저장된 파라미터의 예측과 비교해 허용 오차를 점검
+            stale_forecast = model.smooth(params).forecast(steps=horizon)
+
+    if results is None:
+        results = model.fit()
+    elapsed = time.perf_counter() - started
+
+    if symbol:
+        new_state = dict(state or {})
+        if info["mode"] == "cold":
+            refit_days = FULL_REFIT_DAYS
+            if state:
+                scale = max(abs(float(hist_data.iloc[-1])), 1e-9)
+                deviation = float(np.max(np.abs(np.asarray(results.forecast(steps=horizon)) - np.asarray(stale_forecast)))) / scale
+                info["deviation"] = deviation
+                if deviation > FORECAST_TOLERANCE:
+                    refit_days = max(1, state.get("refit_days", FULL_REFIT_DAYS) // 2)
+            new_state.update({"fitted_at": today.isoformat(), "cold_fit_seconds": elapsed, "refit_days": refit_days,
+                              "cold_loglike": float(results.llf / results.nobs)})
+        new_state.update({
+            "order": list(order),
+            "params": np.asarray(results.params).tolist(),
+            "last_observation": pd.Timestamp(hist_data.index[-1]).strftime('%Y-%m-%d'),
+        })
+        save_model_state(symbol, new_state)
+        info["saved_seconds"] = max(0.0, new_state["cold_fit_seconds"] - elapsed)
+    else:
+        info["saved_seconds"] = 0.0
+    info["fit_seconds"] = elapsed
+    return results, info
+
+
+def _psd_sqrt(matrix):
+    """양의 준정부호 공분산 행렬의 제곱근 (특이 행렬도 허용)."""
+    import numpy as np
+    values, vectors = np.linalg.eigh(matrix)
+    return vectors * np.sqrt(np.clip(values, 0.0, None))
+
+
+def simulate_paths(results, steps, samples=FORECAST_SAMPLES, seed=None):
+    """학습된 상태공간 모델에서 마지막 관측 이후 steps일의 경로를 samples개 시뮬레이션합니다. 반환 모양은 (steps, samples).
+
+    statsmodels의 simulate(repetitions=N)는 경로마다 필터를 따로 돌리므로 느립니다. 여기서는 마지막 예측 상태
+    분포에서 시작 상태를 뽑고, 모든 경로의 충격을 한 번에 만든 뒤 행렬 곱으로 함께 진행시킵니다.
+    """
+    import numpy as np
+    fr = results.filter_results
+    transition = fr.transition[:, :, -1]
+    state_intercept = fr.state_intercept[:, -1]
+    selection = fr.selection[:, :, -1]
+    design = fr.design[0, :, -1]
+    obs_intercept = fr.obs_intercept[0, -1]
+
+    rng = np.random.default_rng(seed)
+    k_states, k_posdef = selection.shape
+    # 시작 상태 ~ N(a_{n+1}, P_{n+1}), 상태/관측 충격은 모든 시점·경로를 한 번에 생성
+    states = fr.predicted_state[:, -1] + rng.standard_normal((samples, k_states)) @ _psd_sqrt(fr.predicted_state_cov[:, :, -1]).T
+    state_shocks = rng.standard_normal((steps, samples, k_posdef)) @ (selection @ _psd_sqrt(fr.state_cov[:, :, -1])).T
+    obs_shocks = rng.standard_normal((steps, samples)) * np.sqrt(max(float(fr.obs_cov[0, 0, -1]), 0.0))
+
+    paths = np.empty((steps, samples))
+    for t in range(steps):
+        paths[t] = states @ design + obs_intercept + obs_shocks[t]
+        states = states @ transition.T + state_intercept + state_shocks[t]
+    return paths
+
+
+def forecast_bands(results, steps, samples=FORECAST_SAMPLES, seed=None):
+    """해석적 예측 구간과 시뮬레이션 경로의 백분위수를 차트에 넣을 형식으로 만듭니다."""
+    import numpy as np
+    interval = np.asarray(results.get_forecast(steps=steps).conf_int(alpha=1 - INTERVAL_LEVEL))
+    bands = {
+        "level": INTERVAL_LEVEL,
+        "lower": np.round(interval[:, 0], 2).tolist(),
+        "upper": np.round(interval[:, 1], 2).tolist(),
+    }
+    if samples > 0:
+        paths = simulate_paths(results, steps, samples, seed)
+        quantiles = np.percentile(paths, ENSEMBLE_PERCENTILES, axis=1)
+        bands["samples"] = samples
+        bands["percentiles"] = {str(p): np.round(q, 2).tolist() for p, q in zip(ENSEMBLE_PERCENTILES, quantiles)}
+    return bands
+
+
+def forecast_instrument(hist_data, symbol=None, forecast_days=3, samples=FORECAST_SAMPLES):
+    """예측을 수행하고 (차트 데이터, 학습 정보)를 반환합니다."""
+    if hist_data is None or len(hist_data) < 20:
+        raise ValueError(f"예측을 위한 데이터가 부족합니다 (현재: {len(hist_data) if hist_data is not None else 0}개)")
+    import numpy as np
+    import pandas as pd
+
+    # hist_data가 DataFrame인 경우 Series로 변환
+    if isinstance(hist_data, pd.DataFrame):
+        hist_data = hist_data.iloc[:, 0]
+
+    today = date.today()
+
+    try:
+        # ARIMA 모델 학습 및 예측
+        model, info = fit_arima(hist_data, symbol, horizon=forecast_days)
+        forecast = model.forecast(steps=forecast_days)
+
+        hist_dates = [d.date() for d in pd.DatetimeIndex(hist_data.index)]
+        forecast_dates = [today + timedelta(days=i) for i in range(1, forecast_days + 1)]
+
+        # 1차원 배열로 통일하여 반환
+        historical_values = hist_data.values
+        if len(historical_values.shape) > 1:
+            historical_values = historical_values.flatten()
+
+        forecast_values = np.asarray(forecast)
+        if len(forecast_values.shape) > 1:
+            forecast_values = forecast_values.flatten()
+
+        # 날짜 라벨/None 패딩 대신 시작일+간격, 예측 시작 인덱스로 표현 (charts.py 참고)
+        chart = encode_chart(hist_dates + forecast_dates,
+                             np.round(historical_values, 2).tolist(),
+                             np.round(forecast_values, 2).tolist())
+        # 같은 데이터로 다시 실행하면 같은 구간이 나오도록 종목과 마지막 관측일로 난수 시드를 정함
+        seed = zlib.crc32(f"{symbol}:{hist_dates[-1]}".encode('utf-8'))
+        chart["bands"] = forecast_bands(model, forecast_days, samples, seed)
+        return chart, info
+    except Exception as e:
+        print(f"❌ 예측 모델 생성 중 오류: {e}")
+        import traceback
+        print(traceback.format_exc())
+        raise e
+
+
+def process_chart_data(hist_data, forecast_days=3, symbol=None, samples=FORECAST_SAMPLES):
+    """데이터프레임을 받아 예측을 수행하고 차트 형식으로 반환합니다. (예측 구간 포함)"""
+    chart, _ = forecast_instrument(hist_data, symbol, forecast_days, samples)
+    return chart
@@ -0,0 +1,27 @@
+# gunicorn.conf.py (운영 서버 설정)
+#
+#   gunicorn -c gunicorn.conf.py wsgi:application
+#
+# 워커 수는 WEB_CONCURRENCY, 워커당 스레드 수는 GUNICORN_THREADS로 바꿀 수 있습니다.
+
+import gc
+import os
+import multiprocessing
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8080')}"
+workers = int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count() * 2 + 1))
+threads = int(os.environ.get('GUNICORN_THREADS', '2'))
+worker_class = 'gthread'
+timeout = 30
+keepalive = 5
+
+# 앱(과 스냅샷)을 마스터에서 한 번만 불러온 뒤 fork → 워커들이 같은 메모리를 공유
+preload_app = True
+
+
+def when_ready(server):
+    # 미리 불러온 객체들을 GC 대상에서 빼 둠. 워커에서 GC가 이 객체들을 훑으며 페이지에 쓰면
+    # copy-on-write로 각 워커에 복사본이 생기므로, fork 전에 고정해 공유 상태를 유지합니다.
+    gc.collect()
+    gc.freeze()
+    server.log.info(f"사전 로딩된 객체 {gc.get_freeze_count()}개 고정, 워커 {workers}개 시작")
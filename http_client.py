@@ -0,0 +1,300 @@
+# http_client.py (외부 API 공용 HTTP 계층: 연결 재사용, 호출량 제한, 재시도, 중복 요청 합치기)
+#
+# 모든 외부 호출은 이 모듈의 제공자(provider)별 설정을 거칩니다.
+# - HTTP로 직접 부르는 API(Marketaux, Alpha Vantage)는 get_client(provider).get_json(...)을 사용
+# - 자체 클라이언트를 쓰는 라이브러리(yfinance, Gemini)는 호출 전에 rate_limit(provider)만 사용
+# 오프라인 테스트: `python http_client.py fake marketaux --quota 30` 으로 가짜 서버를 띄우고
+#   MARKETAUX_BASE_URL=http://127.0.0.1:<포트> 로 실행하면 실제 API 대신 가짜 서버를 호출합니다.
+
+import os
+import json
+import time
+import random
+import threading
+from concurrent.futures import Future
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlencode
+from instrumentation import add_bytes, count_retry
+
+# 제공자별 기본 설정. rate_per_minute는 <PROVIDER>_RATE_PER_MINUTE 환경 변수로 바꿀 수 있습니다.
+PROVIDERS = {
+    "marketaux": {"base_url": "https://api.marketaux.com", "rate_per_minute": 60, "burst": 5},
+    # 무료 요금제 기준 분당 5회. 한도를 넘으면 200 응답 본문에 "Note"/"Information"을 담아 돌려줌
+    "alpha_vantage": {"base_url": "https://www.alphavantage.co", "rate_per_minute": 5, "burst": 1},
+    "yfinance": {"base_url": None, "rate_per_minute": 120, "burst": 4},
+    "gemini": {"base_url": None, "rate_per_minute": 60, "burst": 4},
+}
+
+MAX_ATTEMPTS = 4
+BACKOFF_BASE = 1.0   # 초
+BACKOFF_CAP = 60.0   # 초
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class TokenBucket:
+    """초당 rate개씩 채워지고 최대 capacity개까지 쌓이는 토큰 버킷. 여러 스레드가 함께 씁니다."""
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._blocked_until = 0.0
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def try_acquire(self):
+        """토큰이 있으면 하나 쓰고 0을, 없으면 다음 토큰까지 남은 시간(초)을 반환합니다."""
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            delay = self._blocked_until - now
+            if delay > 0:
+                return delay
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return 0.0
+            return (1 - self._tokens) / self.rate
+
+    def acquire(self):
+        """토큰 하나를 얻을 때까지 기다리고, 기다린 시간(초)을 반환합니다."""
+        waited = 0.0
+        while True:
+            delay = self.try_acquire()
+            if delay <= 0:
+                return waited
+            time.sleep(delay)
+            waited += delay
+
+    def block(self, seconds):
+        """서버가 Retry-After로 알려준 시간 동안 이 제공자의 모든 호출을 멈추고, 이후 속도를 절반으로 낮춥니다.
+
+        설정한 한도가 실제 한도보다 높았다는 뜻이므로, 기다리던 요청들이 한꺼번에 다시 몰리지 않도록
+        버스트도 1로 줄입니다. (실행 하나 동안만 유지)
+        """
+        with self._lock:
+            now = time.monotonic()
+            # 동시에 진행 중이던 요청들이 같은 제한에 걸린 경우 속도는 한 번만 낮춤
+            if self._blocked_until <= now:
+                self.rate = max(self.rate / 2, 1 / 60)
+                self.capacity = 1
+            self._blocked_until = max(self._blocked_until, now + seconds)
+            self._tokens = 0.0
+
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+
+def get_limiter(provider):
+    with _limiters_lock:
+        if provider not in _limiters:
+            config = PROVIDERS[provider]
+            per_minute = float(os.getenv(f"{provider.upper()}_RATE_PER_MINUTE", config["rate_per_minute"]))
+            _limiters[provider] = TokenBucket(per_minute / 60.0, config["burst"])
+        return _limiters[provider]
+
+
+def rate_limit(provider):
+    """provider의 호출량 제한을 지키도록 필요하면 기다립니다. (자체 HTTP 클라이언트를 쓰는 라이브러리용)"""
+    return get_limiter(provider).acquire()
+
+
+def backoff_delay(attempt, base=BACKOFF_BASE, cap=BACKOFF_CAP):
+    """attempt(1부터)번째 실패 뒤 기다릴 시간. 지수 증가 + 전체 지터(full jitter)."""
+    return random.uniform(0, min(cap, base * 2 ** (attempt - 1)))
+
+
+def parse_retry_after(value):
+    """Retry-After 헤더(초 또는 HTTP 날짜)를 초 단위로 변환합니다. 해석할 수 없으면 None."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class ThrottledError(Exception):
+    """재시도 횟수를 다 써도 제공자가 호출량 제한 응답을 보낸 경우."""
+
+
+def alpha_vantage_throttled(payload):
+    # Alpha Vantage는 한도 초과를 200 응답의 본문으로 알려줌
+    return isinstance(payload, dict) and ("Note" in payload or "Information" in payload)
+
+
+class HttpClient:
+    """제공자 하나의 keep-alive 세션. 호출량 제한, 재시도, 같은 요청의 중복 실행 방지를 담당합니다."""
+
+    def __init__(self, provider, base_url=None, pool_size=8, timeout=20, throttled=None):
+        import requests
+        from requests.adapters import HTTPAdapter
+        self.provider = provider
+        self.base_url = (base_url or os.getenv(f"{provider.upper()}_BASE_URL") or PROVIDERS[provider]["base_url"]).rstrip('/')
+        self.timeout = timeout
+        self.throttled = throttled
+        self.limiter = get_limiter(provider)
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self._inflight = {}
+        self._inflight_lock = threading.Lock()
+
+    def get_json(self, path, params=None):
+        """GET 요청의 JSON 응답을 반환합니다. 같은 요청이 이미 진행 중이면 그 결과를 함께 받습니다."""
+        key = path + "?" + urlencode(sorted((params or {}).items()))
+        with self._inflight_lock:
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = self._inflight[key] = Future()
+        if not leader:
+            return future.result()
+
+        try:
+            future.set_result(self._get_with_retry(path, params))
+        except BaseException as e:
+            future.set_exception(e)
+        finally:
+            with self._inflight_lock:
+                self._inflight.pop(key, None)
+        return future.result()
+
+    def _get_with_retry(self, path, params):
+        import requests
+        url = self.base_url + path
+        for attempt in range(1, MAX_ATTEMPTS + 1):
+            self.limiter.acquire()
+            retry_after = None
+            try:
+                response = self.session.get(url, params=params, timeout=self.timeout)
+                add_bytes(self.provider, len(response.content))
+                if response.status_code in RETRY_STATUSES:
+                    retry_after = parse_retry_after(response.headers.get("Retry-After"))
+                    error = requests.HTTPError(f"{response.status_code} 응답", response=response)
+                else:
+                    response.raise_for_status()
+                    payload = response.json()
+                    if self.throttled is None or not self.throttled(payload):
+                        return payload
+                    error = ThrottledError(f"{self.provider} 호출량 제한 응답")
+            except (requests.ConnectionError, requests.Timeout) as e:
+                error = e
+
+            if attempt == MAX_ATTEMPTS:
+                raise error
+            count_retry(self.provider)
+            if retry_after is not None:
+                # 서버가 알려준 시간 동안 다른 스레드의 호출도 함께 멈추고, 이후에는 버킷 속도에 맞춰 차례로 재시도
+                self.limiter.block(retry_after)
+                print(f"🔁 {self.provider} 요청 실패({error}), Retry-After {retry_after:.1f}초 후 재시도 ({attempt}/{MAX_ATTEMPTS - 1})")
+            else:
+                delay = backoff_delay(attempt)
+                print(f"🔁 {self.provider} 요청 실패({error}), {delay:.1f}초 후 재시도 ({attempt}/{MAX_ATTEMPTS - 1})")
+                time.sleep(delay)
+
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def get_client(provider):
+    """제공자별로 프로세스에서 공유하는 HttpClient를 반환합니다."""
+    with _clients_lock:
+        if provider not in _clients:
+            throttled = alpha_vantage_throttled if provider == "alpha_vantage" else None
+            _clients[provider] = HttpClient(provider, throttled=throttled)
+        return _clients[provider]
+
+
+# --- 오프라인 테스트용 가짜 제공자 서버 ---
+def _fake_payload(provider, query):
+    if provider == "marketaux":
+        limit = int(query.get("limit", ["3"])[0])
+        return {"data": [
+            {"uuid": f"fake-{i}", "title": f"Fake market headline {i}", "url": f"https://example.com/news/{i}",
+             "image_url": None, "description": f"Fake article {i} about markets, earnings and rates. " * 3,
+             "snippet": "", "published_at": "2025-01-01T00:00:00.000000Z"}
+            for i in range(limit)
+        ]}
+    if provider == "alpha_vantage":
+        series = {}
+        for i in range(100):
+            day = time.strftime("%Y-%m-%d", time.gmtime(time.time() - i * 86400))
+            value = f"{1400 + (i % 7):.4f}"
+            series[day] = {"1. open": value, "2. high": value, "3. low": value, "4. close": value}
+        return {"Meta Data": {}, "Time Series FX (Daily)": series}
+    return {}
+
+
+def start_fake_server(provider, quota_per_minute=60, latency=0.0, port=0):
+    """provider 형식의 응답을 돌려주는 로컬 서버를 백그라운드 스레드로 띄우고 (서버, base_url)을 반환합니다.
+
+    분당 quota_per_minute회를 넘으면 429와 Retry-After를 돌려주므로 호출량 제한 처리를 오프라인에서 확인할 수 있습니다.
+    """
+    from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+    from urllib.parse import urlparse, parse_qs
+    quota = TokenBucket(quota_per_minute / 60.0, max(1, quota_per_minute // 60))
+    stats = {"served": 0, "rejected": 0}
+    stats_lock = threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            retry_after = quota.try_acquire()
+            allowed = retry_after <= 0
+            with stats_lock:
+                stats["served" if allowed else "rejected"] += 1
+            if latency:
+                time.sleep(latency)
+            if allowed:
+                status, body = 200, json.dumps(_fake_payload(provider, parse_qs(urlparse(self.path).query))).encode()
+            else:
+                status, body = 429, b'{"error": "rate limited"}'
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            if not allowed:
+                self.send_header("Retry-After", f"{retry_after:.2f}")
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+    server.daemon_threads = True
+    server.stats = stats
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}"
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="외부 API 공용 HTTP 계층 도구")
+    sub = parser.add_subparsers(dest="command", required=True)
+    fake_parser = sub.add_parser("fake", help="가짜 제공자 서버 실행")
+    fake_parser.add_argument("provider", choices=["marketaux", "alpha_vantage"])
+    fake_parser.add_argument("--quota", type=int, default=60, help="분당 허용 요청 수")
+    fake_parser.add_argument("--latency", type=float, default=0.0, help="응답 지연(초)")
+    fake_parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    server, url = start_fake_server(args.provider, args.quota, args.latency, args.port)
+    print(f"🧪 가짜 {args.provider} 서버 실행 중: {url} (분당 {args.quota}회)")
+    print(f"   {args.provider.upper()}_BASE_URL={url} 로 설정하고 실행하세요. 종료: Ctrl+C")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
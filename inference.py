@@ -0,0 +1,235 @@
+# inference.py (market_predictor.pkl 온라인 추론 서비스)
+
+import os
+import time
+import queue
+import threading
+from collections import deque
+from concurrent.futures import Future
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+MODEL_PATH = os.path.join(BASE_DIR, 'market_predictor.pkl')
+# 감성 점수 하나만으로 학습된 이전 형식(모델 객체만 저장된 pkl)의 입력 컬럼
+LEGACY_FEATURES = ["market_sentiment_score"]
+# 지연 시간 통계에 보관할 최근 요청 수
+LATENCY_WINDOW = 10000
+
+
+class LatencyStats:
+    """최근 요청들의 처리 시간(ms)을 모아 p50/p99를 계산합니다."""
+
+    def __init__(self, window=LATENCY_WINDOW):
+        self._samples = deque(maxlen=window)
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def record(self, seconds):
+        with self._lock:
+            self._samples.append(seconds * 1000.0)
+            self._count += 1
+
+    def summary(self):
+        with self._lock:
+            samples = sorted(self._samples)
+            count = self._count
+        if not samples:
+            return {"count": count, "p50_ms": None, "p99_ms": None}
+        pick = lambda q: round(samples[min(len(samples) - 1, int(q * len(samples)))], 3)
+        return {"count": count, "p50_ms": pick(0.50), "p99_ms": pick(0.99)}
+
+
+class LoadedModel:
+    """한 번 읽어 둔 모델과 그 입력 컬럼/버전 정보."""
+
+    __slots__ = ("model", "features", "version", "stamp")
+
+    def __init__(self, model, features, version, stamp):
+        self.model = model
+        self.features = features
+        self.version = version
+        self.stamp = stamp
+
+
+class Predictor:
+    """모델 파일을 한 번만 읽어 두고, 파일이 교체되면(inode/mtime 변화) 다음 호출 때 새 모델로 바꿉니다."""
+
+    def __init__(self, path=MODEL_PATH, check_interval=1.0):
+        self.path = path
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._loaded = None
+        self._checked_at = 0.0
+        self.latency = LatencyStats()
+
+    def _file_stamp(self):
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return None
+        return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+    def _load(self, stamp):
+        import joblib
+        try:
+            # 큰 numpy 배열은 복사하지 않고 메모리 매핑 (압축된 파일 등은 일반 로딩으로 대체)
+            artifact = joblib.load(self.path, mmap_mode='r')
+        except (ValueError, OSError):
+            artifact = joblib.load(self.path)
+        if isinstance(artifact, dict):
+            return LoadedModel(artifact["model"], list(artifact["features"]), artifact.get("version"), stamp)
+        return LoadedModel(artifact, list(LEGACY_FEATURES), None, stamp)
+
+    def current(self):
+        """현재 모델을 반환합니다. 모델 파일이 없으면 None."""
+        now = time.monotonic()
+        if now - self._checked_at < self.check_interval:
+            return self._loaded
+
+        with self._lock:
+            if now - self._checked_at < self.check_interval:
+                return self._loaded
+            stamp = self._file_stamp()
+            if stamp is None:
+                self._loaded = None
+            elif self._loaded is None or stamp != self._loaded.stamp:
+                try:
+                    self._loaded = self._load(stamp)
+                    print(f"✅ 예측 모델 로드 완료 (버전: {self._loaded.version or 'legacy'})")
+                except Exception as e:
+                    # 쓰는 도중의 파일 등: 기존 모델을 유지하고 다음 확인 때 재시도
+                    print(f"⚠️ 예측 모델 로드 실패, 이전 모델을 유지합니다: {e}")
+            self._checked_at = now
+            return self._loaded
+
+    def predict_batch(self, rows):
+        """특성 딕셔너리 목록을 한 번에 예측합니다. 모델이 없으면 None.
+
+        반환: [{"trend": '상승'/'하락', "probability_up": float}, ...]
+        """
+        loaded = self.current()
+        if loaded is None:
+            return None
+        if not rows:
+            return []
+        import numpy as np
+        import pandas as pd
+
+        started = time.perf_counter()
+        X = pd.DataFrame([[row.get(column) for column in loaded.features] for row in rows],
+                         columns=loaded.features, dtype=float)
+        model = loaded.model
+        if not hasattr(model, "feature_names_in_"):
+            # 컬럼 이름 없이 학습된 이전 모델에는 배열로 전달
+            X = X.to_numpy()
+        if hasattr(model, "predict_proba"):
+            classes = list(model.classes_)
+            proba = model.predict_proba(X)
+            up = proba[:, classes.index('상승')] if '상승' in classes else np.zeros(len(rows))
+            trends = np.asarray(classes)[proba.argmax(axis=1)]
+        else:
+            trends = model.predict(X)
+            up = (trends == '상승').astype(float)
+        self.latency.record(time.perf_counter() - started)
+        return [{"trend": str(trend), "probability_up": round(float(p), 4)} for trend, p in zip(trends, up)]
+
+    def predict(self, features):
+        """특성 딕셔너리 하나를 예측합니다. 모델이 없으면 None."""
+        results = self.predict_batch([features])
+        return results[0] if results else None
+
+    def stats(self):
+        loaded = self.current()
+        return {
+            "model_version": loaded.version if loaded else None,
+            "model_loaded": loaded is not None,
+            "latency": self.latency.summary(),
+        }
+
+
+class MicroBatcher:
+    """동시에 들어온 예측 요청을 잠깐 모아 모델을 한 번만 호출합니다.
+
+    첫 요청이 들어온 뒤 max_wait초 동안 또는 max_batch행이 찰 때까지 모아서 처리합니다.
+    """
+
+    def __init__(self, predictor, max_batch=64, max_wait=0.002):
+        self.predictor = predictor
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.latency = LatencyStats()
+        self._queue = queue.Queue()
+        self._worker = None
+        self._lock = threading.Lock()
+
+    def _ensure_worker(self):
+        # gunicorn 등에서 fork된 뒤에도 동작하도록 첫 요청 때 작업 스레드를 시작
+        if self._worker is None or not self._worker.is_alive():
+            with self._lock:
+                if self._worker is None or not self._worker.is_alive():
+                    self._worker = threading.Thread(target=self._run, name="micro-batcher", daemon=True)
+                    self._worker.start()
+
+    def submit(self, rows):
+        """특성 딕셔너리 목록을 큐에 넣고 결과 Future를 반환합니다."""
+        self._ensure_worker()
+        future = Future()
+        self._queue.put((list(rows), future, time.perf_counter()))
+        return future
+
+    def predict_batch(self, rows, timeout=5.0):
+        return self.submit(rows).result(timeout=timeout)
+
+    def _collect(self):
+        items = [self._queue.get()]
+        size = len(items[0][0])
+        deadline = time.monotonic() + self.max_wait
+        while size < self.max_batch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            items.append(item)
+            size += len(item[0])
+        return items
+
+    def _run(self):
+        while True:
+            items = self._collect()
+            rows = [row for item_rows, _, _ in items for row in item_rows]
+            try:
+                results = self.predictor.predict_batch(rows)
+            except Exception:
+                # 잘못된 요청 하나가 같이 묶인 다른 요청까지 실패시키지 않도록 요청별로 다시 처리
+                for item_rows, future, submitted in items:
+                    try:
+                        future.set_result(self.predictor.predict_batch(item_rows))
+                    except Exception as e:
+                        future.set_exception(e)
+                    self.latency.record(time.perf_counter() - submitted)
+                continue
+            offset = 0
+            for item_rows, future, submitted in items:
+                future.set_result(None if results is None else results[offset:offset + len(item_rows)])
+                offset += len(item_rows)
+                self.latency.record(time.perf_counter() - submitted)
+
+    def stats(self):
+        stats = self.predictor.stats()
+        stats["request_latency"] = self.latency.summary()
+        return stats
+
+
+_predictor = None
+_predictor_lock = threading.Lock()
+
+
+def get_predictor(path=MODEL_PATH):
+    """프로세스에서 공유하는 Predictor를 반환합니다. (run_predictions.py 등 같은 프로세스 안에서 사용)"""
+    global _predictor
+    with _predictor_lock:
+        if _predictor is None or _predictor.path != path:
+            _predictor = Predictor(path)
+        return _predictor
@@ -0,0 +1,128 @@
+# instrumentation.py (실행 단계별 시간/재시도/수신 바이트 측정)
+
+import os
+import json
+import time
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+
+METRICS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'metrics')
+# PROFILE=1 이면 실행 전체를 cProfile로 기록해 METRICS_DIR/<run_id>.prof로 저장
+# (snakeviz, python -m pstats 등으로 열 수 있음. 샘플링 프로파일이 필요하면
+#  `py-spy record --subprocesses -o profile.svg -- python run_predictions.py`로 외부에서 실행)
+PROFILE_ENV = "PROFILE"
+
+
+class RunMetrics:
+    """한 번의 실행 동안 단계별 소요 시간, 재시도 횟수, 수신 바이트를 모읍니다. (스레드 안전)"""
+
+    def __init__(self):
+        self.run_id = datetime.now().strftime("%Y%m%d_%H%M%S")
+        self.started_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        self._started = time.perf_counter()
+        self._lock = threading.Lock()
+        self.spans = []
+        self.retries = {}
+        self.bytes_fetched = {}
+
+    def record(self, name, seconds, **attrs):
+        """이미 측정된 시간을 기록합니다. (다른 프로세스에서 잰 학습 시간 등)"""
+        span = {"stage": name, "seconds": round(seconds, 4), **attrs}
+        with self._lock:
+            self.spans.append(span)
+
+    def add_bytes(self, name, size):
+        with self._lock:
+            self.bytes_fetched[name] = self.bytes_fetched.get(name, 0) + int(size)
+
+    def count_retry(self, name):
+        with self._lock:
+            self.retries[name] = self.retries.get(name, 0) + 1
+
+    def summary(self):
+        """단계 이름별 호출 수, 합계/최대 시간, 실패 수를 집계합니다."""
+        stages = {}
+        with self._lock:
+            spans = list(self.spans)
+        for span in spans:
+            s = stages.setdefault(span["stage"], {"count": 0, "total_seconds": 0.0, "max_seconds": 0.0, "errors": 0})
+            s["count"] += 1
+            s["total_seconds"] = round(s["total_seconds"] + span["seconds"], 4)
+            s["max_seconds"] = max(s["max_seconds"], span["seconds"])
+            if span.get("ok") is False:
+                s["errors"] += 1
+        return stages
+
+    def to_dict(self):
+        with self._lock:
+            retries, bytes_fetched, spans = dict(self.retries), dict(self.bytes_fetched), list(self.spans)
+        return {
+            "run_id": self.run_id,
+            "started_at": self.started_at,
+            "wall_seconds": round(time.perf_counter() - self._started, 3),
+            "stages": self.summary(),
+            "retries": retries,
+            "bytes_fetched": bytes_fetched,
+            "total_bytes_fetched": sum(bytes_fetched.values()),
+            "spans": spans,
+        }
+
+    def write(self, directory=METRICS_DIR):
+        """실행별 측정 결과를 METRICS_DIR/<run_id>.json으로 저장하고 경로를 반환합니다."""
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"{self.run_id}.json")
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False, indent=2)
+        return path
+
+
+# 프로세스 전체에서 공유하는 측정값
+metrics = RunMetrics()
+
+
+@contextmanager
+def stage(name, **attrs):
+    """with 블록의 실행 시간을 name 단계로 기록합니다. 예외가 나면 ok=False로 남기고 다시 던집니다.
+
+    블록 안에서 반환된 딕셔너리에 값을 넣으면 함께 기록됩니다. 예: span["rows"] = 10
+    """
+    span = dict(attrs)
+    started = time.perf_counter()
+    try:
+        yield span
+    except BaseException:
+        span["ok"] = False
+        raise
+    finally:
+        span.setdefault("ok", True)
+        metrics.record(name, time.perf_counter() - started, **span)
+
+
+def add_bytes(name, size):
+    metrics.add_bytes(name, size)
+
+
+def count_retry(name):
+    metrics.count_retry(name)
+
+
+def start_profiler():
+    """PROFILE 환경 변수가 설정되어 있으면 cProfile을 시작해 반환합니다. 아니면 None."""
+    if not os.getenv(PROFILE_ENV):
+        return None
+    import cProfile
+    profiler = cProfile.Profile()
+    profiler.enable()
+    return profiler
+
+
+def stop_profiler(profiler, directory=METRICS_DIR):
+    """start_profiler로 시작한 프로파일을 멈추고 .prof 파일로 저장합니다."""
+    if profiler is None:
+        return None
+    profiler.disable()
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"{metrics.run_id}.prof")
+    profiler.dump_stats(path)
+    return path
@@ -0,0 +1,120 @@
+# market_data.py (시장 데이터 수집 및 예측 단계)
+
+import os
+import time
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
+from forecasting import forecast_instrument
+from instrumentation import stage, metrics
+
+# 대시보드에 표시할 종목 목록. 종목을 추가하려면 여기에 한 줄만 추가하면 됩니다.
+# key: daily_data.json에 저장될 이름, source: price_store의 데이터 소스,
+# window: 예측에 사용할 최근 데이터 수, horizon: 예측 일수
+INSTRUMENTS = [
+    {"key": "nasdaq_data", "name": "나스닥 종합지수", "symbol": "^IXIC", "source": "yfinance", "window": 30, "horizon": 3},
+    {"key": "kospi_data", "name": "코스피 지수", "symbol": "^KS11", "source": "yfinance", "window": 30, "horizon": 3},
+    {"key": "fx_data", "name": "USD/KRW 환율", "symbol": "USD/KRW", "source": "alpha_vantage", "window": 30, "horizon": 3},
+]
+
+# 네트워크 수집 동시 실행 수와 ARIMA 학습 프로세스 수
+MARKET_FETCH_WORKERS = int(os.getenv("MARKET_FETCH_WORKERS", "8"))
+MARKET_FIT_WORKERS = int(os.getenv("MARKET_FIT_WORKERS", str(os.cpu_count() or 1)))
+
+
+_price_store = None
+
+
+def get_price_store():
+    """프로세스에서 공유하는 가격 저장소를 반환합니다."""
+    global _price_store
+    if _price_store is None:
+        # pandas를 불러오는 모듈이므로 처음 수집할 때 import
+        from price_store import PriceStore
+        _price_store = PriceStore()
+    return _price_store
+
+
+def fetch_instrument(instrument):
+    """종목 하나의 과거 데이터를 수집합니다. 실패하면 None을 반환합니다."""
+    store = get_price_store()
+    try:
+        # 마지막 저장일 이후의 봉만 받아 저장소를 갱신한 뒤, 필요한 구간을 저장소에서 읽음
+        with stage("market.fetch", symbol=instrument["symbol"], source=instrument["source"]) as span:
+            new_rows = store.sync(instrument["symbol"], instrument["source"])
+            series = store.window(instrument["symbol"], instrument["window"])
+            span["rows"] = new_rows
+    except Exception as e:
+        print(f"❌ {instrument['name']} 데이터 수집 실패: {e}")
+        return None
+    if series is None or len(series) == 0:
+        print(f"⚠️  {instrument['name']} 데이터 없음")
+        return None
+    print(f"➡️  {instrument['name']} 신규 {new_rows}행 수집, 최근 {len(series)}일 사용")
+    return series
+
+
+def run_market_stage(instruments=INSTRUMENTS, fetch_workers=MARKET_FETCH_WORKERS, fit_workers=MARKET_FIT_WORKERS):
+    """모든 종목을 동시에 수집하고, 수집이 끝난 종목부터 프로세스 풀에서 예측합니다.
+
+    반환값은 {key: 차트 데이터 또는 None} 딕셔너리입니다.
+    """
+    started = time.monotonic()
+    results = {inst["key"]: None for inst in instruments}
+    if not instruments:
+        return results
+
+    # gRPC 등 다른 스레드가 돌고 있는 상태에서 fork하지 않도록 spawn 방식 사용
+    mp_context = multiprocessing.get_context("spawn")
+    with ThreadPoolExecutor(max_workers=max(1, min(fetch_workers, len(instruments)))) as io_pool, \
+         ProcessPoolExecutor(max_workers=max(1, min(fit_workers, len(instruments))), mp_context=mp_context) as cpu_pool:
+        fetch_futures = {io_pool.submit(fetch_instrument, inst): inst for inst in instruments}
+        fit_futures = {}
+        for future in as_completed(fetch_futures):
+            inst = fetch_futures[future]
+            series = future.result()
+            if series is not None:
+                fit_futures[cpu_pool.submit(forecast_instrument, series, inst["symbol"], inst["horizon"])] = inst
+
+        saved_seconds = _collect_forecasts(fit_futures, results)
+
+    metrics.record("market", time.monotonic() - started, saved_fit_seconds=round(saved_seconds, 3), ok=True)
+    print(f"✅ 시장 데이터 단계 완료 ({time.monotonic() - started:.1f}초, 재학습 생략으로 절약한 학습 시간 {saved_seconds:.2f}초)")
+    return results
+
+
+def _collect_forecasts(fit_futures, results):
+    """끝난 예측부터 results에 채우고, 재학습을 생략해 절약한 학습 시간(초)을 반환합니다."""
+    saved_seconds = 0.0
+    for future in as_completed(fit_futures):
+        inst = fit_futures[future]
+        try:
+            results[inst["key"]], info = future.result()
+            saved_seconds += info["saved_seconds"]
+            # 학습은 다른 프로세스에서 실행되므로 그쪽에서 잰 시간을 기록
+            metrics.record("market.fit", info["fit_seconds"], symbol=inst["symbol"], mode=info["mode"], ok=True)
+            print(f"✅ {inst['name']} 예측 완료 (학습 방식: {info['mode']}, {info['fit_seconds']:.2f}초)")
+        except Exception as e:
+            metrics.record("market.fit", 0.0, symbol=inst["symbol"], ok=False)
+            print(f"❌ {inst['name']} 예측 실패: {e}")
+    return saved_seconds
+
+
+# --- 수집과 예측을 따로 실행 (pipeline.py에서 단계별로 사용) ---
+def fetch_instruments(instruments=INSTRUMENTS, fetch_workers=MARKET_FETCH_WORKERS):
+    """모든 종목을 동시에 수집해 {key: 가격 시리즈 또는 None}을 반환합니다."""
+    with ThreadPoolExecutor(max_workers=max(1, min(fetch_workers, len(instruments) or 1))) as io_pool:
+        return dict(zip([inst["key"] for inst in instruments], io_pool.map(fetch_instrument, instruments)))
+
+
+def forecast_instruments(series_by_key, instruments=INSTRUMENTS, fit_workers=MARKET_FIT_WORKERS):
+    """수집해 둔 가격 시리즈로 종목별 예측을 프로세스 풀에서 실행해 {key: 차트 데이터 또는 None}을 반환합니다."""
+    results = {inst["key"]: None for inst in instruments}
+    targets = [inst for inst in instruments if series_by_key.get(inst["key"]) is not None]
+    if not targets:
+        return results
+    mp_context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=max(1, min(fit_workers, len(targets))), mp_context=mp_context) as cpu_pool:
+        fit_futures = {cpu_pool.submit(forecast_instrument, series_by_key[inst["key"]], inst["symbol"], inst["horizon"]): inst
+                       for inst in targets}
+        _collect_forecasts(fit_futures, results)
+    return results
@@ -0,0 +1,422 @@
+# pipeline.py (의존 관계 기반 파이프라인 실행기)
+#
+# run_predictions.py / collector.py / trainer.py가 하던 일을 단계(stage)로 나누고,
+# 각 단계가 어떤 단계의 결과를 입력으로 쓰는지 선언해 하나의 DAG로 실행합니다.
+#
+#   news ──> analysis ──┐
+#   prices ─> forecasts ─┴─> snapshot
+#          └> actuals ──> training (주 1회)
+#
+# 학습이 실패해도 대시보드 게시(snapshot)는 막지 않습니다. snapshot은 그 시점의 서비스 모델로 예측하고,
+# 서비스 모델 파일이 바뀌면 다음 실행에서 다시 게시합니다.
+#
+# - 입력이 없는 단계(news, prices)는 외부 데이터를 가져오므로 실행할 때마다 돌립니다.
+#   외부 API가 실패하면 빈 결과와 "error"를 반환하고(상태 degraded), 하위 단계는 빈 결과로 계속 실행되어
+#   예전 run_predictions.py처럼 뉴스나 차트가 비어 있는 대시보드라도 게시합니다.
+# - 나머지 단계는 입력 단계 결과의 내용 해시가 지난번 성공 때와 같고, 선언한 출력 파일도 그대로면 건너뜁니다.
+# - 학습 단계는 예전 collect_and_train.yml처럼 주 1회(일요일 시작 주 단위)만 실행합니다. 실제 결과는 거래일마다
+#   늘어나지만, 이번 주에 이미 학습했으면 입력이 바뀌어도 건너뜁니다.
+# - 서로 의존하지 않는 단계는 동시에 실행합니다.
+# - 단계 결과와 실행 상태는 data/pipeline/에 저장되므로, 실패한 실행을 같은 날 PIPELINE_RESUME_HOURS 안에
+#   다시 돌리면 그 실행에서 이미 끝난 외부 수집 단계는 저장된 결과를 쓰고 실패한 단계부터 이어서 실행합니다.
+#   그보다 오래된 실패(예: 다음 정기 실행)는 이어서 하지 않고 새로 수집합니다.
+#
+#   python pipeline.py               # 실행 (직전 실행이 최근에 실패했으면 이어서)
+#   python pipeline.py --fresh       # 직전 실행 상태를 무시하고 새로 실행
+#   python pipeline.py --force training snapshot   # 지정한 단계는 입력이 같아도 다시 실행
+#   python pipeline.py --status      # 단계별 마지막 상태 출력
+
+import os
+import sys
+import json
+import time
+import hashlib
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from datetime import date, datetime, timedelta
+from dotenv import load_dotenv
+from instrumentation import stage, metrics, start_profiler, stop_profiler
+
+load_dotenv()
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+PIPELINE_DIR = os.path.join(BASE_DIR, 'data', 'pipeline')
+STATE_PATH = os.path.join(PIPELINE_DIR, 'state.json')
+OUTPUT_DIR = os.path.join(PIPELINE_DIR, 'outputs')
+# 서비스 모델 파일 (trainer.MODEL_PATH, BASE_DIR 기준 경로)
+MODEL_FILE = 'market_predictor.pkl'
+# 동시에 실행할 수 있는 단계 수
+PIPELINE_WORKERS = int(os.getenv("PIPELINE_WORKERS", "4"))
+# 실패한 실행을 이어서 할 수 있는 최대 경과 시간 (정기 실행 간격 12시간보다 짧게 두어 다음 정기 실행은 항상 새로 수집)
+PIPELINE_RESUME_HOURS = float(os.getenv("PIPELINE_RESUME_HOURS", "6"))
+
+
+# --- 해시/저장 도우미 ---
+def content_hash(value):
+    """JSON으로 직렬화할 수 있는 값의 내용 해시."""
+    raw = json.dumps(value, ensure_ascii=False, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest()[:16]
+
+
+def file_hash(path):
+    """파일 내용 해시. 파일이 없으면 None."""
+    digest = hashlib.sha1()
+    try:
+        with open(os.path.join(BASE_DIR, path), 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                digest.update(chunk)
+    except OSError:
+        return None
+    return digest.hexdigest()[:16]
+
+
+def _write_json(path, value):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(value, f, ensure_ascii=False, separators=(',', ':'), default=str)
+    os.replace(tmp_path, path)
+
+
+def _read_json(path):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+
+def load_output(name):
+    return _read_json(os.path.join(OUTPUT_DIR, f"{name}.json"))
+
+
+def save_output(name, value):
+    _write_json(os.path.join(OUTPUT_DIR, f"{name}.json"), value)
+
+
+def series_to_json(series):
+    """가격 시리즈를 단계 결과로 저장할 수 있는 형태로 바꿉니다."""
+    if series is None:
+        return None
+    return {"dates": [d.strftime('%Y-%m-%d') for d in series.index], "values": [float(v) for v in series.values]}
+
+
+def series_from_json(value, name=None):
+    import pandas as pd
+    if value is None:
+        return None
+    return pd.Series(value["values"], index=pd.DatetimeIndex(value["dates"]), name=name, dtype=float)
+
+
+# --- 단계 구현 ---
+# 각 함수는 {입력 단계 이름: 그 단계의 결과}를 받아 JSON으로 저장할 수 있는 결과를 반환합니다.
+def news_stage(inputs):
+    """Marketaux에서 최신 뉴스를 수집합니다."""
+    from run_predictions import get_marketaux_news
+    try:
+        articles = get_marketaux_news(os.getenv("MARKETAUX_API_KEY"))
+    except Exception as e:
+        print("⚠️  최종적으로 Marketaux 뉴스 수집에 실패했습니다.")
+        return {"articles": [], "error": str(e)}
+    print(f"➡️  총 {len(articles)}개의 최신 뉴스를 수집했습니다.")
+    return {"articles": articles}
+
+
+def analysis_stage(inputs):
+    """기사별 AI 분석과 트렌드 요약."""
+    from run_predictions import run_news_analysis
+    from analysis_cache import AnalysisCache
+    cache = AnalysisCache()
+    try:
+        return run_news_analysis(inputs["news"]["articles"], cache)
+    finally:
+        cache_stats = cache.stats()
+        print(f"🗂️  분석 캐시: 적중 {cache_stats['hits']}회 / 미적중 {cache_stats['misses']}회 (적중률 {cache_stats['hit_rate']:.0%})")
+        cache.close()
+
+
+def prices_stage(inputs):
+    """대시보드 종목과 실제 결과용 지수의 가격을 가격 저장소에 동기화하고 최근 구간을 반환합니다."""
+    from market_data import INSTRUMENTS, fetch_instruments
+    from collector import ACTUALS_SYMBOL
+    actuals_inst = {"key": "actuals", "name": "S&P 500", "symbol": ACTUALS_SYMBOL, "source": "yfinance", "window": 10}
+    fetched = fetch_instruments(INSTRUMENTS + [actuals_inst])
+    prices = {key: series_to_json(series) for key, series in fetched.items()}
+    if all(series is None for series in fetched.values()):
+        # 차트 없이도 스냅샷은 게시되도록 빈 결과로 넘김
+        print("⚠️  모든 종목의 가격 수집에 실패했습니다.")
+        prices["error"] = "모든 종목의 가격 수집에 실패했습니다."
+    return prices
+
+
+def forecasts_stage(inputs):
+    """수집된 가격으로 종목별 ARIMA 예측과 예측 구간을 만듭니다."""
+    from market_data import INSTRUMENTS, forecast_instruments
+    series_by_key = {inst["key"]: series_from_json(inputs["prices"].get(inst["key"]), inst["symbol"]) for inst in INSTRUMENTS}
+    return forecast_instruments(series_by_key)
+
+
+def actuals_stage(inputs):
+    """어제의 실제 시장 등락을 기록하고, 학습에 쓰일 실제 결과 테이블의 요약을 반환합니다."""
+    from collector import market_trend_on, save_actual_trend
+    from db import get_pool
+    yesterday = date.today() - timedelta(days=1)
+    series = series_from_json(inputs["prices"].get("actuals"))
+    try:
+        trend = market_trend_on(series, yesterday) if series is not None else None
+    except (KeyError, IndexError):
+        trend = None  # 휴장일 등 어제 거래가 없음
+    if trend:
+        save_actual_trend(yesterday, trend)
+    else:
+        print(f"⏭️  {yesterday}의 거래 데이터가 없어 실제 결과를 기록하지 않습니다.")
+    with get_pool().connection() as conn:
+        rows, latest = conn.execute("SELECT COUNT(*), MAX(actual_date) FROM actuals").fetchone()
+    # 이 요약이 바뀔 때(새 실제 결과가 생겼을 때)만 학습 단계가 다시 실행됨
+    return {"rows": rows, "latest": latest}
+
+
+def training_stage(inputs):
+    """주 1회 모델을 재학습하고, 서비스 중인 모델 버전을 반환합니다."""
+    import trainer
+    trainer.train_and_save_model()
+    with trainer.get_pool().connection() as conn:
+        row = conn.execute("SELECT version FROM model_versions WHERE promoted = 1 ORDER BY version DESC LIMIT 1").fetchone()
+    return {"model_version": row[0] if row else None, "model_file": file_hash(os.path.relpath(trainer.MODEL_PATH, BASE_DIR))}
+
+
+def snapshot_stage(inputs):
+    """오늘의 예측을 저장하고 대시보드 스냅샷을 씁니다. 예측에는 그 시점의 서비스 모델을 사용합니다."""
+    from run_predictions import publish_results
+    from inference import get_predictor
+    final_data = publish_results(inputs["analysis"], inputs["forecasts"])
+    loaded = get_predictor().current()
+    return {"last_updated": final_data["last_updated"], "view": file_hash('data/daily_data.json'),
+            "model_version": loaded.version if loaded else None}
+
+
+def today_key():
+    return date.today().isoformat()
+
+
+def train_week_key():
+    # 이번 주를 시작한 일요일 (예전 주간 학습 크론이 일요일에 돌던 것과 맞춤)
+    today = date.today()
+    return (today - timedelta(days=(today.weekday() + 1) % 7)).isoformat()
+
+
+def snapshot_key():
+    # 날짜가 바뀌거나 서비스 모델이 새로 승격되면 다시 게시
+    return {"day": today_key(), "model": file_hash(MODEL_FILE)}
+
+
+# name: 단계 이름, inputs: 결과를 입력으로 쓰는 단계들, outputs: 이 단계만 쓰는 파일 (바뀌었거나 없으면 다시 실행),
+# key: 입력 해시에 함께 넣을 값 (결과가 실행 날짜에 따라 달라지는 단계용),
+# cadence: 값이 지난번 성공 때와 같으면 입력이 바뀌었어도 건너뜀 (정해진 주기로만 실행할 단계용)
+STAGES = [
+    {"name": "news", "inputs": [], "outputs": [], "run": news_stage},
+    {"name": "analysis", "inputs": ["news"], "outputs": [], "run": analysis_stage},
+    {"name": "prices", "inputs": [], "outputs": [], "run": prices_stage},
+    {"name": "forecasts", "inputs": ["prices"], "outputs": [], "run": forecasts_stage},
+    # 어제 날짜의 결과를 기록하므로 날짜가 바뀌면 다시 실행
+    {"name": "actuals", "inputs": ["prices"], "outputs": [], "run": actuals_stage, "key": today_key},
+    {"name": "training", "inputs": ["actuals"], "outputs": [MODEL_FILE], "run": training_stage,
+     "cadence": train_week_key},
+    # 오늘 날짜의 예측을 DB에 쓰므로 날짜나 서비스 모델이 바뀌면 다시 실행. 학습 실패와는 무관하게 게시
+    {"name": "snapshot", "inputs": ["analysis", "forecasts"], "outputs": ["data/daily_data.json"],
+     "run": snapshot_stage, "key": snapshot_key},
+]
+
+
+# --- 실행기 ---
+def resumable(previous):
+    """실패한 이전 실행을 이어서 해도 되는지: 오늘 시작했고 PIPELINE_RESUME_HOURS가 지나지 않았을 때만."""
+    try:
+        started = datetime.strptime(previous["started_at"], "%Y-%m-%d %H:%M:%S")
+    except (KeyError, TypeError, ValueError):
+        return False
+    now = datetime.now()
+    return started.date() == now.date() and now - started <= timedelta(hours=PIPELINE_RESUME_HOURS)
+
+
+class PipelineRun:
+    """DAG 한 번의 실행. 단계 상태는 끝날 때마다 state.json에 기록됩니다."""
+
+    def __init__(self, stages=STAGES, fresh=False, force=(), workers=PIPELINE_WORKERS):
+        self.stages = {s["name"]: s for s in stages}
+        self.force = set(force)
+        self.workers = workers
+        self._lock = threading.Lock()
+        previous = _read_json(STATE_PATH) or {}
+        self.resuming = not fresh and previous.get("status") in ("running", "failed") and resumable(previous)
+        now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        self.state = {
+            "run_id": previous["run_id"] if self.resuming else datetime.now().strftime("%Y%m%d_%H%M%S"),
+            "status": "running",
+            # 이어서 실행해도 처음 시작 시각을 유지해야 재시도를 거듭하며 오래된 결과를 계속 쓰지 않음
+            "started_at": previous["started_at"] if self.resuming else now,
+            "stages": previous.get("stages", {}),
+        }
+        self.outputs = {}
+
+    def _save_state(self):
+        with self._lock:
+            _write_json(STATE_PATH, self.state)
+
+    def input_hash(self, spec):
+        key = spec["key"]() if spec.get("key") else None
+        return content_hash({"stage": spec["name"], "key": key,
+                             "inputs": {name: content_hash(self.outputs[name]) for name in spec["inputs"]}})
+
+    def reusable(self, spec, input_hash):
+        """저장된 결과를 그대로 써도 되면 그 이유를, 다시 실행해야 하면 False를 반환합니다."""
+        last = self.state["stages"].get(spec["name"])
+        if spec["name"] in self.force or not last or last.get("status") not in ("ok", "skipped"):
+            return False
+        if any(file_hash(path) != last.get("files", {}).get(path) for path in spec["outputs"]):
+            return False
+        if not spec["inputs"]:
+            # 외부 데이터를 가져오는 단계는 새 실행마다 다시 실행하고,
+            # 최근에 실패한 실행을 이어서 할 때만 그 실행에서 받아 둔 결과를 다시 씀
+            if self.resuming and last.get("run_id") == self.state["run_id"]:
+                return "이어서 실행: 이전 결과를 사용합니다"
+            return False
+        if spec.get("cadence") and last.get("cadence") == spec["cadence"]():
+            return "이번 주기에 이미 실행했습니다"
+        # 나머지 단계는 이어서 실행할 때도 입력 해시(날짜 키 포함)가 같아야 건너뜀
+        if last.get("input_hash") == input_hash:
+            return "입력이 바뀌지 않아 건너뜁니다"
+        return False
+
+    def run_stage(self, name):
+        spec = self.stages[name]
+        input_hash = self.input_hash(spec)
+        reason = self.reusable(spec, input_hash)
+        if reason:
+            output = load_output(name)
+            if output is not None:
+                self.outputs[name] = output
+                with self._lock:
+                    self.state["stages"][name].update({"status": "skipped", "run_id": self.state["run_id"]})
+                self._save_state()
+                print(f"⏭️  [{name}] {reason}.")
+                return "skipped"
+
+        print(f"➡️  [{name}] 실행 중...")
+        started = time.monotonic()
+        try:
+            with stage(f"pipeline.{name}"):
+                output = spec["run"]({dep: self.outputs[dep] for dep in spec["inputs"]})
+            # 결과를 JSON으로 한 번 왕복시켜, 다음 실행에서 저장된 결과를 쓸 때와 같은 값을 하위 단계에 넘김
+            output = json.loads(json.dumps(output, ensure_ascii=False, default=str))
+        except Exception as e:
+            with self._lock:
+                self.state["stages"][name] = {"status": "failed", "run_id": self.state["run_id"], "error": str(e),
+                                              "seconds": round(time.monotonic() - started, 3)}
+            self._save_state()
+            print(f"❌ [{name}] 실패: {e}")
+            return "failed"
+
+        save_output(name, output)
+        # 외부 수집이 실패해 빈 결과를 낸 단계는 degraded: 하위 단계는 계속 실행하되, 이어서 실행할 때 재사용하지 않음
+        error = output.get("error") if isinstance(output, dict) else None
+        status = "degraded" if error else "ok"
+        with self._lock:
+            self.outputs[name] = output
+            self.state["stages"][name] = {
+                "status": status,
+                "run_id": self.state["run_id"],
+                "input_hash": input_hash,
+                "output_hash": content_hash(output),
+                "files": {path: file_hash(path) for path in spec["outputs"]},
+                "seconds": round(time.monotonic() - started, 3),
+                "finished_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            }
+            if spec.get("cadence"):
+                self.state["stages"][name]["cadence"] = spec["cadence"]()
+            if error:
+                self.state["stages"][name]["error"] = error
+        self._save_state()
+        if error:
+            print(f"⚠️  [{name}] 빈 결과로 완료 ({time.monotonic() - started:.1f}초): {error}")
+        else:
+            print(f"✅ [{name}] 완료 ({time.monotonic() - started:.1f}초)")
+        return status
+
+    def run(self):
+        """입력 단계가 모두 끝난 단계부터 동시에 실행합니다. 실패하거나 막힌 단계가 없으면 True."""
+        if self.resuming:
+            print(f"🔁 실패한 실행 {self.state['run_id']}을 이어서 실행합니다.")
+        self._save_state()
+        results = {}
+        pending = dict(self.stages)
+        running = {}
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            while pending or running:
+                for name, spec in list(pending.items()):
+                    deps = [results.get(dep) for dep in spec["inputs"]]
+                    if any(r == "failed" or r == "blocked" for r in deps):
+                        # 입력 단계가 실패하면 이 단계도 실행하지 않음 (다음 실행에서 이어서)
+                        results[name] = "blocked"
+                        del pending[name]
+                        print(f"⏸️  [{name}] 입력 단계 실패로 실행하지 않습니다.")
+                    elif all(r in ("ok", "skipped", "degraded") for r in deps):
+                        running[executor.submit(self.run_stage, name)] = name
+                        del pending[name]
+                if not running:
+                    continue
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    results[running.pop(future)] = future.result()
+
+        ok = all(r in ("ok", "skipped", "degraded") for r in results.values())
+        degraded = any(r == "degraded" for r in results.values())
+        self.state["status"] = "failed" if not ok else "degraded" if degraded else "ok"
+        self.state["finished_at"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        self._save_state()
+        return ok, results
+
+
+def print_status():
+    state = _read_json(STATE_PATH)
+    if not state:
+        print("⚠️  아직 실행 기록이 없습니다.")
+        return
+    print(f"실행 {state['run_id']}: {state['status']}")
+    for spec in STAGES:
+        s = state["stages"].get(spec["name"], {})
+        print(f"  - {spec['name']:<10} {s.get('status', '-'):<8} {s.get('run_id', ''):<16} "
+              f"{s.get('seconds', '')}초  {s.get('error', '')}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="의존 관계 기반 파이프라인 실행")
+    parser.add_argument("--fresh", action="store_true", help="직전 실행이 실패했어도 이어서 하지 않고 새로 실행")
+    parser.add_argument("--force", nargs="+", default=[], choices=[s["name"] for s in STAGES],
+                        help="입력이 같아도 다시 실행할 단계")
+    parser.add_argument("--status", action="store_true", help="단계별 마지막 상태만 출력")
+    args = parser.parse_args()
+
+    if args.status:
+        print_status()
+        sys.exit(0)
+
+    os.makedirs(PIPELINE_DIR, exist_ok=True)
+    # PROFILE=1 이면 실행 전체를 cProfile로 기록
+    profiler = start_profiler()
+    started = time.monotonic()
+    pipeline = PipelineRun(fresh=args.fresh, force=args.force)
+    ok, results = pipeline.run()
+
+    metrics_path = metrics.write()
+    print(f"⏱️  단계별 측정 결과 저장: {metrics_path}")
+    profile_path = stop_profiler(profiler)
+    if profile_path:
+        print(f"🔬 cProfile 결과 저장: {profile_path}")
+
+    print("\n" + "=" * 60)
+    summary = ", ".join(f"{name}: {result}" for name, result in results.items())
+    print(f"{'🚀 파이프라인 완료' if ok else '❌ 파이프라인 실패'} ({time.monotonic() - started:.1f}초) - {summary}")
+    print("=" * 60)
+    sys.exit(0 if ok else 1)
@@ -0,0 +1,136 @@
+# price_store.py (로컬 가격 저장소)
+
+import os
+from datetime import date, timedelta
+import pandas as pd
+from db import get_pool
+from http_client import get_client, rate_limit
+
+DEFAULT_PRICE_DB = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'prices.db')
+# 처음 수집하는 종목은 이만큼의 과거 데이터를 한 번에 받아 둡니다.
+INITIAL_HISTORY_DAYS = 365
+
+PRICE_COLUMNS = ["Open", "High", "Low", "Close", "Volume"]
+
+
+# --- 데이터 소스별 수집 함수: fetcher(symbol, start, end) -> OHLC DataFrame ---
+def fetch_yfinance_bars(symbol, start, end):
+    """yfinance에서 [start, end] 구간의 일봉을 가져옵니다."""
+    import yfinance as yf
+    # yfinance는 자체 세션을 쓰므로 호출량 제한만 공용 계층을 따름
+    rate_limit("yfinance")
+    hist = yf.Ticker(symbol).history(start=start, end=end + timedelta(days=1), auto_adjust=False, actions=False)
+    return hist.reindex(columns=PRICE_COLUMNS)
+
+
+def fetch_alpha_vantage_bars(symbol, start, end):
+    """Alpha Vantage에서 'USD/KRW' 형식 통화쌍의 [start, end] 구간 일봉을 가져옵니다."""
+    av_key = os.getenv("ALPHA_VANTAGE_API_KEY")
+    if not av_key:
+        print("⚠️  Alpha Vantage API 키가 설정되지 않았습니다.")
+        return None
+    from_symbol, to_symbol = symbol.split('/')
+    # compact는 최근 100일치만 주므로, 그보다 오래된 구간이 필요할 때만 full로 요청
+    outputsize = 'full' if (end - start).days > 100 else 'compact'
+    payload = get_client("alpha_vantage").get_json("/query", {
+        "function": "FX_DAILY", "from_symbol": from_symbol, "to_symbol": to_symbol,
+        "outputsize": outputsize, "apikey": av_key,
+    })
+    series = payload.get("Time Series FX (Daily)")
+    if not series:
+        raise ValueError(f"Alpha Vantage 응답에 시계열이 없습니다: {str(payload)[:200]}")
+    raw = pd.DataFrame.from_dict(series, orient='index')
+    raw.index = pd.to_datetime(raw.index)
+    bars = raw.rename(columns={"1. open": "Open", "2. high": "High", "3. low": "Low", "4. close": "Close"})
+    bars = bars.reindex(columns=PRICE_COLUMNS).astype(float).sort_index()
+    return bars.loc[pd.Timestamp(start):pd.Timestamp(end)]
+
+
+DEFAULT_FETCHERS = {
+    "yfinance": fetch_yfinance_bars,
+    "alpha_vantage": fetch_alpha_vantage_bars,
+}
+
+
+def csv_fetcher(directory):
+    """로컬 CSV 파일을 데이터 소스로 쓰는 fetcher를 만듭니다. (테스트/벤치마크용)
+
+    파일 이름은 심볼에서 '^'와 '/'를 뺀 이름입니다. 예: '^IXIC' -> IXIC.csv, 'USD/KRW' -> USDKRW.csv
+    """
+    def fetch(symbol, start, end):
+        path = os.path.join(directory, symbol.replace('^', '').replace('/', '') + '.csv')
+        if not os.path.exists(path):
+            return None
+        bars = pd.read_csv(path, index_col=0, parse_dates=True).sort_index()
+        return bars.reindex(columns=PRICE_COLUMNS).loc[pd.Timestamp(start):pd.Timestamp(end)]
+    return fetch
+
+
+class PriceStore:
+    """종목별 전체 일봉 이력을 SQLite에 보관하고, 실행마다 마지막 저장일 이후의 데이터만 받아 갱신합니다."""
+
+    def __init__(self, path=DEFAULT_PRICE_DB, fetchers=None):
+        self.path = path
+        self.fetchers = fetchers or DEFAULT_FETCHERS
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self.pool = get_pool(path)
+        with self.pool.transaction() as conn:
+            conn.execute('''
+            CREATE TABLE IF NOT EXISTS prices (
+                symbol TEXT NOT NULL,
+                bar_date TEXT NOT NULL,
+                open REAL,
+                high REAL,
+                low REAL,
+                close REAL NOT NULL,
+                volume REAL,
+                PRIMARY KEY (symbol, bar_date)
+            ) WITHOUT ROWID
+            ''')
+
+    def last_date(self, symbol):
+        """저장된 마지막 거래일을 반환합니다. 없으면 None."""
+        with self.pool.connection() as conn:
+            row = conn.execute("SELECT MAX(bar_date) FROM prices WHERE symbol = ?", (symbol,)).fetchone()
+        return date.fromisoformat(row[0]) if row and row[0] else None
+
+    def upsert(self, symbol, bars):
+        """OHLC DataFrame을 저장합니다. 같은 날짜가 있으면 새 값으로 덮어씁니다."""
+        if bars is None or len(bars) == 0:
+            return 0
+        bars = bars.reindex(columns=PRICE_COLUMNS).dropna(subset=["Close"])
+        dates = pd.DatetimeIndex(bars.index).strftime('%Y-%m-%d')
+        values = bars.astype(float).values.tolist()  # 빈 값(NaN)은 SQLite에서 NULL로 저장됨
+        rows = [(symbol, d, *v) for d, v in zip(dates, values)]
+        with self.pool.transaction() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO prices (symbol, bar_date, open, high, low, close, volume) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                rows
+            )
+        return len(rows)
+
+    def sync(self, symbol, source="yfinance", today=None):
+        """마지막 저장일부터 오늘까지만 받아와 저장하고, 새로 저장한 행 수를 반환합니다."""
+        today = today or date.today()
+        last = self.last_date(symbol)
+        # 마지막 봉은 장중 값일 수 있으므로 그 날짜부터 다시 받아 덮어씀
+        start = last if last else today - timedelta(days=INITIAL_HISTORY_DAYS)
+        bars = self.fetchers[source](symbol, start, today)
+        return self.upsert(symbol, bars)
+
+    def window(self, symbol, size=None, end=None):
+        """end(포함) 이전의 최근 size개 종가를 날짜 인덱스 Series로 반환합니다."""
+        query = "SELECT bar_date, close FROM prices WHERE symbol = ?"
+        params = [symbol]
+        if end is not None:
+            query += " AND bar_date <= ?"
+            params.append(end.strftime('%Y-%m-%d'))
+        query += " ORDER BY bar_date DESC"
+        if size is not None:
+            query += " LIMIT ?"
+            params.append(int(size))
+        with self.pool.connection() as conn:
+            rows = conn.execute(query, params).fetchall()
+        rows.reverse()
+        index = pd.DatetimeIndex([r[0] for r in rows])
+        return pd.Series([r[1] for r in rows], index=index, name=symbol, dtype=float)
@@ -1,105 +1,187 @@
 # run_predictions.py (AI 예측 DB 저장 기능 추가 최종본)
 
 import os
-import json
-from datetime import date, timedelta, datetime
-import requests
-import pandas as pd
-import numpy as np
-from statsmodels.tsa.arima.model import ARIMA
-from alpha_vantage.foreignexchange import ForeignExchange
-from tenacity import retry, stop_after_attempt, wait_fixed
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from datetime import date, datetime
 from dotenv import load_dotenv
-from ai_analyzer import analyze_article_with_ai, generate_trend_summary_with_ai
-import yfinance as yf
-import sqlite3 # ▼▼▼ 1. sqlite3 임포트 ▼▼▼
+from ai_analyzer import analyze_article_with_ai, analyze_articles_batch, pack_batches, generate_trend_summary_with_ai
+from analysis_cache import AnalysisCache
+from market_data import run_market_stage
+from snapshot import write_snapshot
+from snapshot_store import save_snapshot
+from db import upsert_predictions
+from inference import get_predictor
+from instrumentation import stage, metrics, start_profiler, stop_profiler
+from http_client import get_client
 
 load_dotenv()
 
-def process_chart_data(hist_data, forecast_days=3):
-    """데이터프레임을 받아 예측을 수행하고 차트 형식으로 반환합니다."""
-    if hist_data is None or len(hist_data) < 20:
-        raise ValueError(f"예측을 위한 데이터가 부족합니다 (현재: {len(hist_data) if hist_data is not None else 0}개)")
-    
-    # hist_data가 DataFrame인 경우 Series로 변환
-    if isinstance(hist_data, pd.DataFrame):
-        hist_data = hist_data.iloc[:, 0]
-    
-    today = date.today()
-    
-    try:
-        # ARIMA 모델 학습 및 예측
-        model = ARIMA(hist_data, order=(5,1,0)).fit()
-        forecast = model.forecast(steps=forecast_days)
-        
-        hist_labels = [d.strftime('%m-%d') for d in hist_data.index]
-        forecast_labels = [(today + timedelta(days=i)).strftime('%m-%d') for i in range(1, forecast_days + 1)]
-        
-        # 1차원 배열로 통일하여 반환
-        historical_values = hist_data.values
-        if len(historical_values.shape) > 1:
-            historical_values = historical_values.flatten()
-        
-        forecast_values = forecast.values
-        if len(forecast_values.shape) > 1:
-            forecast_values = forecast_values.flatten()
-        
-        return {
-            "labels": hist_labels + forecast_labels,
-            "historical": np.round(historical_values, 2).tolist(),
-            "forecast": [None] * len(hist_data) + np.round(forecast_values, 2).tolist()
-        }
-    except Exception as e:
-        print(f"❌ 예측 모델 생성 중 오류: {e}")
-        import traceback
-        print(traceback.format_exc())
-        raise e
-
+# 기사 분석 동시 실행 수와 호출 하나당 제한 시간(초)
+ANALYSIS_WORKERS = int(os.getenv("ANALYSIS_WORKERS", "4"))
+ANALYSIS_TIMEOUT = float(os.getenv("ANALYSIS_TIMEOUT", "60"))
+# 배치 분석 요청 하나의 토큰 한도 (0이면 기사마다 개별 요청)
+ANALYSIS_BATCH_TOKENS = int(os.getenv("ANALYSIS_BATCH_TOKENS", "4000"))
 
 # --- ▼▼▼ 2. AI 예측을 DB에 저장하는 함수 추가 ▼▼▼ ---
 def save_prediction_to_db(prediction_date, sentiment_score, predicted_trend):
     """AI의 예측 결과를 DB에 저장합니다."""
-    conn = None
     try:
-        conn = sqlite3.connect('database.db')
-        cursor = conn.cursor()
-        
-        # database_setup.py의 predictions 테이블 구조에 맞게 삽입
-        cursor.execute("""
-        INSERT OR REPLACE INTO predictions (prediction_date, market_sentiment_score, predicted_trend)
-        VALUES (?, ?, ?)
-        """, (prediction_date, sentiment_score, predicted_trend))
-        
-        conn.commit()
+        # 같은 날짜의 예측이 이미 있으면 덮어씀
+        upsert_predictions([(prediction_date, sentiment_score, predicted_trend)])
         print(f"✅ DB에 {prediction_date}의 예측 결과 '{predicted_trend}' (점수: {sentiment_score}) 저장 완료")
     except Exception as e:
         print(f"❌ DB 예측 저장 실패: {e}")
-    finally:
-        if conn:
-            conn.close()
 # --- ▲▲▲ 함수 추가 완료 ▲▲▲ ---
 
 
-@retry(stop=stop_after_attempt(3), wait=wait_fixed(5))
+def analyze_articles(articles, max_workers=ANALYSIS_WORKERS, timeout=ANALYSIS_TIMEOUT, cache=None,
+                     batch_tokens=ANALYSIS_BATCH_TOKENS):
+    """기사들을 제한된 수의 스레드로 동시에 분석하고, 원래 기사 순서대로 결과를 모읍니다."""
+    targets = []
+    for i, article in enumerate(articles):
+        content = article.get('description') or article.get('snippet', '')
+        if content and len(content) > 100:
+            targets.append((article, content))
+        else:
+            print(f"⏭️  기사 {i+1}/{len(articles)} 건너뜀 (내용 부족)")
+
+    processed_articles, all_keywords, total_sentiment = [], [], 0.0
+    if not targets:
+        return processed_articles, all_keywords, total_sentiment
+
+    contents = [content for _, content in targets]
+    # 배치 모드면 여러 기사를 한 요청으로 묶고, 아니면 기사 하나가 작업 하나
+    if batch_tokens > 0:
+        units = pack_batches(contents, batch_tokens)
+    else:
+        units = [[i] for i in range(len(contents))]
+
+    workers = max(1, min(max_workers, len(units)))
+    print(f"➡️  {len(targets)}개 기사를 {len(units)}개 요청, {workers}개 작업자로 분석 중...")
+    started = time.monotonic()
+    executor = ThreadPoolExecutor(max_workers=workers)
+    try:
+        futures = []
+        for unit in units:
+            if batch_tokens > 0:
+                futures.append(executor.submit(
+                    analyze_articles_batch, [contents[i] for i in unit], batch_tokens, timeout, cache))
+            else:
+                futures.append(executor.submit(analyze_article_with_ai, contents[unit[0]], timeout, cache))
+        # 호출마다 timeout이 걸려 있지만, 대기열과 배치 내 재시도까지 고려한 전체 한도를 한 번 더 둠
+        rounds = -(-len(units) // workers)
+        wait(futures, timeout=timeout * rounds * 2 + 5)
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    results = [None] * len(targets)
+    for unit, future in zip(units, futures):
+        if future.done() and not future.cancelled() and future.exception() is None:
+            unit_results = future.result() if batch_tokens > 0 else [future.result()]
+            for i, result in zip(unit, unit_results):
+                results[i] = result
+
+    # 완료 순서와 무관하게 기사 순서대로 집계해서 결과가 항상 같도록 함
+    for (article, _), ai_result in zip(targets, results):
+        if ai_result is None:
+            ai_result = {"summary": "AI 응답 지연", "sentiment": 0.0, "keywords": ["오류"]}
+        article.update(ai_result)
+        processed_articles.append(article)
+        total_sentiment += ai_result.get('sentiment', 0.0)
+        if ai_result.get('keywords'):
+            all_keywords.extend(ai_result['keywords'])
+
+    print(f"✅ {len(processed_articles)}개 기사 분석 완료 ({time.monotonic() - started:.1f}초)")
+    return processed_articles, all_keywords, total_sentiment
+
+
 def get_marketaux_news(api_key):
-    """Marketaux API로 최신 금융 뉴스를 가져옵니다."""
+    """Marketaux API로 최신 금융 뉴스를 가져옵니다. (재시도/호출량 제한은 http_client가 처리)"""
     if not api_key:
         return []
-    url = f"https://api.marketaux.com/v1/news/all?countries=us&filter_entities=true&language=en&limit=10&api_token={api_key}"
+    params = {"countries": "us", "filter_entities": "true", "language": "en", "limit": 10, "api_token": api_key}
     try:
-        response = requests.get(url, timeout=20)
-        response.raise_for_status()
+        with stage("news.marketaux"):
+            payload = get_client("marketaux").get_json("/v1/news/all", params)
         print("✅ Marketaux 뉴스 수집 성공")
-        return response.json().get('data', [])
-    except requests.exceptions.RequestException as e:
+        return payload.get('data', [])
+    except Exception as e:
         print(f"❌ Marketaux API 호출 중 오류 발생: {e}")
         raise e
 
 
+def run_news_analysis(articles, cache=None):
+    """수집한 기사를 분석하고 트렌드 요약까지 만들어 하나의 딕셔너리로 반환합니다."""
+    with stage("analysis", articles=len(articles)):
+        processed_articles, all_keywords, total_sentiment = analyze_articles(articles, cache=cache)
+
+    market_sentiment_score = total_sentiment / len(processed_articles) if processed_articles else 0.0
+    with stage("gemini.trend_summary"):
+        trend_summary = generate_trend_summary_with_ai(all_keywords, market_sentiment_score)
+    return {
+        "articles": processed_articles,
+        "keywords": all_keywords,
+        "market_sentiment_score": market_sentiment_score,
+        "trend_summary": trend_summary,
+    }
+
+
+def publish_results(analysis, market_results):
+    """오늘의 예측을 DB에 저장하고, 분석/시장 결과를 스냅샷(렌더링 파일, 아카이브, DB 이력)으로 저장합니다."""
+    market_sentiment_score = analysis["market_sentiment_score"]
+    # --- ▼▼▼ 3. DB 저장 로직 추가 (수정된 부분) ▼▼▼ ---
+    today_str = date.today().strftime('%Y-%m-%d')
+
+    # 학습된 모델(market_predictor.pkl)이 있으면 모델로, 없으면 심리 점수 기준(-0.1 미만 '하락')으로 예측
+    prediction = None
+    try:
+        from features import build_live_features  # pandas를 쓰므로 필요한 시점에 import
+        live_features = build_live_features(today_str, market_sentiment_score, len(analysis["articles"]), len(set(analysis["keywords"])))
+        prediction = get_predictor().predict(live_features)
+    except Exception as e:
+        print(f"⚠️  모델 예측 실패, 심리 점수 기준으로 예측합니다: {e}")
+    if prediction:
+        ai_predicted_trend = prediction['trend']
+        print(f"🤖 모델 예측: {ai_predicted_trend} (상승 확률 {prediction['probability_up']:.2f})")
+    else:
+        ai_predicted_trend = '상승'
+        if market_sentiment_score < -0.1:
+            ai_predicted_trend = '하락'
+
+    # DB에 오늘의 예측 저장
+    with stage("write.prediction_db"):
+        save_prediction_to_db(today_str, round(market_sentiment_score, 3), ai_predicted_trend)
+    # --- ▲▲▲ DB 저장 로직 추가 완료 ▲▲▲ ---
+
+    final_data = {
+        "articles": analysis["articles"],
+        "trend_summary": analysis["trend_summary"],
+        "market_sentiment_score": round(market_sentiment_score, 3),
+        **market_results,
+        "last_updated": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    }
+
+    # 대시보드용 축약 파일과 원본 전체 아카이브를 분리해서 저장
+    with stage("write.snapshot_json") as span:
+        write_snapshot(final_data, 'data/daily_data.json', 'data/archive')
+        span["bytes"] = os.path.getsize('data/daily_data.json')
+    # 시간 구간 조회 API용 스냅샷 이력에도 추가
+    with stage("write.snapshot_db"):
+        save_snapshot(final_data)
+    return final_data
+
+
 # --- 메인 실행 로직 ---
 if __name__ == "__main__":
     if not os.path.exists('data'):
         os.makedirs('data')
+    # PROFILE=1 이면 실행 전체를 cProfile로 기록
+    profiler = start_profiler()
+
+    # 시장 데이터 단계는 뉴스 분석과 무관하므로 백그라운드에서 먼저 시작
+    stage_executor = ThreadPoolExecutor(max_workers=1)
+    market_future = stage_executor.submit(run_market_stage)
 
     # 1. 뉴스 수집 및 AI 분석
     print("=" * 60)
@@ -115,116 +197,31 @@ if __name__ == "__main__":
 
     print(f"➡️  총 {len(articles)}개의 최신 뉴스를 수집했습니다.")
     
-    processed_articles, all_keywords, total_sentiment = [], [], 0.0
-    if articles:
-        for i, article in enumerate(articles):
-            print(f"➡️  기사 {i+1}/{len(articles)} 분석 중...", end=" ")
-            content = article.get('description') or article.get('snippet', '')
-            if content and len(content) > 100:
-                ai_result = analyze_article_with_ai(content)
-                article.update(ai_result)
-                processed_articles.append(article)
-                total_sentiment += ai_result.get('sentiment', 0.0)
-                if ai_result.get('keywords'):
-                    all_keywords.extend(ai_result['keywords'])
-                print("✅")
-            else:
-                print("⏭️  (내용 부족)")
-    
-    market_sentiment_score = total_sentiment / len(processed_articles) if processed_articles else 0.0
-    trend_summary = generate_trend_summary_with_ai(all_keywords, market_sentiment_score)
+    analysis_cache = AnalysisCache()
+    analysis = run_news_analysis(articles, analysis_cache)
     print("✅ 뉴스 분석 완료\n")
     
-    # 2. 주식 데이터 수집 (yfinance)
-    nasdaq_data, kospi_data, fx_data = None, None, None
-    
+    # 2. 시장 데이터 수집 및 예측 (나스닥, 코스피, 환율)
     print("=" * 60)
-    print("📈 주식 데이터 수집 시작 (yfinance)")
+    print("📈 시장 데이터 수집 및 예측 결과 대기 중")
     print("=" * 60)
-    
-    # 나스닥
-    try:
-        print("➡️  나스닥 종합지수 데이터 수집 중...", end=" ")
-        nasdaq = yf.Ticker("^IXIC")
-        nasdaq_hist = nasdaq.history(period="3mo", auto_adjust=False, actions=False)
-        
-        if len(nasdaq_hist) > 0:
-            nasdaq_df = nasdaq_hist['Close'].tail(30)
-            print(f"({len(nasdaq_df)}일 수집)")
-            nasdaq_data = process_chart_data(nasdaq_df)
-            print("✅ 나스닥 예측 완료")
-        else:
-            print("⚠️  데이터 없음")
-    except Exception as e:
-        print(f"❌ 실패: {e}")
-    
-    # 코스피
-    try:
-        print("➡️  코스피 지수 데이터 수집 중...", end=" ")
-        kospi = yf.Ticker("^KS11")
-        kospi_hist = kospi.history(period="3mo", auto_adjust=False, actions=False)
-        
-        if len(kospi_hist) > 0:
-            kospi_df = kospi_hist['Close'].tail(30)
-            print(f"({len(kospi_df)}일 수집)")
-            kospi_data = process_chart_data(kospi_df)
-            print("✅ 코스피 예측 완료")
-        else:
-            print("⚠️  데이터 없음")
-    except Exception as e:
-        print(f"❌ 실패: {e}")
 
-    # 3. 환율 데이터 수집 (Alpha Vantage)
-    print("\n" + "=" * 60)
-    print("💱 환율 데이터 수집 시작 (Alpha Vantage)")
-    print("=" * 60)
-    
-    try:
-        av_key = os.getenv("ALPHA_VANTAGE_API_KEY")
-        if av_key:
-            print("➡️  USD/KRW 환율 데이터 수집 중...", end=" ")
-            cc = ForeignExchange(key=av_key, output_format='pandas')
-            fx_raw, _ = cc.get_currency_exchange_daily(from_symbol='USD', to_symbol='KRW', outputsize='compact')
-            fx_hist = fx_raw['4. close'].dropna().astype(float).sort_index().tail(30)
-            print(f"({len(fx_hist)}일 수집)")
-            fx_data = process_chart_data(fx_hist)
-            print("✅ 환율 예측 완료")
-        else:
-            print("⚠️  Alpha Vantage API 키가 설정되지 않았습니다.")
-    except Exception as e:
-        print(f"❌ 실패: {e}")
+    # 뉴스 분석이 끝난 뒤 시장 단계를 기다린 시간 (0에 가까우면 시장 단계가 병목이 아님)
+    with stage("market.wait"):
+        market_results = market_future.result()
+    stage_executor.shutdown()
+    nasdaq_data = market_results.get("nasdaq_data")
+    kospi_data = market_results.get("kospi_data")
+    fx_data = market_results.get("fx_data")
 
-    # 4. 최종 데이터 저장
+    # 3. 최종 데이터 저장
     print("\n" + "=" * 60)
     print("💾 데이터 저장 중...")
     print("=" * 60)
     
-    # --- ▼▼▼ 3. DB 저장 로직 추가 (수정된 부분) ▼▼▼ ---
-    today_str = date.today().strftime('%Y-%m-%d')
-    
-    # 시장 심리 점수에 따라 AI의 예측 결정 (0.1 이상 '상승', -0.1 이하 '하락')
-    ai_predicted_trend = '상승'
-    if market_sentiment_score < -0.1:
-        ai_predicted_trend = '하락'
-    
-    # DB에 오늘의 예측 저장
-    save_prediction_to_db(today_str, round(market_sentiment_score, 3), ai_predicted_trend)
-    # --- ▲▲▲ DB 저장 로직 추가 완료 ▲▲▲ ---
-
-    final_data = {
-        "articles": processed_articles,
-        "trend_summary": trend_summary,
-        "market_sentiment_score": round(market_sentiment_score, 3),
-        "nasdaq_data": nasdaq_data,
-        "kospi_data": kospi_data,
-        "fx_data": fx_data,
-        "last_updated": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    }
-
-    with open('data/daily_data.json', 'w', encoding='utf-8') as f:
-        json.dump(final_data, f, ensure_ascii=False, indent=4)
+    publish_results(analysis, market_results)
     
-    print("✅ 'data/daily_data.json'에 저장 완료")
+    print("✅ 'data/daily_data.json'(렌더링용) 및 'data/archive/'(원본 아카이브)에 저장 완료")
     
     # 저장된 데이터 검증
     print("\n" + "=" * 60)
@@ -249,6 +246,19 @@ if __name__ == "__main__":
     else:
         print("⚠️  환율 데이터 없음")
     
+    cache_stats = analysis_cache.stats()
+    print(f"🗂️  분석 캐시: 적중 {cache_stats['hits']}회 / 미적중 {cache_stats['misses']}회 (적중률 {cache_stats['hit_rate']:.0%})")
+    analysis_cache.close()
+
+    # 단계별 측정 결과를 실행마다 data/metrics/<run_id>.json으로 저장
+    metrics_path = metrics.write()
+    print(f"⏱️  단계별 측정 결과 저장: {metrics_path}")
+    for name, s in sorted(metrics.summary().items(), key=lambda item: -item[1]["total_seconds"]):
+        print(f"   {name}: {s['count']}회, 합계 {s['total_seconds']:.2f}초, 최대 {s['max_seconds']:.2f}초")
+    profile_path = stop_profiler(profiler)
+    if profile_path:
+        print(f"🔬 cProfile 결과 저장: {profile_path}")
+
     print("\n" + "=" * 60)
     print("🚀 모든 작업 완료!")
     print("=" * 60)
\ No newline at end of file
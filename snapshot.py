@@ -0,0 +1,128 @@
+# snapshot.py (대시보드 스냅샷 캐시)
+
+import os
+import json
+import time
+import hashlib
+import threading
+from datetime import datetime, timezone
+
+
+class Snapshot:
+    """한 번 파싱된 daily_data.json 내용과 그 버전 정보를 묶어 둡니다."""
+
+    __slots__ = ("data", "version", "last_modified", "rendered")
+
+    def __init__(self, data, version, last_modified):
+        self.data = data
+        self.version = version              # ETag로 쓰이는 내용 해시
+        self.last_modified = last_modified  # last_updated 기준 (UTC)
+        self.rendered = {}                  # 이 스냅샷으로 렌더링한 HTML 캐시
+
+
+EMPTY_SNAPSHOT = Snapshot(None, "empty", None)
+
+
+def parse_last_updated(value):
+    """'YYYY-MM-DD HH:MM:SS' 형식의 last_updated를 UTC datetime으로 변환합니다.
+
+    last_updated는 datetime.now()로 쓴 현지 시각이므로, 현지 시간대로 해석한 뒤 UTC로 바꿉니다.
+    """
+    if not value:
+        return None
+    try:
+        return datetime.strptime(value, "%Y-%m-%d %H:%M:%S").astimezone(timezone.utc)
+    except ValueError:
+        return None
+
+
+class SnapshotCache:
+    """프로세스 전체에서 공유하는 스냅샷 캐시. 파일의 inode/mtime이 바뀌면 새로 읽어 교체합니다."""
+
+    def __init__(self, path, check_interval=1.0):
+        self.path = path
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._snapshot = EMPTY_SNAPSHOT
+        self._stamp = None
+        self._checked_at = 0.0
+
+    def _file_stamp(self):
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return None
+        return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+    def _load(self, stamp):
+        if stamp is None:
+            print(f"⚠️ {self.path} 파일을 찾을 수 없어 기본 데이터를 사용합니다.")
+            return EMPTY_SNAPSHOT
+        with open(self.path, 'rb') as f:
+            raw = f.read()
+        data = json.loads(raw.decode('utf-8'))
+        version = hashlib.sha1(raw).hexdigest()[:16]
+        return Snapshot(data, version, parse_last_updated(data.get("last_updated")))
+
+    def get(self):
+        """현재 스냅샷을 반환합니다. 파일이 교체되었으면 한 번만 다시 파싱합니다."""
+        now = time.monotonic()
+        if now - self._checked_at < self.check_interval:
+            return self._snapshot
+
+        with self._lock:
+            if now - self._checked_at < self.check_interval:
+                return self._snapshot
+            stamp = self._file_stamp()
+            if stamp != self._stamp:
+                try:
+                    self._snapshot = self._load(stamp)
+                    self._stamp = stamp
+                except (OSError, ValueError) as e:
+                    # 쓰는 도중의 파일을 읽은 경우 등: 기존 스냅샷을 유지하고 다음 확인 때 재시도
+                    print(f"⚠️ 스냅샷 갱신 실패, 이전 데이터를 유지합니다: {e}")
+            self._checked_at = now
+            return self._snapshot
+
+
+# --- 스냅샷 저장 (run_predictions.py에서 사용) ---
+# 템플릿(index.html)이 실제로 읽는 기사 필드만 렌더링용 파일에 남깁니다.
+RENDER_ARTICLE_FIELDS = ("title", "url", "image_url", "summary", "keywords", "sentiment")
+
+
+def build_render_view(final_data):
+    """전체 실행 결과에서 대시보드 렌더링에 필요한 필드만 추린 딕셔너리를 만듭니다."""
+    view = {key: value for key, value in final_data.items() if key != "articles"}
+    view["articles"] = [
+        {field: article.get(field) for field in RENDER_ARTICLE_FIELDS}
+        for article in final_data.get("articles", [])
+    ]
+    return view
+
+
+def write_snapshot(final_data, view_path, archive_dir):
+    """렌더링용 축약 파일을 원자적으로 교체하고, 원본 전체는 월별 JSONL 아카이브에 한 줄로 추가합니다."""
+    os.makedirs(archive_dir, exist_ok=True)
+    month = (final_data.get("last_updated") or datetime.now().strftime("%Y-%m"))[:7]
+    line = json.dumps(final_data, ensure_ascii=False, separators=(',', ':')) + '\n'
+    with open(os.path.join(archive_dir, f"{month}.jsonl"), 'a', encoding='utf-8') as f:
+        f.write(line)
+
+    # 웹 서버가 쓰는 도중의 파일을 읽지 않도록 임시 파일에 쓴 뒤 원자적으로 교체
+    tmp_path = view_path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(build_render_view(final_data), f, ensure_ascii=False, separators=(',', ':'))
+    os.replace(tmp_path, view_path)
+
+
+def iter_archive(archive_dir):
+    """아카이브의 모든 실행 결과를 오래된 순서대로 하나씩 읽습니다."""
+    if not os.path.isdir(archive_dir):
+        return
+    for name in sorted(os.listdir(archive_dir)):
+        if not name.endswith('.jsonl'):
+            continue
+        with open(os.path.join(archive_dir, name), 'r', encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
@@ -0,0 +1,104 @@
+# snapshot_store.py (실행별 스냅샷 이력 저장소)
+
+import os
+import json
+from snapshot import build_render_view, iter_archive
+from db import get_pool
+from charts import to_compact
+
+ARCHIVE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'archive')
+MAX_PAGE_SIZE = 500
+
+
+def compact_series(chart, last_updated=None):
+    """차트 데이터를 압축 형식(charts.py)으로 바꿉니다. 예전 형식도 last_updated 기준으로 변환합니다."""
+    return to_compact(chart, last_updated)
+
+
+def save_snapshot(final_data):
+    """실행 결과 하나를 스냅샷 이력에 추가합니다. 같은 last_updated가 있으면 덮어씁니다."""
+    view = build_render_view(final_data)
+    last_updated = view["last_updated"]
+    series_rows = [
+        (key[:-len("_data")], last_updated, json.dumps(compact_series(chart, last_updated), separators=(',', ':')))
+        for key, chart in view.items() if key.endswith("_data") and chart
+    ]
+    with get_pool().transaction() as conn:
+        conn.execute(
+            "INSERT OR REPLACE INTO snapshots (last_updated, market_sentiment_score, trend_summary, articles) VALUES (?, ?, ?, ?)",
+            (last_updated, view.get("market_sentiment_score"),
+             json.dumps(view.get("trend_summary"), ensure_ascii=False),
+             json.dumps(view.get("articles"), ensure_ascii=False, separators=(',', ':')))
+        )
+        conn.executemany("INSERT OR REPLACE INTO snapshot_series (symbol, last_updated, payload) VALUES (?, ?, ?)", series_rows)
+
+
+def _page(rows, limit):
+    """limit+1개를 읽어 다음 페이지 존재 여부를 판단합니다."""
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    next_cursor = rows[-1][0] if has_more and rows else None
+    return rows, next_cursor
+
+
+def query_series(symbol, start=None, end=None, limit=100, cursor=None):
+    """종목의 스냅샷별 차트 데이터를 last_updated 구간으로 조회합니다. (키셋 페이지네이션)"""
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    query = "SELECT last_updated, payload FROM snapshot_series WHERE symbol = ?"
+    params = [symbol]
+    if start:
+        query += " AND last_updated >= ?"
+        params.append(start)
+    if end:
+        # 날짜만 주어지면 그날 하루 전체를 포함
+        query += " AND last_updated <= ?"
+        params.append(end + " 23:59:59" if len(end) == 10 else end)
+    if cursor:
+        query += " AND last_updated > ?"
+        params.append(cursor)
+    query += " ORDER BY last_updated LIMIT ?"
+    params.append(limit + 1)
+
+    with get_pool().connection() as conn:
+        rows = conn.execute(query, params).fetchall()
+    rows, next_cursor = _page(rows, limit)
+    # 압축 형식 도입 전에 저장된 행도 같은 형식으로 돌려줌
+    items = [dict(last_updated=last_updated, **(compact_series(json.loads(payload), last_updated) or {}))
+             for last_updated, payload in rows]
+    return {"symbol": symbol, "items": items, "next_cursor": next_cursor}
+
+
+def query_snapshots(day=None, limit=20, cursor=None):
+    """스냅샷 목록을 조회합니다. day('YYYY-MM-DD')가 주어지면 그날의 실행만 반환합니다."""
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    query = "SELECT last_updated, market_sentiment_score, trend_summary, articles FROM snapshots WHERE 1 = 1"
+    params = []
+    if day:
+        query += " AND last_updated >= ? AND last_updated <= ?"
+        params.extend([day, day + " 23:59:59"])
+    if cursor:
+        query += " AND last_updated > ?"
+        params.append(cursor)
+    query += " ORDER BY last_updated LIMIT ?"
+    params.append(limit + 1)
+
+    with get_pool().connection() as conn:
+        rows = conn.execute(query, params).fetchall()
+    rows, next_cursor = _page(rows, limit)
+    items = [
+        {"last_updated": last_updated, "market_sentiment_score": score,
+         "trend_summary": json.loads(trend_summary) if trend_summary else None,
+         "articles": json.loads(articles) if articles else []}
+        for last_updated, score, trend_summary, articles in rows
+    ]
+    return {"items": items, "next_cursor": next_cursor}
+
+
+if __name__ == "__main__":
+    # 기존 JSONL 아카이브로 스냅샷 이력을 채웁니다.
+    count = 0
+    for run in iter_archive(ARCHIVE_DIR):
+        if run.get("last_updated"):
+            save_snapshot(run)
+            count += 1
+    print(f"✅ 아카이브에서 스냅샷 {count}개를 이력에 저장했습니다.")
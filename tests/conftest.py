@@ -0,0 +1,22 @@
+# tests/conftest.py (테스트 공용 설정)
+#
+# 저장소 루트의 모듈들은 패키지가 아니라 스크립트이므로 루트를 import 경로에 넣습니다.
+#   python -m pytest -q
+
+import os
+import sys
+
+import pytest
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+
+@pytest.fixture
+def ai_model():
+    """테스트 동안 ai_analyzer의 모델을 바꿔 끼울 수 있게 하고, 끝나면 원래 모델로 되돌립니다."""
+    import ai_analyzer
+    previous = (ai_analyzer._model, ai_analyzer._model_ready)
+    yield ai_analyzer.set_model
+    with ai_analyzer._model_lock:
+        ai_analyzer._model, ai_analyzer._model_ready = previous
@@ -0,0 +1,105 @@
+# tests/test_ai_analyzer.py (배치 프롬프트 분석: 응답 파싱과 단건 분석으로의 전환)
+
+import threading
+
+from ai_analyzer import (StubModel, BATCH_ITEM_PATTERN, pack_batches, parse_batch_response,
+                         analyze_articles_batch, analyze_article_with_ai)
+
+
+class ScriptedBatchModel(StubModel):
+    """배치 요청에서는 drop에 있는 항목 번호를 빼고 응답하고(또는 batch_error를 던지고), 단건 요청은 그대로 응답합니다."""
+
+    def __init__(self, drop=(), batch_error=None):
+        super().__init__(latency=0.0)
+        self.drop = {str(item) for item in drop}
+        self.batch_error = batch_error
+        self.batch_calls = 0
+        self.single_calls = 0
+        self._lock = threading.Lock()
+
+    def generate_content(self, prompt, request_options=None, **kwargs):
+        is_batch = len(BATCH_ITEM_PATTERN.split(prompt)) > 1
+        with self._lock:
+            if is_batch:
+                self.batch_calls += 1
+            else:
+                self.single_calls += 1
+        if is_batch and self.batch_error:
+            raise self.batch_error
+        response = super().generate_content(prompt, request_options, **kwargs)
+        if is_batch and self.drop:
+            blocks = [b for b in response.text.split("\n\n") if b.split("\n", 1)[0][len("ITEM: "):] not in self.drop]
+            response.text = "\n\n".join(blocks)
+        return response
+
+
+def make_contents(count):
+    return [f"Article {i} covers bond yields, central bank guidance and tech earnings in detail." * 2
+            for i in range(count)]
+
+
+def test_parse_batch_response_keeps_valid_items_only():
+    text = ("ITEM: 1\nSENTIMENT: 0.5\nSUMMARY: 첫 기사\nKEYWORDS: a, b, c, d\n\n"
+            "ITEM: [2]\nSENTIMENT: 3.0\nSUMMARY: 둘째 기사\nKEYWORDS: e\n\n"
+            "ITEM: 3\nSUMMARY: 점수 없음\n\n"
+            "ITEM: 4\nSENTIMENT: 알 수 없음\nSUMMARY: 점수 형식 오류\nKEYWORDS: f")
+    results = parse_batch_response(text)
+    assert set(results) == {"1", "2"}
+    assert results["1"] == {"summary": "첫 기사", "sentiment": 0.5, "keywords": ["a", "b", "c"]}
+    # 범위를 벗어난 점수는 -1~1로 자름
+    assert results["2"]["sentiment"] == 1.0
+
+
+def test_pack_batches_respects_item_and_token_limits():
+    contents = make_contents(10)
+    by_items = pack_batches(contents, max_batch_tokens=100000, max_items=4)
+    assert by_items == [[0, 1, 2, 3], [4, 5, 6, 7], [8, 9]]
+    by_tokens = pack_batches(contents, max_batch_tokens=400)
+    assert [i for batch in by_tokens for i in batch] == list(range(10))
+    assert all(len(batch) == 2 for batch in by_tokens)
+    # 한도보다 큰 기사도 혼자 한 묶음으로 들어감
+    assert pack_batches(contents[:2], max_batch_tokens=1) == [[0], [1]]
+
+
+def test_missing_batch_items_fall_back_to_single_requests(ai_model):
+    model = ai_model(ScriptedBatchModel(drop=[2]))
+    contents = make_contents(3)
+    results = analyze_articles_batch(contents, max_batch_tokens=100000)
+
+    assert model.batch_calls == 1
+    assert model.single_calls == 1
+    ai_model(StubModel(latency=0.0))
+    assert results == [analyze_article_with_ai(content) for content in contents]
+
+
+def test_failed_batch_request_falls_back_for_every_item(ai_model):
+    model = ai_model(ScriptedBatchModel(batch_error=TimeoutError("batch timed out")))
+    contents = make_contents(3)
+    results = analyze_articles_batch(contents, max_batch_tokens=100000)
+
+    assert model.single_calls == 3
+    assert all(r["summary"] != "AI 응답 지연" for r in results)
+
+
+class MemoryCache:
+    def __init__(self):
+        self.values = {}
+
+    def get(self, key):
+        return self.values.get(key)
+
+    def put(self, key, value):
+        self.values[key] = value
+
+
+def test_batch_results_are_cached_per_article(ai_model):
+    model = ai_model(ScriptedBatchModel())
+    cache = MemoryCache()
+    contents = make_contents(4)
+    first = analyze_articles_batch(contents, max_batch_tokens=100000, cache=cache)
+    assert len(cache.values) == 4
+
+    # 모두 캐시에 있으면 요청을 보내지 않음
+    calls = model.batch_calls + model.single_calls
+    assert analyze_articles_batch(contents, max_batch_tokens=100000, cache=cache) == first
+    assert model.batch_calls + model.single_calls == calls
@@ -0,0 +1,64 @@
+# tests/test_analyze_articles.py (run_predictions.analyze_articles: 동시 분석과 집계 순서)
+
+import time
+import zlib
+
+from ai_analyzer import StubModel
+from run_predictions import analyze_articles
+
+
+class ShuffledLatencyModel(StubModel):
+    """기사마다 지연을 다르게 주어 요청이 보낸 순서와 다른 순서로 끝나게 하는 스텁 모델."""
+
+    def __init__(self, fail_on=None):
+        super().__init__(latency=0.0)
+        self.fail_on = fail_on
+
+    def generate_content(self, prompt, request_options=None, **kwargs):
+        if self.fail_on and self.fail_on in prompt:
+            raise TimeoutError("stub model timed out")
+        time.sleep((zlib.crc32(prompt.encode('utf-8')) % 7) * 0.005)
+        return super().generate_content(prompt, request_options, **kwargs)
+
+
+def make_articles(count):
+    return [{"title": f"article {i}", "description": f"Article {i} about rates, earnings and the index outlook. " * 3}
+            for i in range(count)]
+
+
+def test_results_follow_input_order_regardless_of_completion_order(ai_model):
+    ai_model(ShuffledLatencyModel())
+    sequential = analyze_articles(make_articles(12), max_workers=1, batch_tokens=0)
+    for _ in range(3):
+        processed, keywords, total = analyze_articles(make_articles(12), max_workers=6, batch_tokens=0)
+        assert [a["title"] for a in processed] == [f"article {i}" for i in range(12)]
+        assert [a["sentiment"] for a in processed] == [a["sentiment"] for a in sequential[0]]
+        assert keywords == sequential[1]
+        # 합계도 같은 순서로 더하므로 부동소수점까지 같아야 함
+        assert total == sequential[2]
+
+
+def test_batch_mode_matches_single_mode(ai_model):
+    ai_model(ShuffledLatencyModel())
+    single = analyze_articles(make_articles(10), max_workers=4, batch_tokens=0)
+    batch = analyze_articles(make_articles(10), max_workers=4, batch_tokens=400)
+    assert [a["sentiment"] for a in batch[0]] == [a["sentiment"] for a in single[0]]
+    assert batch[2] == single[2]
+
+
+def test_short_articles_are_skipped_and_failures_keep_their_place(ai_model):
+    ai_model(ShuffledLatencyModel(fail_on="Article 2 "))
+    articles = make_articles(4)
+    articles.insert(1, {"title": "short", "description": "too short"})
+    processed, keywords, total = analyze_articles(articles, max_workers=4, batch_tokens=0)
+
+    assert [a["title"] for a in processed] == ["article 0", "article 1", "article 2", "article 3"]
+    assert processed[2]["summary"] == "AI 응답 지연"
+    assert processed[2]["sentiment"] == 0.0
+    assert keywords.count("오류") == 1
+    assert total == sum(a["sentiment"] for a in processed)
+
+
+def test_no_analyzable_articles(ai_model):
+    ai_model(ShuffledLatencyModel())
+    assert analyze_articles([{"title": "empty", "snippet": ""}]) == ([], [], 0.0)
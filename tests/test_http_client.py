@@ -0,0 +1,151 @@
+# tests/test_http_client.py (공용 HTTP 계층: 토큰 버킷, Retry-After 처리, 중복 요청 합치기)
+
+import threading
+import time
+from email.utils import formatdate
+
+import pytest
+import requests
+
+import http_client
+from http_client import TokenBucket, HttpClient, parse_retry_after, start_fake_server
+
+
+class FakeClock:
+    """time.monotonic/time.sleep 대신 쓰는 시계. sleep하면 시간이 그만큼 흐릅니다."""
+
+    def __init__(self):
+        self.now = 1000.0
+        self.slept = []
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.slept.append(seconds)
+        self.now += seconds
+
+    def time(self):
+        return time.time()
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(http_client, "time", clock)
+    return clock
+
+
+def test_token_bucket_allows_burst_then_paces(clock):
+    bucket = TokenBucket(rate=2.0, capacity=3)
+    assert [bucket.try_acquire() for _ in range(3)] == [0.0, 0.0, 0.0]
+    assert bucket.try_acquire() == pytest.approx(0.5)
+
+    clock.now += 0.5
+    assert bucket.try_acquire() == 0.0
+    # 오래 쉬어도 capacity 이상은 쌓이지 않음
+    clock.now += 60
+    assert [bucket.try_acquire() for _ in range(4)][-1] > 0
+
+
+def test_token_bucket_acquire_waits_for_next_token(clock):
+    bucket = TokenBucket(rate=4.0, capacity=1)
+    assert bucket.acquire() == 0.0
+    assert bucket.acquire() == pytest.approx(0.25)
+    assert clock.slept == [pytest.approx(0.25)]
+
+
+def test_block_pauses_calls_and_halves_rate_once(clock):
+    bucket = TokenBucket(rate=2.0, capacity=5)
+    bucket.block(3.0)
+    # 같은 제한에 걸린 동시 요청들이 block을 다시 불러도 속도는 한 번만 낮춤
+    bucket.block(1.0)
+    assert bucket.rate == 1.0
+    assert bucket.capacity == 1
+    assert bucket.try_acquire() == pytest.approx(3.0)
+
+    clock.now += 3.0
+    # 차단 동안 쌓인 토큰은 줄어든 capacity(1개)까지만이고, 그 뒤로는 낮춘 속도로 하나씩 채워짐
+    assert bucket.try_acquire() == 0.0
+    assert bucket.try_acquire() == pytest.approx(1.0)
+    clock.now += 1.0
+    assert bucket.try_acquire() == 0.0
+
+
+@pytest.mark.parametrize("value, expected", [
+    ("2.5", 2.5),
+    ("-3", 0.0),
+    (None, None),
+    ("", None),
+    ("soon", None),
+])
+def test_parse_retry_after_seconds(value, expected):
+    assert parse_retry_after(value) == expected
+
+
+def test_parse_retry_after_http_date():
+    assert parse_retry_after(formatdate(time.time() + 30, usegmt=True)) == pytest.approx(30, abs=2)
+    assert parse_retry_after(formatdate(time.time() - 30, usegmt=True)) == 0.0
+
+
+@pytest.fixture
+def fake_marketaux():
+    # 서버는 초당 1회만 허용. 넘으면 429와 Retry-After(다음 토큰까지 남은 시간)를 돌려줌
+    server, url = start_fake_server("marketaux", quota_per_minute=60, latency=0.05)
+    yield server, url
+    server.shutdown()
+
+
+def test_client_honours_retry_after_and_slows_down(fake_marketaux, monkeypatch):
+    server, url = fake_marketaux
+    retries = []
+    monkeypatch.setattr(http_client, "count_retry", retries.append)
+    client = HttpClient("marketaux", base_url=url)
+    # 클라이언트 한도를 서버보다 높게 잡아 429를 받게 함
+    client.limiter = TokenBucket(rate=50.0, capacity=5)
+
+    payloads = [client.get_json("/v1/news/all", {"limit": 1, "page": i}) for i in range(3)]
+
+    assert all(len(p["data"]) == 1 for p in payloads)
+    assert server.stats["served"] == 3
+    assert server.stats["rejected"] >= 1
+    assert retries and set(retries) == {"marketaux"}
+    assert client.limiter.rate < 50.0
+
+
+def test_identical_concurrent_requests_share_one_upstream_call(fake_marketaux):
+    server, url = fake_marketaux
+    client = HttpClient("marketaux", base_url=url)
+    client.limiter = TokenBucket(rate=50.0, capacity=5)
+    barrier = threading.Barrier(8)
+    results = []
+
+    def call():
+        barrier.wait()
+        results.append(client.get_json("/v1/news/all", {"limit": 2}))
+
+    threads = [threading.Thread(target=call) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(results) == 8
+    assert all(r == results[0] for r in results)
+    assert server.stats["served"] + server.stats["rejected"] == 1
+
+
+def test_client_gives_up_after_max_attempts(monkeypatch):
+    server, url = start_fake_server("marketaux", quota_per_minute=60)
+    try:
+        monkeypatch.setattr(http_client, "MAX_ATTEMPTS", 2)
+        client = HttpClient("marketaux", base_url=url)
+        client.limiter = TokenBucket(rate=1000.0, capacity=10)
+        client.get_json("/v1/news/all", {"limit": 1})
+        # Retry-After 동안 기다리지 않도록 차단을 바로 풀어 두 번째 시도도 429를 받게 함
+        monkeypatch.setattr(client.limiter, "block", lambda seconds: None)
+        with pytest.raises(requests.HTTPError):
+            client.get_json("/v1/news/all", {"limit": 1, "page": 2})
+        assert server.stats["rejected"] == 2
+    finally:
+        server.shutdown()
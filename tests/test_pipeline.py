@@ -0,0 +1,201 @@
+# tests/test_pipeline.py (pipeline.py: 단계 건너뛰기, 실패 후 이어서 실행, 실패 전파)
+
+import json
+from datetime import datetime, timedelta
+
+import pytest
+
+import pipeline
+from pipeline import PipelineRun, STAGES
+
+
+@pytest.fixture(autouse=True)
+def pipeline_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(pipeline, "STATE_PATH", str(tmp_path / "state.json"))
+    monkeypatch.setattr(pipeline, "OUTPUT_DIR", str(tmp_path / "outputs"))
+    return tmp_path
+
+
+class FakeStages:
+    """STAGES와 같은 DAG(이름, 입력, key, cadence)에 가짜 실행 함수를 끼운 단계 목록을 만듭니다."""
+
+    def __init__(self):
+        self.calls = []
+        self.values = {"news": ["a"], "prices": [1.0]}
+        self.failing = set()
+        self.degraded = set()
+        self.day = "2026-10-17"
+        self.week = "2026-10-11"
+
+    def _run(self, name):
+        def run(inputs):
+            self.calls.append(name)
+            if name in self.failing:
+                raise RuntimeError(f"{name} failed")
+            if name in self.degraded:
+                return {"value": None, "error": f"{name} fetch failed"}
+            if name in self.values:
+                return {"value": self.values[name]}
+            if name == "actuals":
+                # 실제 actuals_stage처럼, 날마다 새 실제 결과가 생기면 요약이 바뀜
+                return {"latest": self.day}
+            return {"from": {dep: inputs[dep] for dep in sorted(inputs)}}
+        return run
+
+    def stages(self):
+        stages = []
+        for spec in STAGES:
+            spec = dict(spec, run=self._run(spec["name"]), outputs=[])
+            if spec.get("key"):
+                spec["key"] = lambda: self.day
+            if spec.get("cadence"):
+                spec["cadence"] = lambda: self.week
+            stages.append(spec)
+        return stages
+
+    def run(self, **kwargs):
+        self.calls = []
+        ok, results = PipelineRun(stages=self.stages(), **kwargs).run()
+        return ok, results
+
+
+def read_state():
+    with open(pipeline.STATE_PATH, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def test_unchanged_inputs_skip_derived_stages():
+    fake = FakeStages()
+    ok, results = fake.run()
+    assert ok and set(results.values()) == {"ok"}
+
+    ok, results = fake.run()
+    assert ok
+    # 외부 수집 단계는 매번 다시 실행하고, 결과가 같으면 나머지는 건너뜀
+    assert sorted(fake.calls) == ["news", "prices"]
+    assert {name for name, r in results.items() if r == "skipped"} == {"analysis", "forecasts", "actuals",
+                                                                      "training", "snapshot"}
+
+
+def test_changed_source_reruns_only_its_dependents():
+    fake = FakeStages()
+    fake.run()
+    fake.values["news"] = ["a", "b"]
+    fake.run()
+    assert sorted(fake.calls) == ["analysis", "news", "prices", "snapshot"]
+
+
+def test_date_key_reruns_date_keyed_stages():
+    fake = FakeStages()
+    fake.run()
+    fake.day = "2026-10-18"
+    fake.run()
+    assert sorted(fake.calls) == ["actuals", "news", "prices", "snapshot"]
+
+
+def test_training_runs_once_per_cadence_even_when_actuals_change():
+    fake = FakeStages()
+    fake.run()
+    fake.day = "2026-10-18"
+    fake.run()
+    assert "actuals" in fake.calls and "training" not in fake.calls
+
+    # 새 주기에 새 실제 결과가 있으면 재학습, 실제 결과가 그대로면 건너뜀
+    fake.week, fake.day = "2026-10-18", "2026-10-19"
+    fake.run()
+    assert "training" in fake.calls
+    fake.week = "2026-10-25"
+    fake.run()
+    assert "training" not in fake.calls
+
+
+def test_failed_stage_blocks_dependents_but_not_the_snapshot():
+    fake = FakeStages()
+    fake.failing = {"actuals"}
+    ok, results = fake.run()
+    assert not ok
+    assert results["actuals"] == "failed"
+    assert results["training"] == "blocked"
+    # 학습 쪽 실패는 대시보드 게시를 막지 않음
+    assert results["snapshot"] == "ok"
+    assert read_state()["status"] == "failed"
+
+
+def test_recent_failed_run_resumes_without_refetching():
+    fake = FakeStages()
+    fake.failing = {"forecasts"}
+    fake.run()
+    run_id = read_state()["run_id"]
+
+    fake.failing = set()
+    ok, results = fake.run()
+    assert ok
+    assert read_state()["run_id"] == run_id
+    # 이어서 실행할 때는 그 실행에서 받아 둔 외부 수집 결과를 다시 씀
+    assert sorted(fake.calls) == ["forecasts", "snapshot"]
+    assert results["news"] == results["prices"] == "skipped"
+
+
+def test_stale_failed_run_is_not_resumed():
+    fake = FakeStages()
+    fake.failing = {"forecasts"}
+    fake.run()
+    state = read_state()
+    state["started_at"] = (datetime.now() - timedelta(hours=pipeline.PIPELINE_RESUME_HOURS + 1)).strftime(
+        "%Y-%m-%d %H:%M:%S")
+    with open(pipeline.STATE_PATH, 'w', encoding='utf-8') as f:
+        json.dump(state, f)
+
+    fake.failing = set()
+    fake.run()
+    assert read_state()["started_at"] != state["started_at"]
+    assert {"news", "prices"} <= set(fake.calls)
+
+
+def test_fresh_ignores_failed_run():
+    fake = FakeStages()
+    fake.failing = {"forecasts"}
+    fake.run()
+    fake.failing = set()
+    fake.run(fresh=True)
+    assert {"news", "prices", "forecasts"} <= set(fake.calls)
+
+
+def test_degraded_source_still_publishes_and_is_refetched():
+    fake = FakeStages()
+    fake.degraded = {"prices"}
+    fake.failing = {"analysis"}
+    ok, results = fake.run()
+    assert results["prices"] == "degraded"
+    assert results["forecasts"] == "ok"
+    assert read_state()["stages"]["prices"]["error"] == "prices fetch failed"
+
+    # 이어서 실행해도 빈 결과로 끝난 외부 수집은 다시 시도
+    fake.degraded, fake.failing = set(), set()
+    fake.run()
+    assert "prices" in fake.calls and "news" not in fake.calls
+
+
+def test_force_reruns_stage_with_same_inputs():
+    fake = FakeStages()
+    fake.run()
+    fake.run(force=["training"])
+    assert "training" in fake.calls and "snapshot" not in fake.calls
+
+
+def test_missing_output_file_reruns_stage(pipeline_dir, monkeypatch):
+    monkeypatch.setattr(pipeline, "BASE_DIR", str(pipeline_dir))
+    model_file = pipeline_dir / "model.pkl"
+    fake = FakeStages()
+    stages = fake.stages()
+    for spec in stages:
+        if spec["name"] == "training":
+            spec["outputs"] = ["model.pkl"]
+            run = spec["run"]
+            spec["run"] = lambda inputs, run=run: (model_file.write_bytes(b"model"), run(inputs))[1]
+    PipelineRun(stages=stages).run()
+
+    model_file.unlink()
+    fake.calls = []
+    PipelineRun(stages=stages).run()
+    assert "training" in fake.calls
@@ -1,49 +1,174 @@
 # trainer.py
-import sqlite3
+import os
+import json
+import shutil
+from datetime import date, datetime, timedelta
+import numpy as np
 import pandas as pd
-from sklearn.model_selection import train_test_split
+from sklearn.base import clone
+from sklearn.model_selection import TimeSeriesSplit, cross_val_score
 from sklearn.linear_model import LogisticRegression
-from sklearn.metrics import accuracy_score
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.impute import SimpleImputer
+from sklearn.preprocessing import StandardScaler
+from sklearn.pipeline import make_pipeline
+from joblib import Parallel, delayed
 import joblib
+from db import get_pool, upsert_many
+from features import FEATURE_COLUMNS, LOOKBACK_DAYS, load_sources, build_feature_frame
 
-def train_and_save_model():
-    """DB에서 데이터를 가져와 AI 모델을 학습시키고 파일로 저장합니다."""
-    conn = sqlite3.connect('database.db')
-    
-    # DB에서 예측과 실제 결과를 날짜 기준으로 합쳐서 가져옴
-    query = """
-    SELECT
-        p.market_sentiment_score,
-        a.actual_trend
-    FROM predictions p
-    JOIN actuals a ON p.prediction_date = a.actual_date
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+MODEL_PATH = os.path.join(BASE_DIR, 'market_predictor.pkl')
+MODEL_DIR = os.path.join(BASE_DIR, 'models')
+MIN_TRAIN_ROWS = 20  # 최소 20개의 데이터가 있어야 학습 의미가 있음
+
+# 시계열 교차검증으로 비교할 후보 모델들
+CANDIDATES = {
+    "logistic_c0.1": lambda: LogisticRegression(C=0.1, max_iter=1000),
+    "logistic_c1": lambda: LogisticRegression(C=1.0, max_iter=1000),
+    "logistic_c10": lambda: LogisticRegression(C=10.0, max_iter=1000),
+    "random_forest": lambda: RandomForestClassifier(n_estimators=200, max_depth=3, min_samples_leaf=5, random_state=42),
+}
+
+
+def refresh_feature_table():
+    """features 테이블에 없는 날짜와 최근 LOOKBACK_DAYS일의 특성을 계산해 저장하고, 저장한 행 수를 반환합니다.
+
+    가격 봉이 특성을 계산한 뒤에 동기화되면 그 날짜의 수익률/변동성 특성이 비어 있으므로,
+    최근 구간은 매번 다시 계산해 늦게 들어온 가격을 반영합니다.
     """
-    df = pd.read_sql_query(query, conn)
-    conn.close()
+    with get_pool().connection() as conn:
+        first_missing, last_feature = conn.execute("""
+        SELECT (SELECT MIN(p.prediction_date) FROM predictions p
+                LEFT JOIN features f ON f.feature_date = p.prediction_date
+                WHERE f.feature_date IS NULL),
+               (SELECT MAX(feature_date) FROM features)
+        """).fetchone()
+    candidates = [first_missing]
+    if last_feature:
+        candidates.append((date.fromisoformat(last_feature) - timedelta(days=LOOKBACK_DAYS)).isoformat())
+    candidates = [d for d in candidates if d]
+    if not candidates:
+        return 0
+    first = min(candidates)
+
+    since = (date.fromisoformat(first) - timedelta(days=LOOKBACK_DAYS)).isoformat()
+    frame = build_feature_frame(*load_sources(since))
+    frame = frame[frame["d"] >= first]
+    # 빈 값(NaN)은 SQLite에서 NULL로 저장됨
+    values = frame[FEATURE_COLUMNS].astype(float).to_numpy().tolist()
+    rows = [(d, *v) for d, v in zip(frame["d"], values)]
+    return upsert_many("features", ["feature_date"] + FEATURE_COLUMNS, rows, key=["feature_date"])
+
+
+def load_training_data():
+    """특성 테이블과 실제 결과를 날짜로 합쳐 학습 데이터를 만듭니다."""
+    query = f"""
+    SELECT f.feature_date, {', '.join('f.' + c for c in FEATURE_COLUMNS)}, a.actual_trend
+    FROM features f
+    JOIN actuals a ON f.feature_date = a.actual_date
+    ORDER BY f.feature_date
+    """
+    with get_pool().connection() as conn:
+        return pd.read_sql_query(query, conn)
+
+
+def make_model(name):
+    """결측치 대체와 표준화를 포함한 학습 파이프라인을 만듭니다."""
+    return make_pipeline(SimpleImputer(strategy="median", keep_empty_features=True), StandardScaler(), CANDIDATES[name]())
+
+
+def _evaluate(name, X, y, n_splits):
+    scores = cross_val_score(make_model(name), X, y, cv=TimeSeriesSplit(n_splits=n_splits), scoring="accuracy")
+    return name, float(np.mean(scores)), float(np.std(scores))
 
-    if len(df) < 20: # 최소 20개의 데이터가 있어야 학습 의미가 있음
+
+def cv_splits(n_samples):
+    """학습 데이터 크기에 맞춘 시계열 교차검증 분할 수."""
+    return max(2, min(5, n_samples // 10))
+
+
+def select_model(X, y, n_jobs=-1):
+    """후보 모델들을 시계열 교차검증으로 병렬 평가해 (이름, 평균 정확도, 표준편차) 목록을 정확도 순으로 반환합니다."""
+    n_splits = cv_splits(len(X))
+    results = Parallel(n_jobs=n_jobs)(delayed(_evaluate)(name, X, y, n_splits) for name in CANDIDATES)
+    return sorted(results, key=lambda r: r[1], reverse=True)
+
+
+def current_model_accuracy(X, y):
+    """현재 서비스 중인(promoted) 모델을 이번 학습 데이터의 같은 교차검증 분할로 다시 평가한 정확도. 없으면 None.
+
+    저장된 cv_accuracy는 학습 당시의 표본으로 낸 점수라 새 후보의 점수와 바로 비교할 수 없으므로,
+    서비스 모델의 설정(학습 전 상태로 복제)을 지금의 분할로 다시 학습·평가합니다.
+    """
+    with get_pool().connection() as conn:
+        row = conn.execute("SELECT path FROM model_versions WHERE promoted = 1 ORDER BY version DESC LIMIT 1").fetchone()
+    if not row:
+        return None
+    try:
+        artifact = joblib.load(os.path.join(BASE_DIR, row[0]))
+    except Exception as e:
+        print(f"⚠️  서비스 모델 파일을 읽지 못해 비교 없이 진행합니다: {e}")
+        return None
+    if not isinstance(artifact, dict) or list(artifact.get("features", [])) != FEATURE_COLUMNS:
+        # 특성 구성이 다른 예전 모델은 같은 데이터로 평가할 수 없음
+        return None
+    scores = cross_val_score(clone(artifact["model"]), X, y, cv=TimeSeriesSplit(n_splits=cv_splits(len(X))), scoring="accuracy")
+    return float(np.mean(scores))
+
+
+def train_and_save_model():
+    """DB에서 데이터를 가져와 AI 모델을 학습시키고 버전별로 저장합니다."""
+    # 1. 새 날짜와 최근 구간의 특성만 계산해서 특성 테이블 갱신
+    added = refresh_feature_table()
+    print(f"특성 테이블 갱신: {added}행")
+
+    df = load_training_data()
+    if len(df) < MIN_TRAIN_ROWS:
         print(f"학습 데이터가 부족합니다. 현재 데이터 {len(df)}개. 학습을 건너뜁니다.")
         return
 
-    # 1. 특성(X)과 라벨(y) 분리
-    X = df[['market_sentiment_score']]
+    # 2. 특성(X)과 라벨(y) 분리
+    X = df[FEATURE_COLUMNS].astype(float)
     y = df['actual_trend']
+    if y.nunique() < 2:
+        print("실제 결과가 한 종류뿐이라 학습을 건너뜁니다.")
+        return
 
-    # 2. 학습 데이터와 테스트 데이터 분리
-    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
+    # 3. 후보 모델을 시계열 교차검증으로 비교해 가장 좋은 모델 선택
+    ranking = select_model(X, y)
+    for name, mean, std in ranking:
+        print(f"  - {name}: 정확도 {mean:.3f} (±{std:.3f})")
+    best_name, best_accuracy, best_std = ranking[0]
 
-    # 3. 모델 선택 및 학습 (로지스틱 회귀)
-    model = LogisticRegression()
-    model.fit(X_train, y_train)
+    # 4. 선택된 모델을 전체 데이터로 학습하고 버전을 붙여 저장
+    model = make_model(best_name).fit(X, y)
+    version = datetime.now().strftime("%Y%m%d%H%M%S")
+    os.makedirs(MODEL_DIR, exist_ok=True)
+    path = os.path.join(MODEL_DIR, f"market_predictor_{version}.pkl")
+    joblib.dump({"model": model, "features": FEATURE_COLUMNS, "version": version}, path)
 
-    # 4. 모델 평가
-    predictions = model.predict(X_test)
-    accuracy = accuracy_score(y_test, predictions)
-    print(f"모델 재학습 완료! 새 모델의 예측 정확도: {accuracy:.2f}")
+    # 5. 기존 모델보다 나쁘지 않을 때만 서비스 모델(market_predictor.pkl)로 승격
+    previous = current_model_accuracy(X, y)
+    promoted = previous is None or best_accuracy >= previous
+    with get_pool().transaction() as conn:
+        if promoted:
+            conn.execute("UPDATE model_versions SET promoted = 0 WHERE promoted = 1")
+        conn.execute(
+            "INSERT INTO model_versions (version, created_at, model_name, features, cv_accuracy, cv_std, n_samples, path, promoted) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (version, datetime.now().strftime("%Y-%m-%d %H:%M:%S"), best_name, json.dumps(FEATURE_COLUMNS),
+             best_accuracy, best_std, len(df), os.path.relpath(path, BASE_DIR), int(promoted))
+        )
+    print(f"모델 재학습 완료! {best_name} (버전 {version}), 교차검증 정확도: {best_accuracy:.2f}")
 
-    # 5. 똑똑해진 모델을 파일로 저장
-    joblib.dump(model, 'market_predictor.pkl')
-    print("새로운 AI 모델 'market_predictor.pkl'을 저장했습니다.")
+    if promoted:
+        tmp_path = MODEL_PATH + '.tmp'
+        shutil.copyfile(path, tmp_path)
+        os.replace(tmp_path, MODEL_PATH)
+        print("새로운 AI 모델 'market_predictor.pkl'을 저장했습니다.")
+    else:
+        print(f"기존 모델(같은 분할로 다시 평가한 정확도 {previous:.2f})보다 낮아 승격하지 않았습니다. 버전 파일만 보관합니다.")
 
 if __name__ == "__main__":
-    train_and_save_model()
\ No newline at end of file
+    train_and_save_model()
@@ -0,0 +1,26 @@
+# wsgi.py (운영 서버 진입점)
+#
+#   gunicorn -c gunicorn.conf.py wsgi:application
+#
+# gunicorn.conf.py는 preload_app을 켜 두므로 이 모듈은 마스터 프로세스에서 한 번만 import됩니다.
+# 여기서 스냅샷 파싱, 대시보드 HTML 렌더링, 차트 JSON 압축까지 미리 해 두면
+# fork된 워커들은 같은 메모리 페이지(copy-on-write)를 그대로 공유하고 각자 다시 파싱하지 않습니다.
+
+from app import app, snapshot_cache
+
+
+def warm_snapshot():
+    """현재 스냅샷을 읽고, 스냅샷별 캐시(대시보드 HTML, 압축된 차트 JSON)를 미리 채웁니다."""
+    snapshot = snapshot_cache.get()
+    client = app.test_client()
+    client.get('/')
+    client.get('/api/charts', headers={'Accept-Encoding': 'gzip'})
+    if snapshot.data is None:
+        print("⚠️ 스냅샷이 없습니다. 워커는 파일이 생기면 각자 읽어 들입니다.")
+    else:
+        print(f"✅ 스냅샷 {snapshot.version} ({snapshot.data.get('last_updated')}) 사전 로딩 완료")
+    return snapshot
+
+
+warm_snapshot()
+application = app